@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User
+from .models import User, RankTier
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -22,4 +22,11 @@ class CustomUserAdmin(UserAdmin):
     )
 
     # Ordenação padrão no admin
-    ordering = ('-date_joined',)
\ No newline at end of file
+    ordering = ('-date_joined',)
+
+
+@admin.register(RankTier)
+class RankTierAdmin(admin.ModelAdmin):
+    list_display = ('name', 'min_xp', 'color', 'icon')
+    list_editable = ('min_xp', 'color', 'icon')
+    ordering = ('min_xp',)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = 'apps.accounts'
+
+    def ready(self):
+        # Ativa os signals (invalidação do cache de patentes)
+        import apps.accounts.signals
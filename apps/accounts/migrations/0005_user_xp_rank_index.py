@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_user_is_plus'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-xp', 'id'], name='user_xp_rank_idx'),
+        ),
+    ]
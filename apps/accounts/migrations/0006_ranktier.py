@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_xp_rank_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankTier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nome')),
+                ('min_xp', models.PositiveIntegerField(unique=True, verbose_name='XP mínimo')),
+                ('color', models.CharField(default='slate-400', max_length=50, verbose_name='Cor (Tailwind)')),
+                ('icon', models.CharField(default='fa-seedling', max_length=50, verbose_name='Ícone (FontAwesome)')),
+            ],
+            options={
+                'verbose_name': 'Patente',
+                'verbose_name_plural': 'Patentes',
+                'ordering': ['min_xp'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:46
+
+from django.db import migrations
+
+# Faixas que estavam fixas em User.rank / User.next_rank_data
+TIERS = [
+    (0, 'Junior Developer', 'slate-400', 'fa-seedling'),
+    (100, 'Programador Junior', 'blue-400', 'fa-code'),
+    (250, 'Programador Senior', 'neon', 'fa-code-branch'),
+    (500, 'Engenheiro de Software I', 'accent', 'fa-user-gear'),
+    (1000, 'Arquiteto de Sistemas', 'violet-500', 'fa-crown'),
+]
+
+
+def seed_tiers(apps, schema_editor):
+    RankTier = apps.get_model('accounts', 'RankTier')
+    for min_xp, name, color, icon in TIERS:
+        RankTier.objects.get_or_create(min_xp=min_xp, defaults={'name': name, 'color': color, 'icon': icon})
+
+
+def remove_tiers(apps, schema_editor):
+    RankTier = apps.get_model('accounts', 'RankTier')
+    RankTier.objects.filter(min_xp__in=[min_xp for min_xp, _, _, _ in TIERS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_ranktier'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_tiers, remove_tiers),
+    ]
@@ -0,0 +1,88 @@
+# apps/accounts/ranks.py
+import time
+from bisect import bisect_right
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import RankTier
+
+RANK_TIERS_CACHE_KEY = 'accounts:rank_tiers'
+
+# Segundos que cada processo confia na sua cópia local antes de reler o cache compartilhado
+LOCAL_TTL = 30
+
+# Patente de quem está abaixo da primeira faixa (ou com a tabela vazia)
+DEFAULT_TIER = {'name': 'Junior Developer', 'color': 'slate-400', 'icon': 'fa-seedling', 'min_xp': 0}
+MAX_RANK_DATA = {'percent': 100, 'missing': 0, 'next_label': "Nível Máximo", 'is_max': True}
+
+_local = {'tiers': None, 'loaded_at': 0.0}
+
+
+def _load_tiers():
+    tiers = cache.get(RANK_TIERS_CACHE_KEY)
+    if tiers is None:
+        rows = RankTier.objects.order_by('min_xp').values_list('min_xp', 'name', 'color', 'icon')
+        tiers = (
+            tuple(min_xp for min_xp, _, _, _ in rows),
+            tuple(
+                {'name': name, 'color': color, 'icon': icon, 'min_xp': min_xp}
+                for min_xp, name, color, icon in rows
+            ),
+        )
+        cache.set(RANK_TIERS_CACHE_KEY, tiers, settings.REFERENCE_CACHE_TIMEOUT)
+    return tiers
+
+
+def get_tiers():
+    """
+    Patentes ordenadas: (limiares, [dict da patente, ...]).
+    Memorizadas no processo por LOCAL_TTL segundos sobre o cache compartilhado,
+    então acessos repetidos em templates não consultam nada.
+    """
+    now = time.monotonic()
+    if _local['tiers'] is None or now - _local['loaded_at'] > LOCAL_TTL:
+        _local['tiers'] = _load_tiers()
+        _local['loaded_at'] = now
+    return _local['tiers']
+
+
+def invalidate_tiers():
+    """Chamado pelos signals de RankTier: outros processos atualizam em até LOCAL_TTL."""
+    cache.delete(RANK_TIERS_CACHE_KEY)
+    _local['tiers'] = None
+
+
+def tier_for(xp):
+    thresholds, tiers = get_tiers()
+    index = bisect_right(thresholds, xp or 0) - 1
+    return tiers[index] if index >= 0 else DEFAULT_TIER
+
+
+def tiers_for(xps):
+    """Patente de vários alunos de uma vez (listas de ranking), com uma única leitura das faixas."""
+    thresholds, tiers = get_tiers()
+    result = []
+    for xp in xps:
+        index = bisect_right(thresholds, xp or 0) - 1
+        result.append(tiers[index] if index >= 0 else DEFAULT_TIER)
+    return result
+
+
+def next_rank_data(xp):
+    """Dados da barra de progresso até a PRÓXIMA patente."""
+    xp = xp or 0
+    thresholds, tiers = get_tiers()
+    index = bisect_right(thresholds, xp)
+    if index >= len(thresholds):
+        return MAX_RANK_DATA
+
+    goal = thresholds[index]
+    # Fórmula: (XP Atual / Meta) * 100
+    percent = int((xp / goal) * 100) if goal > 0 else 0
+    return {
+        'percent': percent,
+        'missing': goal - xp,
+        'next_label': tiers[index]['name'],
+        'is_max': False,
+    }
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import RankTier
+from .ranks import invalidate_tiers
+from apps.gamification.cache import bump_content_version
+
+
+@receiver([post_save, post_delete], sender=RankTier)
+def invalidate_rank_tiers(sender, **kwargs):
+    # Patentes editadas no admin: descarta a lista ordenada em cache
+    invalidate_tiers()
+    # Patentes aparecem em todas as páginas (navbar): invalida ETags e páginas em cache
+    bump_content_version()
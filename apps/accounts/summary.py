@@ -0,0 +1,85 @@
+# apps/accounts/summary.py
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from apps.gamification import leaderboard
+from apps.gamification.cache import (
+    CONTENT_VERSION_KEY, get_content_version, get_user_version, user_version_key,
+)
+from apps.gamification.models import PointTransaction, Trail, UserMedal, UserTrailProgress
+
+DASHBOARD_CACHE_KEY = 'accounts:dashboard:{user_id}'
+
+
+@dataclass
+class DashboardSummary:
+    transacoes_recentes: list = field(default_factory=list)
+    conquistas: list = field(default_factory=list)
+    overall_progress: int = 0
+    total_trails: int = 0
+    completed_trails: int = 0
+
+
+def build_summary(user):
+    """Monta o resumo do aluno com quatro consultas (histórico, medalhas, progresso, catálogo)."""
+    transacoes = list(PointTransaction.objects.filter(user=user).order_by('-created_at')[:3])
+    conquistas = list(UserMedal.objects.filter(user=user).select_related('medal'))
+    progress = UserTrailProgress.objects.filter(user=user).aggregate(
+        done=Coalesce(Sum('completed_chapters'), 0),
+        completed_trails=Count('id', filter=Q(is_completed=True)),
+    )
+    # Trilhas e capítulos do catálogo em uma única consulta (LEFT JOIN)
+    catalogo = Trail.objects.aggregate(
+        trails=Count('id', distinct=True),
+        chapters=Count('chapters'),
+    )
+    total_chapters = catalogo['chapters']
+    return DashboardSummary(
+        transacoes_recentes=transacoes,
+        conquistas=conquistas,
+        overall_progress=int(progress['done'] / total_chapters * 100) if total_chapters > 0 else 0,
+        total_trails=catalogo['trails'],
+        completed_trails=progress['completed_trails'],
+    )
+
+
+def get_dashboard(user, top_n=5):
+    """
+    Resumo do dashboard + ranking, com uma única ida ao cache (get_many) quando
+    nada mudou. O resumo é guardado junto das versões com que foi montado
+    (dados do aluno + catálogo) e reconstruído se alguma delas mudou.
+    O Top N e a posição do aluno são globais e expiram por tempo.
+    Retorna (resumo, ranking, minha_posicao).
+    """
+    summary_key = DASHBOARD_CACHE_KEY.format(user_id=user.pk)
+    version_key = user_version_key(user.pk)
+    top_key = leaderboard.TOP_CACHE_KEY.format(n=top_n)
+    rank_key = leaderboard.MY_RANK_CACHE_KEY.format(user_id=user.pk, xp=user.xp)
+    found = cache.get_many([summary_key, version_key, CONTENT_VERSION_KEY, top_key, rank_key])
+
+    versions = (
+        found.get(version_key) or get_user_version(user.pk),
+        found.get(CONTENT_VERSION_KEY) or get_content_version(),
+    )
+    cached = found.get(summary_key)
+    if cached is not None and cached[0] == versions:
+        summary = cached[1]
+    else:
+        summary = build_summary(user)
+        cache.set(summary_key, (versions, summary), settings.DASHBOARD_CACHE_TIMEOUT)
+
+    ranking = found.get(top_key)
+    if ranking is None:
+        ranking = leaderboard.top(top_n)
+        cache.set(top_key, ranking, settings.LEADERBOARD_HISTOGRAM_TIMEOUT)
+
+    minha_posicao = found.get(rank_key)
+    if minha_posicao is None:
+        minha_posicao = leaderboard.my_rank(user)
+        cache.set(rank_key, minha_posicao, settings.LEADERBOARD_HISTOGRAM_TIMEOUT)
+
+    return summary, ranking, minha_posicao
@@ -0,0 +1,56 @@
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from apps.accounts.summary import get_dashboard
+from apps.gamification.models import Trail, Chapter, UserProgress, Medal
+from apps.gamification.ledger import credit_xp
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class DashboardSummaryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='resumo', ru='7400001')
+        self.trail = Trail.objects.create(title="Python", description="d")
+        self.chapters = [Chapter.objects.create(trail=self.trail, title=f"Cap {i}", order=i) for i in (1, 2)]
+
+    def load(self):
+        self.user.refresh_from_db()
+        return get_dashboard(self.user)
+
+    def test_repeat_visit_is_served_from_cache(self):
+        self.load()
+        with self.assertNumQueries(0):
+            summary, ranking, minha_posicao = get_dashboard(self.user)
+        self.assertEqual(summary.total_trails, 1)
+        self.assertEqual(minha_posicao.position, 1)
+
+    def test_ledger_progress_and_medal_writes_invalidate(self):
+        self.load()
+        Medal.objects.create(name="Bronze", description="10 pts", min_points=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            credit_xp(self.user, 20, "Leitura: Cap 1")
+        summary, _, _ = self.load()
+        self.assertEqual([t.quantity for t in summary.transacoes_recentes], [20])
+        self.assertEqual([c.medal.name for c in summary.conquistas], ["Bronze"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProgress.objects.create(user=self.user, chapter=self.chapters[0])
+        summary, _, _ = self.load()
+        self.assertEqual(summary.overall_progress, 50)
+
+    def test_content_change_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProgress.objects.create(user=self.user, chapter=self.chapters[0])
+        self.assertEqual(self.load()[0].overall_progress, 50)
+
+        Chapter.objects.create(trail=self.trail, title="Cap 3", order=3)
+        self.assertEqual(self.load()[0].overall_progress, 33)
+
+    def test_dashboard_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('accounts:dashboard'))
+        self.assertContains(response, '0 Desbloqueados')
@@ -0,0 +1,45 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from apps.accounts.models import RankTier
+from apps.accounts import ranks
+
+User = get_user_model()
+
+
+class RankTierTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        ranks.invalidate_tiers()
+
+    def test_seeded_tiers_match_previous_thresholds(self):
+        casos = {
+            0: 'Junior Developer',
+            99: 'Junior Developer',
+            100: 'Programador Junior',
+            250: 'Programador Senior',
+            999: 'Engenheiro de Software I',
+            5000: 'Arquiteto de Sistemas',
+        }
+        for xp, nome in casos.items():
+            self.assertEqual(User(xp=xp).rank['name'], nome, xp)
+
+    def test_next_rank_data(self):
+        self.assertEqual(
+            User(xp=150).next_rank_data,
+            {'percent': 60, 'missing': 100, 'next_label': 'Programador Senior', 'is_max': False},
+        )
+        self.assertTrue(User(xp=1000).next_rank_data['is_max'])
+
+    def test_lookup_is_cached_and_invalidated_on_save(self):
+        ranks.tier_for(10)
+        with self.assertNumQueries(0):
+            [User(xp=xp).rank for xp in range(0, 2000, 50)]
+
+        RankTier.objects.create(name='Staff Engineer', min_xp=5000, color='violet-500', icon='fa-trophy')
+        self.assertEqual(ranks.tier_for(6000)['name'], 'Staff Engineer')
+        self.assertEqual(User(xp=1200).next_rank_data['next_label'], 'Staff Engineer')
+
+    def test_tiers_for_many_users(self):
+        nomes = [tier['name'] for tier in ranks.tiers_for([0, 300, 1000, None])]
+        self.assertEqual(nomes, ['Junior Developer', 'Programador Senior', 'Arquiteto de Sistemas', 'Junior Developer'])
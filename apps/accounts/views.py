@@ -4,12 +4,9 @@ from django.contrib import messages
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum
-from django.db.models.functions import Coalesce
-from apps.gamification.models import UserProgress, Trail, UserMedal, PointTransaction, Chapter
-from django.utils import timezone
-
-from django.db.models import Count, Q
+from django.conf import settings
+from apps.gamification.cache import user_conditional_page
+from .summary import get_dashboard
 
 
 
@@ -50,51 +47,24 @@ def register(request):
 User = get_user_model()
 
 @login_required
+@user_conditional_page(refresh=settings.LEADERBOARD_HISTOGRAM_TIMEOUT)
 def dashboard(request):
     user = request.user
-    
-    # 1. Leaderboard Global (Top 5) - Mantido
-    ranking = User.objects.all().order_by('-xp')[:5] 
-    
-    # 2. Log de Operações Recentes - Mantido
-    transacoes_recentes = PointTransaction.objects.filter(
-        user=user
-    ).order_by('-created_at')[:3]
 
-    # 3. Medalhas com select_related (Ótimo para performance) - Mantido
-    conquistas = UserMedal.objects.filter(user=user).select_related('medal')
-
-    # 4. ESTATÍSTICAS OTIMIZADAS (Ponto forte para o relatório técnico)
-    # Pegamos o total de capítulos do sistema em uma única consulta
-    total_chapters_system = Chapter.objects.count()
-    
-    # Pegamos o total de capítulos que o usuário já completou
-    completed_chapters_count = UserProgress.objects.filter(user=user).count()
-    
-    # Cálculo de Sincronia Global
-    overall_progress = int((completed_chapters_count / total_chapters_system * 100)) if total_chapters_system > 0 else 0
-
-    # 5. CÁLCULO DE TRILHAS CONCLUÍDAS (Melhoria de Engenharia)
-    # Em vez de um loop manual, pedimos para o banco contar trilhas onde
-    # o número de capítulos concluídos é igual ao total de capítulos da trilha.
-    trails = Trail.objects.annotate(
-        total_ch=Count('chapters', distinct=True),
-        done_ch=Count('chapters', filter=Q(chapters__userprogress__user=user), distinct=True)
-    )
-    
-    completed_trails_count = 0
-    for t in trails:
-        if t.total_ch > 0 and t.total_ch == t.done_ch:
-            completed_trails_count += 1
+    # Resumo cacheado por aluno (versão bumpada por XP / progresso / medalhas)
+    # + Top 5 global e posição do aluno: uma leitura do cache nas visitas repetidas
+    summary, ranking, minha_posicao = get_dashboard(user, top_n=5)
 
     context = {
         'user': user,
         'ranking': ranking,
-        'overall_progress': overall_progress,
-        'transacoes_recentes': transacoes_recentes,
-        'conquistas': conquistas,
-        'total_trails': trails.count(),
-        'completed_trails': completed_trails_count,
+        'minha_posicao': minha_posicao,
+        'em_destaque': minha_posicao.position > len(ranking),
+        'overall_progress': summary.overall_progress,
+        'transacoes_recentes': summary.transacoes_recentes,
+        'conquistas': summary.conquistas,
+        'total_trails': summary.total_trails,
+        'completed_trails': summary.completed_trails,
     }
     
-    return render(request, 'accounts/dashboard.html', context)
\ No newline at end of file
+    return render(request, 'accounts/dashboard.html', context)
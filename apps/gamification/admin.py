@@ -1,111 +1,55 @@
-import os
 import json
 from django.contrib import admin, messages
-from google import genai
-from .models import Medal, Trail, Chapter, Alternativa, PointTransaction, UserMedal, Questao
-from .services import gerar_conteudo_aula
-import re
-import time
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from .models import Medal, Trail, Chapter, Alternativa, PointTransaction, UserMedal, Questao, UserTrailProgress, QuizAttempt, QuizAnswer, Technology, Job
+from .quiz import chapter_statistics
+from .catalog import chapter_counts
+from .taxonomy import technology_by_slug
+from .ordering import reorder_chapters
+from .jobs import enqueue_many
 
 
 
 # --- ADMIN ACTIONS (Inteligência Artificial) ---
+# As chamadas à IA rodam no worker (python manage.py run_jobs), fora do request:
+# as ações só enfileiram uma tarefa por aula e o progresso aparece em "Tarefas".
+
+def _enfileirar(request, kind, chapters):
+    jobs = enqueue_many(kind, [{'chapter_id': chapter.pk} for chapter in chapters], user=request.user)
+    url = reverse('admin:gamification_job_changelist')
+    messages.success(request, format_html(
+        '✅ {} tarefas enfileiradas. Acompanhe em <a href="{}">Tarefas em Segundo Plano</a>.', len(jobs), url
+    ))
 
 @admin.action(description="🤖 1. Gerar Texto da Aula via IA")
 def automatizar_conteudo(modeladmin, request, queryset):
-    """Gera o conteúdo em HTML para as aulas selecionadas"""
-    for chapter in queryset:
-        conteudo_gerado = gerar_conteudo_aula(chapter.title)
-        if conteudo_gerado:
-            chapter.content = conteudo_gerado
-            chapter.save()
-            messages.success(request, f"Conteúdo gerado para: {chapter.title}")
-        else:
-            messages.warning(request, f"A IA falhou em gerar conteúdo para: {chapter.title}")
-
-
+    """Enfileira a geração do conteúdo em HTML para as aulas selecionadas"""
+    _enfileirar(request, Job.Kind.CONTEUDO_AULA, queryset.only('id'))
 
 @admin.action(description="📝 2. Gerar Questionário via IA (Resiliente)")
 def gerar_questoes_ia_action(modeladmin, request, queryset):
-    api_key = os.getenv("GEMINI_API_KEY")
-    client = genai.Client(api_key=api_key)
-    
-    sucesso_count = 0
-    # Sua lista de modelos testada e aprovada
-    modelos_tentar = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-flash-latest']
-
-    for chapter in queryset:
+    chapters = list(queryset.only('id', 'title', 'content'))
+    for chapter in chapters:
         if not chapter.content:
             messages.warning(request, f"Pulei '{chapter.title}': Não há conteúdo para basear as perguntas.")
-            continue
-
-        # Prompt estruturado para garantir que a IA entenda o formato de dados
-        prompt = f"""
-        OBJETIVO: Gerar 3 questões de múltipla escolha sobre: "{chapter.content}"
-        RETORNE APENAS UM JSON PURO (ARRAY):
-        [
-          {{
-            "enunciado": "Pergunta?",
-            "xp": 10,
-            "alternativas": [
-              {{"texto": "Opção A", "correta": true}},
-              {{"texto": "Opção B", "correta": false}},
-              {{"texto": "Opção C", "correta": false}},
-              {{"texto": "Opção D", "correta": false}}
-            ]
-          }}
-        ]
-        """
-        
-        gerou_para_este_capitulo = False
-        
-        for modelo in modelos_tentar:
-            try:
-                # Chamada da API
-                response = client.models.generate_content(
-                    model=modelo,
-                    contents=prompt
-                )
-                
-                if response and response.text:
-                    # --- SANITIZAÇÃO (Igual ao que você usa no texto da aula) ---
-                    # Remove ```json, ``` e a própria palavra json que podem vir na resposta
-                    texto_limpo = re.sub(r'```json|```|json', '', response.text).strip()
-                    
-                    questoes_data = json.loads(texto_limpo)
-                    
-                    for item in questoes_data:
-                        q = Questao.objects.create(
-                            chapter=chapter,
-                            enunciado=item['enunciado'],
-                            xp_recompensa=item.get('xp', 10)
-                        )
-                        for alt in item['alternativas']:
-                            Alternativa.objects.create(
-                                questao=q,
-                                texto=alt['texto'],
-                                e_correta=alt['correta']
-                            )
-                    
-                    gerou_para_este_capitulo = True
-                    sucesso_count += 1
-                    break  # Conseguiu! Sai do loop de modelos e vai para o próximo capítulo
-                
-            except Exception as e:
-                erro_msg = str(e)
-                if "429" in erro_msg or "RESOURCE_EXHAUSTED" in erro_msg:
-                    # Se for erro de cota, espera um pouco e tenta o próximo modelo
-                    time.sleep(2)
-                    continue 
-                else:
-                    messages.error(request, f"Erro no modelo {modelo} (Capítulo {chapter.title}): {erro_msg}")
-                    # Em caso de erro desconhecido, tentamos o próximo modelo também
-                    continue
-
-    if sucesso_count > 0:
-        messages.success(request, f"✅ Sucesso! Questões geradas para {sucesso_count} capítulos.")
-    else:
-        messages.error(request, "❌ A IA não conseguiu gerar as questões. Verifique os logs ou a cota da API.")
+    _enfileirar(request, Job.Kind.QUESTOES_AULA, [c for c in chapters if c.content])
+
+@admin.action(description="🤖 Regenerar trilha inteira via IA (substitui texto e questionário)")
+def regenerar_trilha_ia(modeladmin, request, queryset):
+    jobs = enqueue_many(
+        Job.Kind.GERAR_TRILHA, [{'trail_id': trail.pk} for trail in queryset.only('id')], user=request.user
+    )
+    url = reverse('admin:gamification_job_changelist')
+    messages.success(request, format_html(
+        '✅ {} trilhas enfileiradas. Acompanhe em <a href="{}">Tarefas em Segundo Plano</a>.', len(jobs), url
+    ))
 
 class ChapterInline(admin.TabularInline):
     model = Chapter
@@ -122,34 +66,120 @@ class AlternativaInline(admin.TabularInline):
 
 @admin.register(Trail)
 class TrailAdmin(admin.ModelAdmin):
-    list_display = ('title', 'created_at', 'get_chapter_count')
+    list_display = ('title', 'created_at', 'get_chapter_count', 'reordenar_aulas')
     search_fields = ('title',)
     inlines = [ChapterInline]
+    actions = [regenerar_trilha_ia]
 
     def get_chapter_count(self, obj):
-        return obj.chapters.count()
+        # Contagens do catálogo em cache: nenhuma consulta por linha
+        return chapter_counts().get(obj.id, 0)
     get_chapter_count.short_description = "Nº de Capítulos"
 
+    def reordenar_aulas(self, obj):
+        return format_html(
+            '<a href="{}"><i class="fas fa-sort"></i> Reordenar</a>',
+            reverse('admin:gamification_chapter_reorder', args=[obj.pk]),
+        )
+    reordenar_aulas.short_description = "Ordem das Aulas"
+
+@admin.register(Technology)
+class TechnologyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'order', 'get_trail_count')
+    list_editable = ('order',)
+    prepopulated_fields = {'slug': ('name',)}
+    autocomplete_fields = ('trails', 'chapters')
+
+    def get_trail_count(self, obj):
+        tech = technology_by_slug(obj.slug)
+        return tech.num_trails if tech else 0
+    get_trail_count.short_description = "Nº de Trilhas"
+
 @admin.register(Chapter)
 class ChapterAdmin(admin.ModelAdmin):
     list_display = ('title', 'trail', 'order', 'xp_value')
     list_filter = ('trail',)
     search_fields = ('title', 'content')
-    list_editable = ('order', 'xp_value')
+    # A ordem é alterada pela tela de reordenação (um único bulk_update por trilha)
+    list_editable = ('xp_value',)
+    readonly_fields = ('estatisticas_quiz',)
     # AQUI ESTÃO AS DUAS AÇÕES INTEGRADAS:
     actions = [automatizar_conteudo, gerar_questoes_ia_action] 
 
+    def get_urls(self):
+        urls = [
+            path(
+                'reordenar/<int:trail_id>/',
+                self.admin_site.admin_view(self.reorder_view),
+                name='gamification_chapter_reorder',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def reorder_view(self, request, trail_id):
+        """GET: lista arrastável das aulas. POST (JSON {"order": [ids]}): aplica a nova ordem."""
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        trail = get_object_or_404(Trail, pk=trail_id)
+
+        if request.method == 'POST':
+            try:
+                chapter_ids = json.loads(request.body)['order']
+                changed = reorder_chapters(trail.id, chapter_ids)
+            except (ValueError, KeyError, TypeError) as e:
+                return JsonResponse({'ok': False, 'error': str(e)}, status=400)
+            return JsonResponse({'ok': True, 'changed': changed})
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f"Reordenar aulas: {trail.title}",
+            'trail': trail,
+            'chapters': trail.chapters.order_by('order', 'id').only('id', 'order', 'title'),
+        }
+        return TemplateResponse(request, 'admin/gamification/chapter/reorder.html', context)
+
+    def estatisticas_quiz(self, obj):
+        """Desempenho por questão lido dos contadores pré-calculados."""
+        if not obj.pk:
+            return "-"
+        linhas = []
+        for q in chapter_statistics(obj.pk):
+            distribuicao = format_html_join(
+                ', ', '{}{}: {}%',
+                (('✔ ' if alt['e_correta'] else '', alt['texto'], alt['percentual']) for alt in q['alternativas'])
+            )
+            linhas.append((q['enunciado'], q['tentativas'], q['taxa_acerto'], distribuicao))
+        if not linhas:
+            return "Nenhuma questão cadastrada."
+        return format_html(
+            '<table><tr><th>Questão</th><th>Tentativas</th><th>Acerto</th><th>Escolhas</th></tr>{}</table>',
+            format_html_join('', '<tr><td>{}</td><td>{}</td><td>{}%</td><td>{}</td></tr>', linhas)
+        )
+    estatisticas_quiz.short_description = "Estatísticas do Quiz"
+
 @admin.register(Questao)
 class QuestaoAdmin(admin.ModelAdmin):
-    list_display = ('enunciado_curto', 'chapter', 'xp_recompensa', 'created_at')
+    list_display = ('enunciado_curto', 'chapter', 'xp_recompensa', 'tentativas', 'taxa_acerto', 'created_at')
     list_filter = ('chapter', 'created_at')
     search_fields = ('enunciado',)
     inlines = [AlternativaInline]
+    list_select_related = ('chapter', 'stats')
 
     def enunciado_curto(self, obj):
         return obj.enunciado[:50] + "..." if len(obj.enunciado) > 50 else obj.enunciado
     enunciado_curto.short_description = "Pergunta"
 
+    def tentativas(self, obj):
+        stats = getattr(obj, 'stats', None)
+        return stats.tentativas if stats else 0
+    tentativas.short_description = "Tentativas"
+
+    def taxa_acerto(self, obj):
+        stats = getattr(obj, 'stats', None)
+        return f"{stats.taxa_acerto}%" if stats else "-"
+    taxa_acerto.short_description = "Taxa de Acerto"
+
 @admin.register(Alternativa)
 class AlternativaAdmin(admin.ModelAdmin):
     list_display = ('texto', 'questao', 'e_correta')
@@ -161,8 +191,92 @@ class MedalAdmin(admin.ModelAdmin):
 
 @admin.register(PointTransaction) # Ajuste o nome se for PointTransaction
 class PointTransactionAdmin(admin.ModelAdmin):
-    list_display = ('user', 'quantity', 'description', 'created_at')
+    list_display = ('user', 'quantity', 'description', 'award_type', 'chapter', 'created_at')
+    list_filter = ('award_type',)
+    list_select_related = ('user', 'chapter')
+    raw_id_fields = ('chapter', 'questao')
 
 @admin.register(UserMedal)
 class UserMedalAdmin(admin.ModelAdmin):
-    list_display = ('user', 'medal', 'earned_at')
\ No newline at end of file
+    list_display = ('user', 'medal', 'earned_at')
+
+@admin.register(UserTrailProgress)
+class UserTrailProgressAdmin(admin.ModelAdmin):
+    list_display = ('user', 'trail', 'completed_chapters', 'total_chapters', 'is_completed', 'last_activity_at')
+    list_filter = ('is_completed', 'trail')
+    readonly_fields = ('completed_chapters', 'total_chapters', 'is_completed', 'last_activity_at')
+
+class QuizAnswerInline(admin.TabularInline):
+    model = QuizAnswer
+    extra = 0
+    can_delete = False
+    readonly_fields = ('questao', 'alternativa', 'foi_correta')
+
+@admin.register(QuizAttempt)
+class QuizAttemptAdmin(admin.ModelAdmin):
+    list_display = ('user', 'chapter', 'acertos', 'total', 'percentual', 'aprovado', 'created_at')
+    list_filter = ('aprovado', 'chapter')
+    list_select_related = ('user', 'chapter')
+    readonly_fields = ('user', 'chapter', 'acertos', 'total', 'percentual', 'aprovado')
+    inlines = [QuizAnswerInline]
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'alvo', 'status_badge', 'barra_progresso', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = [f.name for f in Job._meta.fields]
+    list_select_related = ('created_by',)
+    actions = ['reenfileirar']
+    change_list_template = 'admin/gamification/job/change_list.html'
+
+    STATUS_COLORS = {
+        Job.Status.QUEUED: '#94a3b8',
+        Job.Status.RUNNING: '#00D9FF',
+        Job.Status.DONE: '#00F5A0',
+        Job.Status.FAILED: '#f87171',
+    }
+
+    def has_add_permission(self, request):
+        return False
+
+    def alvo(self, obj):
+        payload = obj.payload or {}
+        if payload.get('trail_id'):
+            return format_html('<a href="{}">Trilha #{}</a>', reverse('admin:gamification_trail_change', args=[payload['trail_id']]), payload['trail_id'])
+        if not payload.get('chapter_id'):
+            return "-"
+        return format_html('<a href="{}">Aula #{}</a>', reverse('admin:gamification_chapter_change', args=[payload['chapter_id']]), payload['chapter_id'])
+    alvo.short_description = "Alvo"
+
+    def status_badge(self, obj):
+        return format_html(
+            '<strong style="color: {}">{}</strong>', self.STATUS_COLORS.get(obj.status, '#fff'), obj.get_status_display()
+        )
+    status_badge.short_description = "Situação"
+
+    def barra_progresso(self, obj):
+        return format_html(
+            '<div title="{}" style="width: 120px; background: rgba(255,255,255,0.1); border-radius: 4px;">'
+            '<div style="width: {}%; background: #00F5A0; height: 8px; border-radius: 4px;"></div></div>',
+            obj.progress_note or obj.last_error, obj.progress,
+        )
+    barra_progresso.short_description = "Progresso"
+
+    @admin.action(description="🔁 Reenfileirar tarefas com falha")
+    def reenfileirar(self, request, queryset):
+        total = queryset.filter(status=Job.Status.FAILED).update(
+            status=Job.Status.QUEUED, attempts=0, run_after=timezone.now(), progress=0, progress_note='',
+            finished_at=None, last_error='', locked_by='', locked_at=None, updated_at=timezone.now(),
+        )
+        messages.success(request, f"✅ {total} tarefas voltaram para a fila.")
+
+    def changelist_view(self, request, extra_context=None):
+        # Resumo por situação em uma consulta agrupada; a página se atualiza enquanto há trabalho
+        counts = dict(Job.objects.values_list('status').annotate(total=Count('id')))
+        resumo = [(label, counts.get(value, 0), self.STATUS_COLORS[value]) for value, label in Job.Status.choices]
+        extra_context = {
+            **(extra_context or {}),
+            'resumo_tarefas': resumo,
+            'tarefas_ativas': counts.get(Job.Status.QUEUED, 0) + counts.get(Job.Status.RUNNING, 0),
+        }
+        return super().changelist_view(request, extra_context=extra_context)
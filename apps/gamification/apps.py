@@ -6,4 +6,5 @@ class GamificationConfig(AppConfig):
 
     def ready(self):
         # Isso ativa os signals quando o Django inicia
-        import apps.gamification.signals
\ No newline at end of file
+        import apps.gamification.signals
+        import apps.gamification.checks
\ No newline at end of file
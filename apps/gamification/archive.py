@@ -0,0 +1,144 @@
+# apps/gamification/archive.py
+import gzip
+import json
+import os
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .cache import bump_user_versions
+from .models import BalanceSnapshot, PointTransaction
+
+SEGMENT_SUFFIX = '.jsonl.gz'
+INDEX_SUFFIX = '.index.json'
+
+
+def archive_dir(directory=None):
+    return Path(directory or settings.LEDGER_ARCHIVE_DIR)
+
+
+def archivable_transactions(before):
+    """
+    Transações que podem sair do banco:
+    - criadas antes de `before`;
+    - já cobertas pelo último snapshot do aluno (o saldo não depende delas);
+    - sem chave de prêmio (capítulo/questão), que sustenta a idempotência
+      de leitura e quiz e precisa continuar consultável.
+    """
+    last_snapshot_id = Subquery(
+        BalanceSnapshot.objects.filter(user_id=OuterRef('user_id'))
+        .order_by('-last_transaction_id')
+        .values('last_transaction_id')[:1]
+    )
+    return (
+        PointTransaction.objects.filter(created_at__lt=before, id__lte=last_snapshot_id)
+        .filter(chapter__isnull=True, questao__isnull=True)
+        .order_by('id')
+    )
+
+
+def _serialize(tx):
+    return {
+        'id': tx.id,
+        'user_id': tx.user_id,
+        'quantity': tx.quantity,
+        'description': tx.description,
+        'award_type': tx.award_type,
+        'created_at': tx.created_at.isoformat(),
+    }
+
+
+def write_segment(rows, directory=None):
+    """
+    Grava um segmento comprimido (JSON Lines + gzip) e o índice por aluno
+    (`user_id -> linhas`). Os arquivos são escritos em temporário e
+    renomeados: um segmento visível está sempre completo e nunca é alterado.
+    Retorna o caminho do segmento.
+    """
+    directory = archive_dir(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"ledger-{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+    segment = directory / f"{name}{SEGMENT_SUFFIX}"
+    index_path = directory / f"{name}{INDEX_SUFFIX}"
+
+    index = {}
+    tmp_segment = segment.with_name(segment.name + '.tmp')
+    with gzip.open(tmp_segment, 'wt', encoding='utf-8') as fh:
+        for line_no, row in enumerate(rows):
+            fh.write(json.dumps(row, ensure_ascii=False) + '\n')
+            index.setdefault(str(row['user_id']), []).append(line_no)
+
+    meta = {
+        'segment': segment.name,
+        'count': sum(len(lines) for lines in index.values()),
+        'min_id': rows[0]['id'] if rows else None,
+        'max_id': rows[-1]['id'] if rows else None,
+        'users': index,
+    }
+    tmp_index = index_path.with_name(index_path.name + '.tmp')
+    tmp_index.write_text(json.dumps(meta), encoding='utf-8')
+
+    os.replace(tmp_segment, segment)
+    os.replace(tmp_index, index_path)
+    return segment
+
+
+def archive_transactions(before, directory=None, chunk_size=5000, progress=None):
+    """
+    Move as transações frias para segmentos em disco, um segmento por bloco.
+    O segmento é gravado antes da exclusão: se o processo cair no meio, as
+    linhas ficam no banco e num segmento (o leitor ignora ids repetidos).
+    Retorna (transacoes_arquivadas, segmentos).
+    """
+    total = segments = 0
+    while True:
+        chunk = list(archivable_transactions(before)[:chunk_size])
+        if not chunk:
+            break
+        write_segment([_serialize(tx) for tx in chunk], directory)
+        with transaction.atomic():
+            PointTransaction.objects.filter(pk__in=[tx.pk for tx in chunk]).delete()
+            bump_user_versions({tx.user_id for tx in chunk})
+        total += len(chunk)
+        segments += 1
+        if progress:
+            progress(total, segments)
+    return total, segments
+
+
+class LedgerArchive:
+    """Leitura (somente) dos segmentos arquivados do histórico de XP."""
+
+    def __init__(self, directory=None):
+        self.directory = archive_dir(directory)
+
+    def indexes(self):
+        if not self.directory.exists():
+            return []
+        return [
+            json.loads(path.read_text(encoding='utf-8'))
+            for path in sorted(self.directory.glob(f"*{INDEX_SUFFIX}"))
+        ]
+
+    def transactions_for(self, user_id):
+        """Transações arquivadas de um aluno, lendo só os segmentos que o contêm."""
+        seen = set()
+        for meta in self.indexes():
+            lines = set(meta['users'].get(str(user_id), ()))
+            if not lines:
+                continue
+            with gzip.open(self.directory / meta['segment'], 'rt', encoding='utf-8') as fh:
+                for line_no, line in enumerate(fh):
+                    if line_no not in lines:
+                        continue
+                    row = json.loads(line)
+                    if row['id'] not in seen:
+                        seen.add(row['id'])
+                        yield row
+
+    def balance_for(self, user_id):
+        return sum(row['quantity'] for row in self.transactions_for(user_id))
@@ -0,0 +1,169 @@
+# apps/gamification/cache.py
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+CONTENT_VERSION_KEY = 'gamification:content_version'
+USER_VERSION_KEY = 'gamification:user_version:{user_id}'
+
+
+# --- VERSÃO DO CONTEÚDO (Trail / Chapter) ---
+
+def get_content_version():
+    """
+    Versão atual do catálogo de conteúdo. Faz parte das chaves de cache das
+    páginas públicas: ao mudar, todas as entradas antigas deixam de ser lidas.
+    """
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        # Baseada no relógio para nunca repetir uma versão já usada
+        # (ex.: após o cache ser reiniciado)
+        cache.add(CONTENT_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CONTENT_VERSION_KEY)
+    return version
+
+
+def bump_content_version():
+    """Invalida de uma vez tudo que depende de Trail/Chapter."""
+    cache.set(CONTENT_VERSION_KEY, time.time_ns(), None)
+
+
+# --- VERSÃO DOS DADOS DE CADA ALUNO (XP, progresso, medalhas) ---
+
+def user_version_key(user_id):
+    return USER_VERSION_KEY.format(user_id=user_id)
+
+
+def get_user_version(user_id):
+    """Versão dos dados do aluno; muda a cada crédito, progresso ou medalha."""
+    key = user_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_versions(user_ids):
+    """
+    Invalida os caches por aluno (dashboard etc.). Aplicado só após o commit,
+    para que ninguém cacheie sob a versão nova os dados ainda não confirmados.
+    """
+    keys = [user_version_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, time.time_ns()), None))
+
+
+# --- CACHE DE PÁGINA INTEIRA PARA VISITANTES ---
+
+def _has_pending_messages(request):
+    # Mensagens flash são por visitante e não podem ir para o cache
+    return len(get_messages(request)) > 0
+
+
+def anonymous_page_cache(timeout=None):
+    """
+    Cacheia a resposta completa de views públicas apenas para visitantes
+    anônimos. Usuários logados passam direto pela view. A chave inclui a
+    versão do conteúdo, então salvar uma Trail/Chapter invalida tudo.
+    Também envia Cache-Control público para CDNs/proxies.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+                or _has_pending_messages(request)
+            ):
+                return view_func(request, *args, **kwargs)
+
+            ttl = timeout if timeout is not None else settings.ANONYMOUS_PAGE_CACHE_TIMEOUT
+            path_hash = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+            key = f"gamification:page:{get_content_version()}:{path_hash}"
+
+            cached = cache.get(key)
+            if cached is not None:
+                response = HttpResponse(cached['content'], content_type=cached['content_type'])
+                response['X-Page-Cache'] = 'HIT'
+            else:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                cache.set(key, {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                }, ttl)
+                response['X-Page-Cache'] = 'MISS'
+
+            patch_cache_control(response, public=True, max_age=ttl, s_maxage=ttl)
+            # Visitantes com cookie de sessão (logados) recebem outra versão
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return _wrapped
+    return decorator
+
+
+# --- GET CONDICIONAL (ETag / Last-Modified) PARA PÁGINAS DO ALUNO ---
+
+def user_conditional_page(refresh=None):
+    """
+    Responde 304 Not Modified antes de executar a view quando nem os dados
+    do aluno (versão por usuário) nem o catálogo (versão do conteúdo)
+    mudaram desde a última visita, na mesma sessão. Uma leitura do cache,
+    nenhuma consulta.
+    `refresh` (segundos) força uma nova validação periódica em páginas com
+    dados de outros alunos (ex.: ranking do dashboard).
+    Visitantes anônimos e respostas com mensagens flash passam direto.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or not request.user.is_authenticated
+                or _has_pending_messages(request)
+            ):
+                return view_func(request, *args, **kwargs)
+
+            user_id = request.user.pk
+            version_key = user_version_key(user_id)
+            found = cache.get_many([version_key, CONTENT_VERSION_KEY])
+            versions = (
+                found.get(version_key) or get_user_version(user_id),
+                found.get(CONTENT_VERSION_KEY) or get_content_version(),
+            )
+            modified_at = max(versions) / 1e9
+            # Sessão e segredo do CSRF entram na ETag: a página guardada traz o
+            # token dos formulários (ex.: logout), que muda a cada login.
+            # get_token garante o segredo já nesta resposta (o token em si é mascarado a cada chamada)
+            get_token(request)
+            parts = [user_id, *versions, request.session.session_key, request.META['CSRF_COOKIE']]
+            if refresh:
+                window = int(time.time() // refresh)
+                parts.append(window)
+                modified_at = max(modified_at, window * refresh)
+
+            etag = hashlib.md5(':'.join(map(str, parts)).encode('utf-8')).hexdigest()
+            last_modified = datetime.fromtimestamp(int(modified_at), tz=timezone.utc)
+            response = condition(
+                etag_func=lambda *a, **kw: etag,
+                last_modified_func=lambda *a, **kw: last_modified,
+            )(view_func)(request, *args, **kwargs)
+
+            # O navegador guarda a página, mas sempre revalida; proxies não guardam
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return _wrapped
+    return decorator
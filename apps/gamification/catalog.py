@@ -0,0 +1,66 @@
+# apps/gamification/catalog.py
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+from .cache import get_content_version
+from .models import Trail
+
+CATALOG_CACHE_KEY = 'gamification:catalog:{version}'
+# Versões antigas deixam de ser lidas; o tempo só limpa as entradas órfãs
+CATALOG_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass(frozen=True)
+class CatalogTrail:
+    """Trilha pronta para listagens: contagens e URL da imagem já resolvidas."""
+    id: int
+    title: str
+    slug: str
+    description: str
+    image_url: str
+    is_premium: bool
+    num_chapters: int
+    total_xp: int
+
+
+def build_catalog():
+    """Todas as trilhas com contagem de capítulos e XP em uma única consulta agrupada."""
+    trails = Trail.objects.annotate(
+        num_chapters=Count('chapters'),
+        chapters_xp=Coalesce(Sum('chapters__xp_value'), 0),
+    ).order_by('id')
+    return tuple(
+        CatalogTrail(
+            id=trail.id,
+            title=trail.title,
+            slug=trail.slug or '',
+            description=trail.description,
+            image_url=trail.image.url if trail.image else '',
+            is_premium=trail.is_premium,
+            num_chapters=trail.num_chapters,
+            # XP definido no admin tem prioridade; senão, a soma das aulas
+            total_xp=trail.total_xp or trail.chapters_xp,
+        )
+        for trail in trails
+    )
+
+
+def get_catalog():
+    """
+    Catálogo de trilhas no cache compartilhado, sob a versão do conteúdo:
+    os signals de Trail/Chapter trocam a versão e a próxima leitura reconstrói.
+    """
+    key = CATALOG_CACHE_KEY.format(version=get_content_version())
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = build_catalog()
+        cache.set(key, catalog, CATALOG_TIMEOUT)
+    return catalog
+
+
+def chapter_counts():
+    """{trail_id: nº de capítulos} a partir do catálogo em cache."""
+    return {trail.id: trail.num_chapters for trail in get_catalog()}
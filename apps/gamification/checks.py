@@ -0,0 +1,20 @@
+# apps/gamification/checks.py
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """
+    Web e worker (Procfile) são processos separados: as invalidações feitas
+    pelos signals de um não chegam ao cache em memória do outro.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if backend.endswith('LocMemCache'):
+        return [Warning(
+            "Cache em memória local com mais de um processo: gabaritos, medalhas e "
+            "patentes podem ficar desatualizados por até REFERENCE_CACHE_TIMEOUT segundos.",
+            hint="Defina REDIS_URL para compartilhar o cache entre web e worker.",
+            id='gamification.W001',
+        )]
+    return []
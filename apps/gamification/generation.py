@@ -0,0 +1,229 @@
+# apps/gamification/generation.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .llm import LLMError, RateLimited, get_client, get_models
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Balde de fichas: `rate_per_minute` fichas por minuto, acumulando no máximo
+    `capacity` (rajada). Seguro entre threads; o limite vale por processo.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        # Rajada padrão: ~10 s de cota, para não estourar a janela do minuto
+        self.capacity = capacity or max(1, rate_per_minute // 6)
+        self.tokens = float(self.capacity)
+        self._clock, self._sleep = clock, sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def wait_time(self):
+        """Segundos até a próxima ficha (0 se já há uma disponível)."""
+        with self._lock:
+            self._refill()
+            return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        """Espera por uma ficha; devolve False se ela não vier dentro de `timeout` segundos."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if timeout is not None and waited + wait > timeout:
+                return False
+            self._sleep(wait)
+            waited += wait
+
+
+@dataclass
+class ModelStats:
+    requests: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def successes(self):
+        return self.requests - self.errors
+
+    @property
+    def avg_latency(self):
+        return self.total_latency / self.requests if self.requests else 0.0
+
+
+class Generator:
+    """
+    Executor único das chamadas ao LLM (conteúdo, questionários, trilhas):
+    - um TokenBucket por modelo, compartilhado por todas as threads/chamadas;
+    - fallback: prefere o primeiro modelo com ficha livre na ordem de LLM_MODELS,
+      pula modelos em pausa após 429 e, sem fichas, espera pelo que libera antes;
+    - contadores de latência e erros por modelo (`stats`).
+    """
+
+    def __init__(self, client=None, models=None, rate_limits=None, default_rpm=None,
+                 cooldown=None, acquire_timeout=None, clock=time.monotonic, sleep=time.sleep):
+        self._client = client
+        self.models = list(models or get_models())
+        self.rate_limits = settings.LLM_RATE_LIMITS if rate_limits is None else rate_limits
+        self.default_rpm = default_rpm or settings.LLM_DEFAULT_RPM
+        self.cooldown = settings.LLM_COOLDOWN_SECONDS if cooldown is None else cooldown
+        self.acquire_timeout = settings.LLM_ACQUIRE_TIMEOUT if acquire_timeout is None else acquire_timeout
+        self._clock, self._sleep = clock, sleep
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._paused_until = {}
+        self._stats = {}
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = get_client()
+            return self._client
+
+    def bucket(self, model):
+        with self._lock:
+            if model not in self._buckets:
+                rpm = self.rate_limits.get(model, self.default_rpm)
+                self._buckets[model] = TokenBucket(rpm, clock=self._clock, sleep=self._sleep)
+            return self._buckets[model]
+
+    def _record(self, model, latency, error=None):
+        with self._lock:
+            stats = self._stats.setdefault(model, ModelStats())
+            stats.requests += 1
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            if error is not None:
+                stats.errors += 1
+                if isinstance(error, RateLimited):
+                    stats.rate_limited += 1
+                    self._paused_until[model] = self._clock() + self.cooldown
+
+    def stats(self):
+        """Cópia dos contadores: {modelo: ModelStats}."""
+        with self._lock:
+            return {model: replace(stats) for model, stats in self._stats.items()}
+
+    def _candidates(self):
+        now = self._clock()
+        with self._lock:
+            available = [m for m in self.models if self._paused_until.get(m, 0) <= now]
+        # Todos em pausa: tenta mesmo assim, na ordem de preferência
+        return available or list(self.models)
+
+    def _take(self, remaining):
+        for model in remaining:
+            if self.bucket(model).try_acquire():
+                return model
+        model = min(remaining, key=lambda m: self.bucket(m).wait_time())
+        return model if self.bucket(model).acquire(timeout=self.acquire_timeout) else None
+
+    def generate(self, prompt, json_output=False, client=None):
+        """Uma resposta do primeiro modelo que conseguir: (texto, modelo)."""
+        client = client or self.client
+        remaining, errors = self._candidates(), []
+        while remaining:
+            model = self._take(remaining)
+            if model is None:
+                errors.append(RateLimited(f"sem cota local em {self.acquire_timeout}s"))
+                break
+            remaining.remove(model)
+
+            start = time.perf_counter()
+            try:
+                text = client.generate(prompt, model=model, json_output=json_output)
+            except LLMError as e:
+                self._record(model, time.perf_counter() - start, e)
+                logger.warning("Falha no modelo %s: %s", model, e)
+                errors.append(e)
+                continue
+            self._record(model, time.perf_counter() - start)
+            return text, model
+
+        if errors and all(isinstance(e, RateLimited) for e in errors):
+            raise RateLimited("; ".join(str(e) for e in errors))
+        raise LLMError("Nenhum modelo conseguiu processar o pedido: " + "; ".join(str(e) for e in errors))
+
+    def map(self, func, items, max_workers=None):
+        """
+        Executa `func(item)` em paralelo (threads) e devolve [(item, resultado, erro)]
+        na ordem de entrada. `func` deve só conversar com o LLM: gravações no
+        banco ficam com quem chamou, na thread principal.
+        """
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=max_workers or settings.LLM_MAX_CONCURRENCY) as pool:
+            futures = [pool.submit(func, item) for item in items]
+            results = []
+            for item, future in zip(items, futures):
+                try:
+                    results.append((item, future.result(), None))
+                except Exception as e:
+                    results.append((item, None, e))
+        return results
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_generator():
+    """Executor do processo (fichas e contadores compartilhados por todas as chamadas)."""
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            _generator = Generator()
+        return _generator
+
+
+def reset_generator():
+    global _generator
+    with _generator_lock:
+        _generator = None
+
+
+@receiver(setting_changed)
+def llm_settings_changed(setting, **kwargs):
+    if setting.startswith('LLM_'):
+        reset_generator()
+
+
+def format_stats(stats):
+    """Linhas legíveis dos contadores por modelo (comandos e logs do worker)."""
+    return [
+        f"{model}: {s.requests} chamadas, {s.errors} erros ({s.rate_limited} por cota), "
+        f"latência média {s.avg_latency:.2f}s, máx. {s.max_latency:.2f}s"
+        for model, s in sorted(stats.items())
+    ]
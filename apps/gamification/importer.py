@@ -0,0 +1,331 @@
+# apps/gamification/importer.py
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import yaml
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .cache import bump_content_version
+from .models import TITLE_PREFIX, Trail, Chapter, Questao, Alternativa
+from .progress import refresh_trail_totals
+from .quiz import invalidate_answer_key
+from .rendering import refresh_rendered_content
+from .search import index_many
+
+TRAIL_FILE = '_trail.md'
+FRONT_MATTER = re.compile(r'\A---[ \t]*\n(.*?)\n---[ \t]*(?:\n|\Z)(.*)\Z', re.DOTALL)
+
+# Campos aceitos no pacote (os ausentes ficam com o valor atual / padrão do modelo)
+TRAIL_FIELDS = ('title', 'description', 'is_premium', 'total_xp')
+CHAPTER_FIELDS = ('title', 'order', 'content', 'video_url', 'xp_value', 'is_premium')
+
+
+@dataclass
+class ImportReport:
+    trails_created: int = 0
+    trails_updated: int = 0
+    chapters_created: int = 0
+    chapters_updated: int = 0
+    questoes_created: int = 0
+    questoes_updated: int = 0
+    alternativas_created: int = 0
+    alternativas_updated: int = 0
+
+    @property
+    def changed(self):
+        return any(vars(self).values())
+
+
+# --- LEITURA DO PACOTE (Markdown com front-matter ou JSON) ---
+
+def parse_markdown(text, source):
+    """Separa o front-matter YAML do corpo Markdown: (dict, corpo)."""
+    match = FRONT_MATTER.match(text)
+    if not match:
+        return {}, text.strip()
+    meta = yaml.safe_load(match.group(1)) or {}
+    if not isinstance(meta, dict):
+        raise ValueError(f"{source}: o front-matter deve ser um mapeamento YAML.")
+    return meta, match.group(2).strip()
+
+
+def _load_trail_dir(directory):
+    trail, body = parse_markdown((directory / TRAIL_FILE).read_text(encoding='utf-8'), directory / TRAIL_FILE)
+    if body and not trail.get('description'):
+        trail['description'] = body
+    trail.setdefault('_source', str(directory))
+
+    chapters = []
+    for path in sorted(directory.glob('*.md')):
+        if path.name == TRAIL_FILE:
+            continue
+        chapter, content = parse_markdown(path.read_text(encoding='utf-8'), path)
+        chapter.setdefault('content', content)
+        chapter.setdefault('_source', str(path))
+        chapters.append(chapter)
+    trail['chapters'] = chapters
+    return trail
+
+
+def load_bundle(path):
+    """
+    Lê um pacote de conteúdo e devolve a lista de trilhas (dicts):
+    - arquivo .json: {"trails": [...]} ou a lista diretamente;
+    - diretório: uma pasta por trilha com `_trail.md` (metadados + descrição)
+      e uma aula por arquivo .md, na ordem alfabética dos nomes.
+      O próprio diretório pode ser a pasta de uma trilha.
+    """
+    path = Path(path)
+    if path.is_file():
+        data = json.loads(path.read_text(encoding='utf-8'))
+        return data.get('trails', []) if isinstance(data, dict) else data
+    if not path.is_dir():
+        raise ValueError(f"Caminho não encontrado: {path}")
+    if (path / TRAIL_FILE).exists():
+        return [_load_trail_dir(path)]
+    return [_load_trail_dir(d) for d in sorted(path.iterdir()) if (d / TRAIL_FILE).exists()]
+
+
+# --- PLANEJAMENTO EM MEMÓRIA ---
+
+def _apply(obj, values, fields):
+    """Copia os campos presentes em `values`; retorna True se algo mudou."""
+    changed = False
+    for field in fields:
+        if field in values and getattr(obj, field) != values[field]:
+            setattr(obj, field, values[field])
+            changed = True
+    return changed
+
+
+def _touch(objs):
+    # bulk_update não passa pelo auto_now
+    now = timezone.now()
+    for obj in objs:
+        obj.updated_at = now
+
+
+def _require(spec, key, source):
+    if not spec.get(key):
+        raise ValueError(f"{source}: campo obrigatório ausente: '{key}'.")
+    return spec[key]
+
+
+def _chapter_slug(spec, trail, title, existing, taken, source):
+    """
+    Slug explícito do pacote ou derivado de trilha + título.
+    Slugs que já pertencem a esta trilha identificam a mesma aula
+    (reimportação idempotente); os de outras trilhas recebem sufixo.
+    """
+    if spec.get('slug'):
+        slug = spec['slug']
+        owner = existing.get(slug)
+        if slug in taken or (owner and owner[1] != trail.id):
+            raise ValueError(f"{source}: o slug '{slug}' já pertence a outra aula.")
+        return slug
+
+    base = slugify(f"{trail.slug} {title}")[:180]
+    candidate, counter = base, 1
+    while candidate in taken or (candidate in existing and existing[candidate][1] != trail.id):
+        candidate = f"{base}-{counter}"
+        counter += 1
+    return candidate
+
+
+def _import_trails(specs, report):
+    prepared = []
+    for position, spec in enumerate(specs, 1):
+        source = spec.get('_source', f"trilha #{position}")
+        title = _require(spec, 'title', source)
+        prepared.append((spec.get('slug') or slugify(title), spec))
+
+    slugs = [slug for slug, _ in prepared]
+    if len(set(slugs)) != len(slugs):
+        raise ValueError("O pacote contém trilhas com o mesmo slug.")
+
+    existing = Trail.objects.in_bulk(slugs, field_name='slug')
+    created, updated, trails = [], [], []
+    for slug, spec in prepared:
+        trail = existing.get(slug)
+        if trail is None:
+            trail = Trail(slug=slug, description='')
+            _apply(trail, spec, TRAIL_FIELDS)
+            created.append(trail)
+        elif _apply(trail, spec, TRAIL_FIELDS):
+            updated.append(trail)
+        trails.append((trail, spec))
+
+    Trail.objects.bulk_create(created)
+    _touch(updated)
+    Trail.objects.bulk_update(updated, [*TRAIL_FIELDS, 'updated_at'])
+    report.trails_created, report.trails_updated = len(created), len(updated)
+    return trails, created + updated
+
+
+def _check_orders(plan, orders, used):
+    """Duas aulas na mesma posição quebram o desbloqueio sequencial e o "Aula NN"."""
+    occupied = {
+        (trail_id, order): f"aula existente #{pk}"
+        for pk, (trail_id, order) in orders.items() if pk not in used
+    }
+    for trail, pk, slug, values in plan:
+        key = (trail.id, values['order'])
+        if key in occupied:
+            raise ValueError(
+                f"{values.get('_source', slug)}: posição {values['order']} já ocupada ({occupied[key]})."
+            )
+        occupied[key] = values.get('_source', slug)
+
+
+def _import_chapters(trails, report):
+    # Um único SELECT com os slugs/títulos/ordens existentes; ordem e slug saem daqui
+    existing, by_title, orders = {}, {}, {}
+    for pk, slug, trail_id, title, order in Chapter.objects.values_list('id', 'slug', 'trail_id', 'title', 'order'):
+        if slug:
+            existing[slug] = (pk, trail_id)
+        by_title[(trail_id, title)] = pk
+        orders[pk] = (trail_id, order)
+
+    plan, taken, titles, used = [], set(), set(), set()
+    for trail, trail_spec in trails:
+        # Aulas novas sem 'order' entram depois das que a trilha já tem
+        next_order = max((order for trail_id, order in orders.values() if trail_id == trail.id), default=0)
+        for position, spec in enumerate(trail_spec.get('chapters', []), 1):
+            source = spec.get('_source', f"{trail.slug}, aula #{position}")
+            # O prefixo "Aula NN - " é só de exibição (Chapter.display_title)
+            title = TITLE_PREFIX.sub('', _require(spec, 'title', source))
+            if (trail.id, title) in titles:
+                raise ValueError(f"{source}: título repetido na trilha: '{title}'.")
+            titles.add((trail.id, title))
+
+            pk = by_title.get((trail.id, title))
+            slug = _chapter_slug(spec, trail, title, existing, taken, source)
+            if pk is None and slug in existing:
+                pk = existing[slug][0]
+            if pk is not None and pk in used:
+                raise ValueError(f"{source}: corresponde a uma aula já usada por outra entrada do pacote.")
+            taken.add(slug)
+            used.add(pk)
+
+            if spec.get('order'):
+                order = int(spec['order'])
+            elif pk is not None and orders[pk][0] == trail.id:
+                order = orders[pk][1]  # aula existente mantém a posição
+            else:
+                order = next_order + 1
+            next_order = max(next_order, order)
+            values = {**spec, 'order': order, 'title': title}
+            plan.append((trail, pk, slug, values))
+
+    _check_orders(plan, orders, used)
+
+    current = Chapter.objects.in_bulk([pk for _, pk, _, _ in plan if pk])
+    created, updated, chapters = [], [], []
+    for trail, pk, slug, values in plan:
+        chapter = current.get(pk)
+        if chapter is None:
+            chapter = Chapter(trail=trail, slug=slug)
+            _apply(chapter, values, CHAPTER_FIELDS)
+            refresh_rendered_content(chapter)
+            created.append(chapter)
+        else:
+            changed = _apply(chapter, values, CHAPTER_FIELDS)
+            if refresh_rendered_content(chapter) or changed:
+                updated.append(chapter)
+        chapters.append((chapter, values))
+
+    Chapter.objects.bulk_create(created, batch_size=500)
+    _touch(updated)
+    Chapter.objects.bulk_update(updated, [*CHAPTER_FIELDS, 'content_html', 'content_hash', 'updated_at'], batch_size=500)
+    report.chapters_created, report.chapters_updated = len(created), len(updated)
+    return chapters, created, updated
+
+
+def _import_questoes(chapters, report):
+    """
+    Questões casadas por (aula, enunciado) e alternativas por (questão, texto).
+    Nada é removido: apagar questões levaria junto o histórico dos alunos.
+    """
+    with_quiz = [(chapter, values['questoes']) for chapter, values in chapters if values.get('questoes')]
+    if not with_quiz:
+        return [], set()
+    chapter_ids = [chapter.id for chapter, _ in with_quiz]
+    existing_q = {(q.chapter_id, q.enunciado): q for q in Questao.objects.filter(chapter_id__in=chapter_ids)}
+    existing_alt = {
+        (a.questao_id, a.texto): a for a in Alternativa.objects.filter(questao__chapter_id__in=chapter_ids)
+    }
+
+    new_q, changed_q, pending_alts, touched = [], [], [], set()
+    for chapter, questoes in with_quiz:
+        for item in questoes:
+            enunciado = _require(item, 'enunciado', chapter.slug)
+            values = {'xp_recompensa': int(item.get('xp_recompensa', item.get('xp', 10)))}
+            questao = existing_q.get((chapter.id, enunciado))
+            if questao is None:
+                questao = Questao(chapter=chapter, enunciado=enunciado, **values)
+                new_q.append(questao)
+                touched.add(chapter.id)
+            elif _apply(questao, values, values.keys()):
+                changed_q.append(questao)
+                touched.add(chapter.id)
+            pending_alts.append((chapter.id, questao, item.get('alternativas', [])))
+
+    Questao.objects.bulk_create(new_q, batch_size=500)
+    _touch(changed_q)
+    Questao.objects.bulk_update(changed_q, ['xp_recompensa', 'updated_at'], batch_size=500)
+
+    new_alt, changed_alt = [], []
+    for chapter_id, questao, alternativas in pending_alts:
+        for alt in alternativas:
+            texto = _require(alt, 'texto', chapter_id)
+            values = {'e_correta': bool(alt.get('correta', alt.get('e_correta', False)))}
+            alternativa = existing_alt.get((questao.id, texto))
+            if alternativa is None:
+                new_alt.append(Alternativa(questao=questao, texto=texto, **values))
+                touched.add(chapter_id)
+            elif _apply(alternativa, values, values.keys()):
+                changed_alt.append(alternativa)
+                touched.add(chapter_id)
+
+    Alternativa.objects.bulk_create(new_alt, batch_size=1000)
+    Alternativa.objects.bulk_update(changed_alt, ['e_correta'], batch_size=1000)
+    report.questoes_created, report.questoes_updated = len(new_q), len(changed_q)
+    report.alternativas_created, report.alternativas_updated = len(new_alt), len(changed_alt)
+    return new_q + changed_q, touched
+
+
+def import_trails(specs, dry_run=False):
+    """
+    Importa trilhas, aulas, questões e alternativas em uma única transação,
+    com bulk_create/bulk_update. Reimportar o mesmo pacote não duplica nada:
+    trilhas são casadas pelo slug e aulas pelo slug (ou título) dentro da trilha.
+
+    As escritas em lote não disparam signals, então os efeitos deles são
+    aplicados aqui: HTML renderizado, totais de progresso, índice de busca,
+    gabaritos e versão do conteúdo. Em `dry_run` tudo é desfeito no final.
+    """
+    report = ImportReport()
+    with transaction.atomic():
+        trails, changed_trails = _import_trails(specs, report)
+        chapters, new_chapters, changed_chapters = _import_chapters(trails, report)
+        questoes, quiz_chapters = _import_questoes(chapters, report)
+
+        for trail_id in {chapter.trail_id for chapter in new_chapters}:
+            refresh_trail_totals(trail_id)
+        index_many([*changed_trails, *new_chapters, *changed_chapters, *questoes])
+
+        for chapter_id in quiz_chapters:
+            transaction.on_commit(lambda chapter_id=chapter_id: invalidate_answer_key(chapter_id))
+        if report.changed:
+            transaction.on_commit(bump_content_version)
+        if dry_run:
+            transaction.set_rollback(True)
+    return report
+
+
+def import_path(path, dry_run=False):
+    return import_trails(load_bundle(path), dry_run=dry_run)
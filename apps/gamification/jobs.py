@@ -0,0 +1,239 @@
+# apps/gamification/jobs.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .llm import LLMError
+from .models import Job, Chapter, Trail
+from .services import gerar_conteudo_aula, gerar_questoes, gerar_trilha
+
+logger = logging.getLogger(__name__)
+
+Status = Job.Status
+
+# {kind: função(job)}; a função devolve o resultado (JSON) da tarefa
+HANDLERS = {}
+
+
+class PermanentError(Exception):
+    """Erro que não se resolve tentando de novo (ex.: aula apagada): falha direto."""
+
+
+def handler(kind):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+# --- ENFILEIRAMENTO ---
+
+def enqueue(kind, payload=None, user=None, run_after=None):
+    return enqueue_many(kind, [payload or {}], user=user, run_after=run_after)[0]
+
+
+def enqueue_many(kind, payloads, user=None, run_after=None):
+    """Cria as tarefas em um único INSERT (ações do admin com várias aulas)."""
+    run_after = run_after or timezone.now()
+    return Job.objects.bulk_create([
+        Job(
+            kind=kind,
+            payload=payload,
+            run_after=run_after,
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+            created_by=user,
+        )
+        for payload in payloads
+    ])
+
+
+def backoff(attempts):
+    """Espera antes da próxima tentativa: base * 2^(tentativa - 1), com teto."""
+    return timedelta(seconds=min(
+        settings.JOB_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.JOB_BACKOFF_MAX_SECONDS,
+    ))
+
+
+# --- EXECUÇÃO (worker) ---
+
+def claim_next(worker_id):
+    """
+    Reserva a próxima tarefa liberada. SKIP LOCKED deixa vários workers
+    lerem a fila sem esperar uns pelos outros; o UPDATE condicional garante
+    a posse também em bancos sem SELECT ... FOR UPDATE (SQLite).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Status.QUEUED, run_after__lte=now)
+            .order_by('run_after', 'id')
+            .values_list('id', flat=True)[:5]
+        )
+        for job_id in candidates:
+            claimed = Job.objects.filter(pk=job_id, status=Status.QUEUED).update(
+                status=Status.RUNNING,
+                locked_by=worker_id,
+                locked_at=now,
+                attempts=F('attempts') + 1,
+                progress=0,
+                progress_note='',
+                updated_at=now,
+            )
+            if claimed:
+                return Job.objects.get(pk=job_id)
+    return None
+
+
+def report_progress(job, percent, note=''):
+    """
+    Atualiza a barra de progresso (visível no admin) e renova a reserva:
+    `locked_at` funciona como batimento, então uma tarefa longa que ainda
+    reporta progresso não é tida como presa por `requeue_stale`.
+    """
+    now = timezone.now()
+    job.progress, job.progress_note, job.locked_at = percent, note[:255], now
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        progress=percent, progress_note=job.progress_note, locked_at=now, updated_at=now,
+    )
+
+
+def _finish(job, **fields):
+    fields.update(locked_by='', locked_at=None, updated_at=timezone.now())
+    # Só quem ainda tem a reserva grava o desfecho (a tarefa pode ter sido devolvida à fila)
+    if not Job.objects.filter(pk=job.pk, status=Status.RUNNING, locked_by=job.locked_by).update(**fields):
+        logger.warning("Tarefa %s não pertence mais a %s; desfecho descartado.", job.pk, job.locked_by)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def run_job(job):
+    """Executa uma tarefa já reservada e registra o desfecho."""
+    func = HANDLERS.get(job.kind)
+    try:
+        if func is None:
+            raise PermanentError(f"Tipo de tarefa sem handler: {job.kind}")
+        result = func(job)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        if isinstance(e, PermanentError) or job.attempts >= job.max_attempts:
+            logger.error("Tarefa %s falhou definitivamente: %s", job.pk, error)
+            _finish(job, status=Status.FAILED, last_error=error, finished_at=timezone.now())
+        else:
+            retry_at = timezone.now() + backoff(job.attempts)
+            logger.warning("Tarefa %s falhou (tentativa %s), nova tentativa em %s: %s", job.pk, job.attempts, retry_at, error)
+            _finish(job, status=Status.QUEUED, last_error=error, run_after=retry_at)
+        return job
+
+    _finish(
+        job, status=Status.DONE, result=result, progress=100,
+        progress_note='Concluída', last_error='', finished_at=timezone.now(),
+    )
+    return job
+
+
+def requeue_stale(timeout):
+    """
+    Trata as tarefas 'executando' sem batimento há mais de `timeout` (worker
+    morreu no meio). A tentativa perdida já foi contada em `claim_next`:
+    quem ainda tem tentativas volta para a fila, quem esgotou falha, assim
+    uma tarefa que derruba o worker não é repetida para sempre.
+    Retorna quantas voltaram para a fila.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Status.RUNNING, locked_at__lt=now - timeout)
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Status.FAILED, locked_by='', locked_at=None, finished_at=now, updated_at=now,
+        last_error="Worker interrompido (tarefa sem progresso) e tentativas esgotadas.",
+    )
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Status.QUEUED, locked_by='', locked_at=None, run_after=now, updated_at=now,
+        last_error="Worker interrompido (tarefa sem progresso); devolvida à fila.",
+    )
+
+
+def run_pending(worker_id, limit=None):
+    """Executa as tarefas liberadas até esvaziar a fila (ou `limit`). Retorna quantas rodaram."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim_next(worker_id)
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
+
+
+def run_pending_concurrently(worker_id, workers):
+    """
+    `workers` threads consumindo a fila ao mesmo tempo: as chamadas ao LLM
+    se sobrepõem e o ritmo fica limitado pelas fichas de cada modelo.
+    """
+    if workers <= 1:
+        return run_pending(worker_id)
+
+    def consume(index):
+        try:
+            return run_pending(f"{worker_id}/{index}")
+        finally:
+            # Cada thread abre a sua conexão; fecha ao terminar
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(consume, range(workers)))
+
+
+# --- HANDLERS ---
+
+def _chapter(job):
+    try:
+        return Chapter.objects.get(pk=job.payload['chapter_id'])
+    except (KeyError, Chapter.DoesNotExist):
+        raise PermanentError(f"Aula não encontrada: {job.payload.get('chapter_id')}")
+
+
+@handler(Job.Kind.CONTEUDO_AULA)
+def gerar_conteudo_job(job):
+    chapter = _chapter(job)
+    report_progress(job, 10, f"Gerando texto de '{chapter.title}'")
+    chapter.content = gerar_conteudo_aula(chapter.title)
+    report_progress(job, 80, "Salvando e renderizando")
+    # O save re-renderiza o HTML em cache (content_html) junto com o texto
+    chapter.save(update_fields=['content', 'updated_at'])
+    return {'chapter_id': chapter.pk, 'caracteres': len(chapter.content)}
+
+
+@handler(Job.Kind.QUESTOES_AULA)
+def gerar_questoes_job(job):
+    chapter = _chapter(job)
+    if not chapter.content:
+        raise PermanentError(f"A aula '{chapter.title}' não possui conteúdo para basear as perguntas.")
+    report_progress(job, 10, f"Gerando questionário de '{chapter.title}'")
+    questoes = gerar_questoes(chapter, quantidade=job.payload.get('quantidade', 3))
+    return {'chapter_id': chapter.pk, 'questoes': len(questoes)}
+
+
+@handler(Job.Kind.GERAR_TRILHA)
+def gerar_trilha_job(job):
+    try:
+        trail = Trail.objects.get(pk=job.payload['trail_id'])
+    except (KeyError, Trail.DoesNotExist):
+        raise PermanentError(f"Trilha não encontrada: {job.payload.get('trail_id')}")
+    report_progress(job, 5, f"Regenerando '{trail.title}'")
+    report = gerar_trilha(
+        trail,
+        conteudo=job.payload.get('conteudo', True),
+        questoes=job.payload.get('questoes', True),
+        substituir=job.payload.get('substituir', True),
+        progress=lambda percent, note: report_progress(job, percent, note),
+    )
+    if report['erros'] and not (report['conteudo'] or report['questoes']):
+        # Nada saiu (ex.: cota esgotada em todos os modelos): tenta de novo mais tarde
+        raise LLMError(f"{len(report['erros'])} aulas falharam: {next(iter(report['erros'].values()))}")
+    return report
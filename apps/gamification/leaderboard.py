@@ -0,0 +1,182 @@
+# apps/gamification/leaderboard.py
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from apps.accounts.ranks import tiers_for
+
+from .models import DailyXP
+
+HISTOGRAM_CACHE_KEY = 'gamification:leaderboard:histogram'
+WINDOW_CACHE_KEY = 'gamification:leaderboard:{period}:{start}:{n}'
+TOP_CACHE_KEY = 'gamification:leaderboard:top:{n}'
+MY_RANK_CACHE_KEY = 'gamification:leaderboard:my_rank:{user_id}:{xp}'
+
+# Janelas dos rankings periódicos (valor da querystring -> rótulo)
+PERIODS = {
+    'semana': 'Semana',
+    'mes': 'Mês',
+    'temporada': 'Temporada',
+}
+
+# Ordem do ranking: mais XP primeiro; empate decidido pela conta mais antiga (menor id).
+# Coincide com o índice composto (-xp, id) de accounts.User.
+LEADERBOARD_ORDER = ('-xp', 'id')
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    position: int
+    user_id: int
+    username: str
+    xp: int
+    # Patente (RankTier) já resolvida para a listagem
+    tier: dict = field(default=None, compare=False)
+
+
+@dataclass
+class MyRank:
+    position: int
+    total: int
+    above: list = field(default_factory=list)
+    below: list = field(default_factory=list)
+
+
+def _entries(rows, first_position=1, tier_xps=None):
+    """
+    [(user_id, username, xp)] -> LeaderboardEntry, com as patentes calculadas em uma passada.
+    `tier_xps` (XP total de cada aluno) separa a patente da pontuação exibida,
+    como nos rankings por período.
+    """
+    rows = list(rows)
+    tiers = tiers_for(tier_xps if tier_xps is not None else [xp for _, _, xp in rows])
+    return [
+        LeaderboardEntry(pos, user_id, username, xp, tier)
+        for pos, (user_id, username, xp), tier in zip(range(first_position, first_position + len(rows)), rows, tiers)
+    ]
+
+
+def top(n=5):
+    """Top N do ranking global: uma leitura pelo índice (-xp, id)."""
+    User = get_user_model()
+    return _entries(User.objects.order_by(*LEADERBOARD_ORDER).values_list('id', 'username', 'xp')[:n])
+
+
+# --- HISTOGRAMA DE FAIXAS DE XP ---
+
+def get_histogram():
+    """
+    Quantidade de alunos por faixa de XP ({faixa: total}, faixa = xp // largura),
+    em cache por LEADERBOARD_HISTOGRAM_TIMEOUT segundos.
+    """
+    width = settings.LEADERBOARD_BUCKET_WIDTH
+    histogram = cache.get(HISTOGRAM_CACHE_KEY)
+    if histogram is None:
+        User = get_user_model()
+        histogram = dict(
+            User.objects.annotate(bucket=F('xp') / width)
+            .values_list('bucket')
+            .annotate(total=Count('id'))
+        )
+        cache.set(HISTOGRAM_CACHE_KEY, histogram, settings.LEADERBOARD_HISTOGRAM_TIMEOUT)
+    return histogram
+
+
+def invalidate_histogram():
+    cache.delete(HISTOGRAM_CACHE_KEY)
+
+
+def rank_of(user_id, xp):
+    """
+    Posição do aluno no ranking global sem contar a tabela inteira:
+    alunos das faixas acima vêm do histograma em cache; dentro da própria
+    faixa a contagem é exata, via faixa do índice (-xp, id).
+    Entre atualizações do histograma, o erro se limita a quem trocou de faixa.
+    """
+    User = get_user_model()
+    width = settings.LEADERBOARD_BUCKET_WIDTH
+    bucket = xp // width
+    histogram = get_histogram()
+
+    above_buckets = sum(total for b, total in histogram.items() if b > bucket)
+    within_bucket = User.objects.filter(
+        Q(xp__gt=xp, xp__lt=(bucket + 1) * width) | Q(xp=xp, id__lt=user_id)
+    ).count()
+    return above_buckets + within_bucket + 1
+
+
+def neighbours(user_id, xp, k=2):
+    """Os k alunos imediatamente acima e abaixo, na ordem do ranking."""
+    User = get_user_model()
+    fields = ('id', 'username', 'xp')
+    above = list(
+        User.objects.filter(Q(xp__gt=xp) | Q(xp=xp, id__lt=user_id))
+        .order_by('xp', '-id').values_list(*fields)[:k]
+    )
+    below = list(
+        User.objects.filter(Q(xp__lt=xp) | Q(xp=xp, id__gt=user_id))
+        .order_by(*LEADERBOARD_ORDER).values_list(*fields)[:k]
+    )
+    return above[::-1], below
+
+
+def my_rank(user, k=2):
+    """Posição do aluno, total de participantes e vizinhos no ranking."""
+    position = rank_of(user.pk, user.xp)
+    above, below = neighbours(user.pk, user.xp, k)
+    return MyRank(
+        position=position,
+        # O histograma pode estar alguns segundos atrasado
+        total=max(sum(get_histogram().values()), position + len(below)),
+        above=_entries(above, position - len(above)),
+        below=_entries(below, position + 1),
+    )
+
+
+# --- RANKINGS POR PERÍODO (ROLLUP DIÁRIO) ---
+
+def period_start(period, today=None):
+    """
+    Primeiro dia da janela: semana (segunda-feira), mês corrente ou
+    temporada (blocos de LEADERBOARD_SEASON_MONTHS meses a partir de janeiro).
+    """
+    today = today or timezone.localdate()
+    if period == 'semana':
+        return today - timedelta(days=today.weekday())
+    if period == 'mes':
+        return today.replace(day=1)
+    if period == 'temporada':
+        months = settings.LEADERBOARD_SEASON_MONTHS
+        return today.replace(month=(today.month - 1) // months * months + 1, day=1)
+    raise ValueError(f"Período desconhecido: {period}")
+
+
+def windowed_top(period, n=10, today=None):
+    """
+    Top N do período somando o rollup DailyXP (nunca o histórico inteiro),
+    em cache por LEADERBOARD_WINDOW_TIMEOUT segundos.
+    Empates: conta mais antiga primeiro, como no ranking global.
+    """
+    start = period_start(period, today)
+    key = WINDOW_CACHE_KEY.format(period=period, start=start.isoformat(), n=n)
+    entries = cache.get(key)
+    if entries is None:
+        rows = list(
+            DailyXP.objects.filter(day__gte=start)
+            .values_list('user_id', 'user__username', 'user__xp')
+            .annotate(total=Sum('xp'))
+            .filter(total__gt=0)
+            .order_by('-total', 'user_id')[:n]
+        )
+        # Soma do período só ordena e aparece na tabela; a patente é a do XP total
+        entries = _entries(
+            [(user_id, username, total) for user_id, username, _, total in rows],
+            tier_xps=[xp for _, _, xp, _ in rows],
+        )
+        cache.set(key, entries, settings.LEADERBOARD_WINDOW_TIMEOUT)
+    return entries
@@ -0,0 +1,296 @@
+# apps/gamification/ledger.py
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .cache import bump_user_versions
+from .models import BalanceSnapshot, DailyXP, PointTransaction, UserMedal
+from .utils import award_crossed_medals, medals_crossed, get_medal_thresholds
+
+AwardType = PointTransaction.AwardType
+
+# Prêmios legados que também contam como já recebidos para cada tipo
+LEGACY_EQUIVALENTS = {
+    AwardType.LEITURA: (AwardType.CONCLUSAO,),
+    AwardType.QUIZ: (AwardType.CONCLUSAO,),
+}
+
+
+def has_award(user, award_type, chapter):
+    """Verifica (por índice) se o aluno já recebeu o prêmio deste capítulo."""
+    award_types = (award_type,) + LEGACY_EQUIVALENTS.get(award_type, ())
+    return PointTransaction.objects.filter(
+        user=user, chapter=chapter, award_type__in=award_types
+    ).exists()
+
+
+def credit_xp(user, quantity, description, award_type=AwardType.MANUAL, chapter=None, questao=None):
+    """
+    Primitiva única de crédito de XP.
+    Em uma transação curta: grava a linha no histórico e incrementa User.xp
+    com F() (via signal/apply_to_balance), sem sobrescrever a linha inteira
+    do usuário e sem perder atualizações concorrentes (duas abas, retries).
+    Sincroniza o `user` em memória com o saldo gravado.
+    """
+    with transaction.atomic():
+        point_transaction = PointTransaction.objects.create(
+            user=user,
+            quantity=quantity,
+            description=description,
+            award_type=award_type,
+            chapter=chapter,
+            questao=questao,
+        )
+    _sync_user_balance(user, point_transaction)
+    return point_transaction
+
+
+def award_once(user, award_type, chapter, quantity, description):
+    """
+    Registra um prêmio de XP no máximo uma vez por (aluno, tipo, capítulo).
+    Seguro contra duplo envio: a restrição única do banco decide a corrida e
+    o get_or_create devolve o registro existente ao perdedor.
+    Retorna (transacao, criado).
+    """
+    legacy = LEGACY_EQUIVALENTS.get(award_type, ())
+    with transaction.atomic():
+        if legacy and PointTransaction.objects.filter(
+            user=user, chapter=chapter, award_type__in=legacy
+        ).exists():
+            return None, False
+
+        point_transaction, created = PointTransaction.objects.get_or_create(
+            user=user,
+            award_type=award_type,
+            chapter=chapter,
+            questao=None,
+            defaults={'quantity': quantity, 'description': description},
+        )
+    if created:
+        _sync_user_balance(user, point_transaction)
+    return point_transaction, created
+
+
+def _sync_user_balance(user, point_transaction):
+    balance = getattr(point_transaction, 'balance_after', None)
+    if balance is not None and hasattr(user, 'xp'):
+        user.xp = balance
+
+
+def add_daily_xp(user_ids, day, quantity):
+    """
+    Soma `quantity` ao rollup diário dos alunos (upsert: insere as linhas
+    ausentes e incrementa com F(), sem ler antes).
+    """
+    if not user_ids or not quantity:
+        return
+    DailyXP.objects.bulk_create(
+        [DailyXP(user_id=user_id, day=day) for user_id in user_ids],
+        ignore_conflicts=True, batch_size=1000
+    )
+    DailyXP.objects.filter(user_id__in=user_ids, day=day).update(xp=F('xp') + quantity)
+
+
+def apply_to_balance(point_transaction):
+    """
+    Aplica uma transação recém-criada ao saldo corrente (User.xp) e avalia as
+    medalhas uma única vez, pelo intervalo entre o saldo antigo e o novo.
+    Chamado pelo signal post_save de PointTransaction; o saldo resultante
+    fica em `point_transaction.balance_after`.
+    """
+    User = get_user_model()
+    quantity = point_transaction.quantity
+    with transaction.atomic():
+        # O UPDATE trava a linha do aluno; a leitura seguinte vê o próprio valor
+        User.objects.filter(pk=point_transaction.user_id).update(xp=Greatest(F('xp') + quantity, 0))
+        new_xp = User.objects.filter(pk=point_transaction.user_id).values_list('xp', flat=True).first()
+        point_transaction.balance_after = new_xp
+        add_daily_xp([point_transaction.user_id], timezone.localdate(point_transaction.created_at), quantity)
+        bump_user_versions([point_transaction.user_id])
+        if new_xp is None or quantity <= 0:
+            return []
+        return award_crossed_medals(point_transaction.user_id, new_xp - quantity, new_xp)
+
+
+def _chunked_ids(users, chunk_size):
+    """Aceita QuerySet de usuários ou lista de IDs e devolve blocos ordenados de IDs."""
+    if hasattr(users, 'values_list'):
+        ids = users.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=chunk_size)
+    else:
+        ids = iter(sorted(set(users)))
+    chunk = []
+    for user_id in ids:
+        chunk.append(user_id)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_award_xp(users, quantity, description, award_type=AwardType.MANUAL, chunk_size=1000, progress=None):
+    """
+    Concede o mesmo XP a muitos alunos (bônus de evento, turma inteira).
+    Por bloco, em uma transação curta:
+    - bulk_create no histórico (sem disparar o signal por linha);
+    - um único UPDATE xp = xp + n (e no rollup diário);
+    - uma passada de medalhas em lote a partir dos saldos antigos.
+    `progress(processados, medalhas)` é chamado ao fim de cada bloco.
+    Retorna (alunos_premiados, medalhas_concedidas).
+    """
+    if quantity <= 0:
+        raise ValueError("A quantidade de XP do bônus deve ser positiva.")
+
+    User = get_user_model()
+    total_users = total_medals = 0
+    for chunk in _chunked_ids(users, chunk_size):
+        with transaction.atomic():
+            balances = list(
+                User.objects.select_for_update().filter(pk__in=chunk).values_list('pk', 'xp')
+            )
+            if not balances:
+                continue
+
+            PointTransaction.objects.bulk_create([
+                PointTransaction(user_id=user_id, quantity=quantity, description=description, award_type=award_type)
+                for user_id, _ in balances
+            ], batch_size=chunk_size)
+            awarded_ids = [user_id for user_id, _ in balances]
+            User.objects.filter(pk__in=awarded_ids).update(xp=F('xp') + quantity)
+            add_daily_xp(awarded_ids, timezone.localdate(), quantity)
+            bump_user_versions(awarded_ids)
+
+            new_medals = [
+                UserMedal(user_id=user_id, medal_id=medal_id)
+                for user_id, old_xp in balances
+                for medal_id, _ in medals_crossed(old_xp, old_xp + quantity)
+            ]
+            UserMedal.objects.bulk_create(new_medals, ignore_conflicts=True, batch_size=chunk_size)
+
+        total_users += len(balances)
+        total_medals += len(new_medals)
+        if progress:
+            progress(total_users, total_medals)
+
+    return total_users, total_medals
+
+
+# --- RECONCILIAÇÃO XP x HISTÓRICO x MEDALHAS ---
+
+def _latest_snapshot_subquery(field):
+    return Subquery(
+        BalanceSnapshot.objects.filter(user_id=OuterRef('user_id'))
+        .order_by('-last_transaction_id')
+        .values(field)[:1]
+    )
+
+
+def latest_snapshots(user_ids):
+    """{user_id: (saldo, last_transaction_id)} do snapshot mais recente de cada aluno."""
+    return {
+        user_id: (balance, last_id)
+        for user_id, balance, last_id in BalanceSnapshot.objects.filter(
+            user_id__in=user_ids, pk=_latest_snapshot_subquery('pk')
+        ).values_list('user_id', 'balance', 'last_transaction_id')
+    }
+
+
+def _deltas_after_snapshot(user_ids, upto_id=None):
+    """Soma (agrupada) das transações posteriores ao último snapshot de cada aluno."""
+    rows = PointTransaction.objects.filter(
+        user_id__in=user_ids,
+        id__gt=Coalesce(_latest_snapshot_subquery('last_transaction_id'), 0),
+    )
+    if upto_id is not None:
+        rows = rows.filter(id__lte=upto_id)
+    return dict(rows.values_list('user_id').annotate(total=Sum('quantity')))
+
+
+def ledger_balances(user_ids):
+    """
+    Saldo de cada aluno segundo o histórico: último snapshot + transações
+    posteriores a ele. Duas consultas agrupadas, que leem apenas a cauda do
+    histórico (as linhas antigas podem até já estar arquivadas).
+    """
+    snapshots = latest_snapshots(user_ids)
+    balances = _deltas_after_snapshot(user_ids)
+    for user_id, (balance, _) in snapshots.items():
+        balances[user_id] = balance + balances.get(user_id, 0)
+    return balances
+
+
+def snapshot_cutoff(lag):
+    """
+    Maior id de transação que pode entrar em um snapshot: só linhas criadas
+    há mais de `lag` (timedelta), para não pular ids de transações
+    concorrentes ainda não confirmadas.
+    """
+    return PointTransaction.objects.filter(
+        created_at__lt=timezone.now() - lag
+    ).aggregate(last=Max('id'))['last']
+
+
+def snapshot_chunk(user_ids, cutoff_id):
+    """
+    Grava um novo snapshot para cada aluno do bloco com transações entre o
+    snapshot anterior e `cutoff_id`. Retorna a quantidade de snapshots criados.
+    """
+    snapshots = latest_snapshots(user_ids)
+    deltas = _deltas_after_snapshot(user_ids, upto_id=cutoff_id)
+    novos = [
+        BalanceSnapshot(
+            user_id=user_id,
+            balance=snapshots.get(user_id, (0, 0))[0] + delta,
+            last_transaction_id=cutoff_id,
+        )
+        for user_id, delta in deltas.items()
+    ]
+    BalanceSnapshot.objects.bulk_create(novos, batch_size=1000)
+    return len(novos)
+
+
+def reconcile_chunk(user_ids, dry_run=False):
+    """
+    Reconcilia um bloco de alunos:
+    - User.xp passa a ser a soma do histórico (bulk_update);
+    - medalhas devidas e ausentes são inseridas (bulk_create ignore_conflicts).
+    Os alunos do bloco ficam travados durante a correção, então créditos
+    concorrentes (que incrementam com F()) são aplicados depois, sem perda.
+    Retorna (correcoes_xp [(user_id, antes, depois)], medalhas_faltantes).
+    """
+    User = get_user_model()
+    points, medals = get_medal_thresholds()
+
+    with transaction.atomic():
+        users = User.objects.filter(pk__in=user_ids)
+        if not dry_run:
+            users = users.select_for_update()
+        current = dict(users.values_list('pk', 'xp'))
+        balances = ledger_balances(list(current))
+
+        fixes = []
+        for user_id, xp in current.items():
+            expected = max(balances.get(user_id, 0), 0)
+            if xp != expected:
+                fixes.append((user_id, xp, expected))
+
+        earned = set(UserMedal.objects.filter(user_id__in=list(current)).values_list('user_id', 'medal_id'))
+        missing = []
+        for user_id in current:
+            balance = max(balances.get(user_id, 0), 0)
+            for threshold, (medal_id, _) in zip(points, medals):
+                if threshold > balance:
+                    break
+                if (user_id, medal_id) not in earned:
+                    missing.append(UserMedal(user_id=user_id, medal_id=medal_id))
+
+        if not dry_run:
+            User.objects.bulk_update(
+                [User(pk=user_id, xp=expected) for user_id, _, expected in fixes], ['xp'], batch_size=1000
+            )
+            UserMedal.objects.bulk_create(missing, ignore_conflicts=True, batch_size=1000)
+            bump_user_versions({user_id for user_id, _, _ in fixes} | {medal.user_id for medal in missing})
+
+    return fixes, len(missing)
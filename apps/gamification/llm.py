@@ -0,0 +1,81 @@
+# apps/gamification/llm.py
+import json
+import os
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class LLMError(Exception):
+    """Falha ao obter resposta do modelo (a tarefa pode ser tentada de novo)."""
+
+
+class RateLimited(LLMError):
+    """Cota do modelo esgotada (HTTP 429 / RESOURCE_EXHAUSTED)."""
+
+
+def _is_rate_limit(error):
+    text = str(error)
+    return '429' in text or 'RESOURCE_EXHAUSTED' in text
+
+
+class GeminiClient:
+    """Cliente real (google-genai). Um `generate` = uma chamada a um modelo."""
+
+    def __init__(self, api_key=None):
+        from google import genai  # dependência só do cliente real
+
+        api_key = api_key or os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise LLMError("GEMINI_API_KEY não encontrada no .env")
+        self._client = genai.Client(api_key=api_key)
+
+    def generate(self, prompt, model, json_output=False):
+        from google.genai import types
+
+        config = types.GenerateContentConfig(response_mime_type='application/json') if json_output else None
+        try:
+            response = self._client.models.generate_content(model=model, contents=prompt, config=config)
+        except Exception as e:
+            raise (RateLimited if _is_rate_limit(e) else LLMError)(f"{model}: {e}") from e
+        if not response or not response.text:
+            raise LLMError(f"{model}: resposta vazia")
+        return response.text
+
+
+class FakeClient:
+    """
+    Cliente local e determinístico para desenvolvimento e testes (sem rede).
+    Devolve uma aula em HTML ou, com `json_output`, um questionário válido.
+    """
+
+    def __init__(self, **kwargs):
+        self.calls = []
+
+    def generate(self, prompt, model, json_output=False):
+        self.calls.append((model, prompt))
+        if json_output:
+            return json.dumps([
+                {
+                    'enunciado': f"Questão {i} gerada localmente?",
+                    'xp': 10,
+                    'alternativas': [
+                        {'texto': "Correta", 'correta': True},
+                        {'texto': "Errada A", 'correta': False},
+                        {'texto': "Errada B", 'correta': False},
+                        {'texto': "Errada C", 'correta': False},
+                    ],
+                }
+                for i in range(1, 4)
+            ])
+        return f"<h1>Aula gerada localmente</h1><p>{len(prompt)} caracteres de prompt via {model}.</p>"
+
+
+def get_client():
+    """Instancia o cliente configurado em settings.LLM_CLIENT (caminho pontilhado)."""
+    return import_string(settings.LLM_CLIENT)()
+
+
+def get_models():
+    """Modelos em ordem de preferência (os seguintes são fallback)."""
+    return list(settings.LLM_MODELS)
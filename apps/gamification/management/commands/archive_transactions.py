@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.gamification.archive import archive_dir, archive_transactions
+
+class Command(BaseCommand):
+    help = 'Arquiva transações de XP antigas (já cobertas por snapshot) em segmentos gzip fora do banco'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Data limite (AAAA-MM-DD); padrão: --days atrás')
+        parser.add_argument('--days', type=int, default=365, help='Idade mínima das transações arquivadas')
+        parser.add_argument('--dir', help='Diretório dos segmentos (padrão: LEDGER_ARCHIVE_DIR)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Transações por segmento')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                before = timezone.make_aware(datetime.strptime(options['before'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError("Use o formato AAAA-MM-DD em --before.")
+        else:
+            before = timezone.now() - timedelta(days=options['days'])
+
+        directory = archive_dir(options['dir'])
+        self.stdout.write(f"📦 Arquivando transações anteriores a {before:%Y-%m-%d} em {directory}...")
+
+        total, segmentos = archive_transactions(
+            before,
+            directory=directory,
+            chunk_size=options['chunk_size'],
+            progress=lambda n, s: self.stdout.write(f"... {n} transações em {s} segmentos"),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} transações arquivadas em {segmentos} segmentos."
+        ))
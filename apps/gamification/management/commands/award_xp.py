@@ -0,0 +1,71 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from apps.gamification.ledger import bulk_award_xp
+
+class Command(BaseCommand):
+    help = 'Concede XP em lote (bônus de evento/turma) para uma lista de RUs, um CSV ou todos os alunos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--amount', type=int, required=True, help='XP concedido a cada aluno')
+        parser.add_argument('--description', required=True, help='Motivo registrado no histórico de XP')
+        parser.add_argument('--csv', dest='csv_path', help='Arquivo CSV com os RUs (coluna "ru" ou a primeira coluna)')
+        parser.add_argument('--ru', action='append', default=[], help='RU de um aluno (pode repetir)')
+        parser.add_argument('--all', action='store_true', help='Concede para todos os alunos ativos')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Apenas mostra quantos alunos seriam premiados')
+
+    def read_csv(self, path):
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as handle:
+                rows = list(csv.reader(handle))
+        except OSError as e:
+            raise CommandError(f"Não foi possível ler o CSV: {e}")
+        if not rows:
+            return []
+        header = [col.strip().lower() for col in rows[0]]
+        if 'ru' in header:
+            col = header.index('ru')
+            rows = rows[1:]
+        else:
+            col = 0
+        return [row[col].strip() for row in rows if len(row) > col and row[col].strip()]
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+
+        if options['all']:
+            users = User.objects.filter(is_active=True)
+            self.stdout.write(f"Alvo: todos os alunos ativos ({users.count()})")
+        else:
+            rus = set(options['ru'])
+            if options['csv_path']:
+                rus.update(self.read_csv(options['csv_path']))
+            if not rus:
+                raise CommandError("Informe --ru, --csv ou --all.")
+            users = User.objects.filter(ru__in=rus)
+            encontrados = set(users.values_list('ru', flat=True))
+            faltando = rus - encontrados
+            if faltando:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️ {len(faltando)} RUs não encontrados: {', '.join(sorted(faltando)[:20])}"
+                ))
+            self.stdout.write(f"Alvo: {len(encontrados)} alunos")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry-run: nenhum XP foi concedido."))
+            return
+
+        def progress(processados, medalhas):
+            self.stdout.write(f"... {processados} alunos premiados, {medalhas} medalhas")
+
+        total, medalhas = bulk_award_xp(
+            users,
+            options['amount'],
+            options['description'],
+            chunk_size=options['chunk_size'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ +{options['amount']} XP para {total} alunos ({medalhas} medalhas novas)."
+        ))
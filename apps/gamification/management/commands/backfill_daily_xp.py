@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.gamification.models import DailyXP, PointTransaction
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói o rollup DailyXP (XP por aluno por dia) a partir do histórico, em blocos (keyset). '
+        'Transações arquivadas não estão mais no banco: depois de archive_transactions, use --since.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--since', help='Reconstrói apenas a partir deste dia (AAAA-MM-DD)')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        chunk_size = options['chunk_size']
+        tz = timezone.get_current_timezone()
+        since = None
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("Use o formato AAAA-MM-DD em --since.")
+
+        last_id = 0
+        alunos = linhas = 0
+        while True:
+            ids = list(
+                User.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            with transaction.atomic():
+                # Travar os alunos serializa com créditos concorrentes (que também travam a linha)
+                list(User.objects.select_for_update().filter(pk__in=ids).values_list('pk', flat=True))
+                totais = (
+                    PointTransaction.objects.filter(user_id__in=ids)
+                    .annotate(day=TruncDate('created_at', tzinfo=tz))
+                    .values_list('user_id', 'day')
+                    .annotate(total=Sum('quantity'))
+                )
+                antigos = DailyXP.objects.filter(user_id__in=ids)
+                if since:
+                    totais = totais.filter(day__gte=since)
+                    antigos = antigos.filter(day__gte=since)
+                rollups = [DailyXP(user_id=user_id, day=day, xp=total) for user_id, day, total in totais]
+                antigos.delete()
+                DailyXP.objects.bulk_create(rollups, batch_size=1000)
+
+            alunos += len(ids)
+            linhas += len(rollups)
+            self.stdout.write(f"... {alunos} alunos processados ({linhas} dias)")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Rollup diário reconstruído: {linhas} linhas para {alunos} alunos."))
@@ -0,0 +1,74 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.gamification.models import Chapter, Alternativa
+from apps.gamification.quiz import build_answer_key, get_answer_key, grade_submission
+
+class Command(BaseCommand):
+    help = 'Mede submissões de quiz corrigidas por segundo: correção legada (consultas por questão) vs gabarito compilado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('chapter_id', type=int, help='ID do capítulo com questões cadastradas')
+        parser.add_argument('--submissions', type=int, default=200, help='Quantidade de submissões simuladas')
+
+    def legacy_grade(self, questoes, data):
+        """Reprodução fiel da correção antiga da view exibir_quiz (2N+ consultas)."""
+        acertos = 0
+        for q in questoes:
+            alt_id = data.get(f'questao_{q.id}')
+            escolha = Alternativa.objects.filter(id=alt_id).first() if alt_id else None
+            q.alternativas.filter(e_correta=True).first()
+            if escolha and escolha.e_correta:
+                acertos += 1
+        return acertos
+
+    def measure(self, label, submissions, grade):
+        with CaptureQueriesContext(connection) as queries:
+            inicio = time.perf_counter()
+            for data in submissions:
+                grade(data)
+            duracao = time.perf_counter() - inicio
+        por_segundo = len(submissions) / duracao if duracao > 0 else float('inf')
+        self.stdout.write(
+            f"{label:<22} {por_segundo:>10.1f} submissões/s | "
+            f"{len(queries) / len(submissions):.1f} consultas/submissão"
+        )
+        return por_segundo
+
+    def handle(self, *args, **options):
+        try:
+            chapter = Chapter.objects.get(id=options['chapter_id'])
+        except Chapter.DoesNotExist:
+            raise CommandError(f"Capítulo {options['chapter_id']} não encontrado.")
+
+        answer_key = build_answer_key(chapter.id)
+        if not answer_key.questions:
+            raise CommandError(f'O capítulo "{chapter.title}" não possui questões.')
+
+        # Submissões aleatórias (respostas válidas, algumas em branco)
+        por_questao = {}
+        for alt_id, (questao_id, _) in answer_key.choices.items():
+            por_questao.setdefault(questao_id, []).append(alt_id)
+        submissions = []
+        for _ in range(options['submissions']):
+            data = {}
+            for questao_id, _ in answer_key.questions:
+                opcoes = por_questao.get(questao_id, []) + [None]
+                escolha = random.choice(opcoes)
+                if escolha is not None:
+                    data[f'questao_{questao_id}'] = str(escolha)
+            submissions.append(data)
+
+        self.stdout.write(f"Capítulo: {chapter.title} ({len(answer_key.questions)} questões, {len(submissions)} submissões)")
+
+        questoes = chapter.questoes.all().prefetch_related('alternativas')
+        antes = self.measure("Antes (legado)", submissions, lambda data: self.legacy_grade(questoes, data))
+        get_answer_key(chapter.id)  # aquece o cache
+        depois = self.measure(
+            "Depois (gabarito)", submissions,
+            lambda data: grade_submission(get_answer_key(chapter.id), data)
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Ganho: {depois / antes:.1f}x"))
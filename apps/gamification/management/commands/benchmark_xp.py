@@ -0,0 +1,80 @@
+import random
+import threading
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, OperationalError
+from django.db.models import Sum
+from apps.gamification.models import PointTransaction
+from apps.gamification.ledger import credit_xp
+
+# Roda contra o banco configurado. Para medir no PostgreSQL do docker-compose:
+#   docker-compose up -d db
+#   DB_NAME=plataforma_gamificada DB_USER=sivaldo DB_PASSWORD=... python manage.py migrate
+#   DB_NAME=... python manage.py benchmark_xp --threads 16 --credits 100
+# Todas as threads creditam o mesmo aluno: a linha de User.xp é o ponto de disputa,
+# então a vazão mede a fila nesse lock de linha, não a capacidade total do banco.
+class Command(BaseCommand):
+    help = 'Benchmark multi-thread da primitiva credit_xp: vazão e consistência (saldo == soma do histórico)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--credits', type=int, default=50, help='Créditos por thread')
+        parser.add_argument('--keep', action='store_true', help='Mantém o usuário de benchmark no banco')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        tag = uuid.uuid4().hex[:8]
+        user = User.objects.create(username=f'benchmark-xp-{tag}', ru=f'bench-{tag}')
+
+        retries = []
+        errors = []
+
+        def worker():
+            local_retries = 0
+            try:
+                for _ in range(options['credits']):
+                    quantity = random.randint(1, 20)
+                    # SQLite serializa escritas: "database is locked" é repetido com backoff
+                    for attempt in range(50):
+                        try:
+                            credit_xp(user, quantity, "Benchmark de concorrência")
+                            break
+                        except OperationalError:
+                            local_retries += 1
+                            time.sleep(0.001 * (attempt + 1))
+                    else:
+                        errors.append("crédito abandonado após 50 tentativas")
+            except Exception as e:  # noqa: BLE001 - reportado no resumo
+                errors.append(str(e))
+            finally:
+                retries.append(local_retries)
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.perf_counter() - inicio
+
+        saldo = User.objects.filter(pk=user.pk).values_list('xp', flat=True).get()
+        historico = PointTransaction.objects.filter(user=user).aggregate(total=Sum('quantity'))['total'] or 0
+        creditos = PointTransaction.objects.filter(user=user).count()
+
+        self.stdout.write(
+            f"Banco: {connection.vendor} | threads: {options['threads']} | créditos: {creditos} | "
+            f"{creditos / duracao:.1f} créditos/s | retries: {sum(retries)}"
+        )
+        self.stdout.write(f"Saldo User.xp = {saldo} | Soma do histórico = {historico}")
+
+        if not options['keep']:
+            user.delete()
+
+        if errors:
+            raise CommandError(f"{len(errors)} falhas durante o benchmark: {errors[0]}")
+        if saldo != historico:
+            raise CommandError("❌ Atualizações perdidas: o saldo diverge do histórico.")
+        self.stdout.write(self.style.SUCCESS("✅ Nenhuma atualização perdida."))
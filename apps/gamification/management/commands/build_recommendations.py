@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from apps.gamification.recommendations import build_recommendations
+
+class Command(BaseCommand):
+    help = 'Calcula as trilhas recomendadas (co-ocorrência entre alunos, NumPy) e grava os top-k vizinhos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=5, help='Vizinhos guardados por trilha')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Linhas de progresso por bloco')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total = build_recommendations(k=options['top_k'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} recomendações gravadas em {time.perf_counter() - inicio:.2f}s."
+        ))
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.gamification.models import Trail
+from apps.gamification.generation import format_stats, get_generator
+from apps.gamification.services import gerar_trilha
+
+class Command(BaseCommand):
+    help = 'Regenera via IA o texto e o questionário de todas as aulas de uma trilha (chamadas em paralelo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('trail_id', type=int)
+        parser.add_argument('--sem-conteudo', action='store_true', help='Mantém o texto atual das aulas')
+        parser.add_argument('--sem-questoes', action='store_true', help='Não gera questionários')
+        parser.add_argument('--acrescentar', action='store_true',
+                            help='Mantém as questões atuais e acrescenta as novas (padrão: substitui)')
+        parser.add_argument('--quantidade', type=int, default=3, help='Questões por aula')
+        parser.add_argument('--concurrency', type=int, default=settings.LLM_MAX_CONCURRENCY)
+
+    def handle(self, *args, **options):
+        try:
+            trail = Trail.objects.get(pk=options['trail_id'])
+        except Trail.DoesNotExist:
+            raise CommandError(f"Trilha {options['trail_id']} não encontrada.")
+
+        inicio = time.perf_counter()
+        report = gerar_trilha(
+            trail,
+            conteudo=not options['sem_conteudo'],
+            questoes=not options['sem_questoes'],
+            quantidade=options['quantidade'],
+            max_workers=options['concurrency'],
+            substituir=not options['acrescentar'],
+            progress=lambda percent, note: self.stdout.write(f"  [{percent:3d}%] {note}"),
+        )
+
+        for chapter_id, erro in report['erros'].items():
+            self.stdout.write(self.style.WARNING(f"⚠️ Aula {chapter_id}: {erro}"))
+        for linha in format_stats(get_generator().stats()):
+            self.stdout.write(f"  {linha}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ '{trail.title}': {report['conteudo']} textos e {report['questoes']} questões "
+            f"em {time.perf_counter() - inicio:.1f}s."
+        ))
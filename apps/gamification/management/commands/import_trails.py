@@ -0,0 +1,30 @@
+import json
+import time
+
+import yaml
+from django.core.management.base import BaseCommand, CommandError
+from apps.gamification.importer import import_path
+
+class Command(BaseCommand):
+    help = 'Importa trilhas, aulas e questões de um diretório Markdown (front-matter YAML) ou de um pacote JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Diretório com as pastas das trilhas (_trail.md + aulas .md) ou arquivo .json')
+        parser.add_argument('--dry-run', action='store_true', help='Valida e relata, mas desfaz tudo no final')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            report = import_path(options['path'], dry_run=options['dry_run'])
+        except (ValueError, KeyError, yaml.YAMLError, json.JSONDecodeError) as e:
+            raise CommandError(f"Pacote inválido: {e}")
+
+        self.stdout.write(f"  Trilhas: {report.trails_created} criadas, {report.trails_updated} atualizadas")
+        self.stdout.write(f"  Aulas: {report.chapters_created} criadas, {report.chapters_updated} atualizadas")
+        self.stdout.write(f"  Questões: {report.questoes_created} criadas, {report.questoes_updated} atualizadas")
+        self.stdout.write(f"  Alternativas: {report.alternativas_created} criadas, {report.alternativas_updated} atualizadas")
+
+        sufixo = " (dry-run, nada foi gravado)" if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Importação concluída em {time.perf_counter() - inicio:.2f}s{sufixo}."
+        ))
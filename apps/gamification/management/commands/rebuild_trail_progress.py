@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.gamification.models import Trail
+from apps.gamification.progress import rebuild_trail_progress
+
+class Command(BaseCommand):
+    help = 'Reconstrói a tabela UserTrailProgress a partir do histórico de UserProgress (backfill)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trail', type=int, action='append', dest='trail_ids',
+                            help='ID da trilha a reconstruir (pode repetir). Padrão: todas.')
+
+    def handle(self, *args, **options):
+        trail_ids = options['trail_ids'] or list(Trail.objects.values_list('id', flat=True))
+
+        criadas = atualizadas = 0
+        # Uma trilha por vez: memória limitada ao número de alunos da trilha
+        for trail_id in trail_ids:
+            c, a = rebuild_trail_progress([trail_id])
+            criadas += c
+            atualizadas += a
+            self.stdout.write(f"Trilha {trail_id}: {c} criadas, {a} atualizadas")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Progresso reconstruído: {criadas} linhas criadas, {atualizadas} atualizadas em {len(trail_ids)} trilhas."
+        ))
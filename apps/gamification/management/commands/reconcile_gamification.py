@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from apps.gamification.ledger import reconcile_chunk
+
+class Command(BaseCommand):
+    help = 'Reconcilia User.xp com o histórico de transações e insere medalhas faltantes, em blocos (keyset)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Apenas relata as divergências, sem gravar')
+        parser.add_argument('--show', type=int, default=20, help='Quantas divergências de XP listar no relatório')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+
+        last_id = 0
+        alunos = corrigidos = medalhas = 0
+        exemplos = []
+        # Paginação por chave (pk > último): memória limitada ao tamanho do bloco
+        while True:
+            ids = list(
+                User.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            fixes, missing = reconcile_chunk(ids, dry_run=dry_run)
+            alunos += len(ids)
+            corrigidos += len(fixes)
+            medalhas += missing
+            exemplos.extend(fixes[:max(options['show'] - len(exemplos), 0)])
+            self.stdout.write(f"... {alunos} alunos verificados ({corrigidos} saldos divergentes, {medalhas} medalhas faltantes)")
+
+        for user_id, antes, depois in exemplos:
+            self.stdout.write(f"  usuário {user_id}: xp {antes} -> {depois}")
+
+        acao = "encontrados (dry-run, nada foi gravado)" if dry_run else "corrigidos"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {alunos} alunos: {corrigidos} saldos e {medalhas} medalhas {acao}."
+        ))
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from apps.gamification.search import reindex
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca full-text (trilhas, aulas e questões)'
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total = reindex()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} documentos indexados ({connection.vendor}) em {time.perf_counter() - inicio:.2f}s."
+        ))
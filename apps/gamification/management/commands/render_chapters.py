@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from apps.gamification.models import Chapter
+from apps.gamification.rendering import refresh_rendered_content
+
+class Command(BaseCommand):
+    help = 'Re-renderiza em lote o HTML das aulas (use após mudar as extensões do Markdown)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Renderiza todas as aulas, mesmo as que já estão com o hash atual')
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        chapters = Chapter.objects.only('id', 'content', 'content_hash').order_by('id')
+
+        pendentes = []
+        renderizadas = 0
+        for chapter in chapters.iterator(chunk_size=batch_size):
+            if options['force']:
+                chapter.content_hash = ''
+            if refresh_rendered_content(chapter):
+                pendentes.append(chapter)
+            if len(pendentes) >= batch_size:
+                Chapter.objects.bulk_update(pendentes, ['content_html', 'content_hash'])
+                renderizadas += len(pendentes)
+                pendentes = []
+
+        if pendentes:
+            Chapter.objects.bulk_update(pendentes, ['content_html', 'content_hash'])
+            renderizadas += len(pendentes)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {renderizadas} aulas renderizadas."))
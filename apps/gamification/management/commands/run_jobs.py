@@ -0,0 +1,47 @@
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from apps.gamification.generation import format_stats, get_generator
+from apps.gamification.jobs import requeue_stale, run_pending_concurrently
+
+class Command(BaseCommand):
+    help = 'Worker da fila de tarefas em segundo plano (geração de conteúdo e questionários por IA)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Processa as tarefas liberadas e encerra')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Intervalo (s) entre consultas à fila vazia')
+        # Cada tarefa já paraleliza as suas chamadas ao LLM (LLM_MAX_CONCURRENCY);
+        # mais threads aqui só valem com um banco que aceite escritas simultâneas (PostgreSQL)
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Tarefas executadas ao mesmo tempo (limitadas pela cota de cada modelo)')
+        parser.add_argument('--stale-minutes', type=int, default=15,
+                            help='Tarefas "executando" há mais tempo que isso voltam para a fila')
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        stale = timedelta(minutes=options['stale_minutes'])
+        self.stdout.write(f"🚀 Worker {worker_id} iniciado ({options['concurrency']} tarefas simultâneas).")
+
+        total = 0
+        try:
+            while True:
+                devolvidas = requeue_stale(stale)
+                if devolvidas:
+                    self.stdout.write(self.style.WARNING(f"⚠️ {devolvidas} tarefas presas devolvidas à fila."))
+                executadas = run_pending_concurrently(worker_id, options['concurrency'])
+                total += executadas
+                if executadas:
+                    self.stdout.write(f"  {executadas} tarefas processadas.")
+                if options['once']:
+                    break
+                if not executadas:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+
+        for linha in format_stats(get_generator().stats()):
+            self.stdout.write(f"  {linha}")
+        self.stdout.write(self.style.SUCCESS(f"✅ Worker encerrado: {total} tarefas processadas."))
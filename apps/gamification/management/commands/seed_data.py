@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from apps.gamification.models import Trail, Chapter, Medal
+from apps.gamification.taxonomy import auto_tag
 from django.contrib.auth import get_user_model
 
 class Command(BaseCommand):
@@ -72,4 +73,7 @@ class Command(BaseCommand):
             min_points=150
         )
 
+        # --- 3. TECNOLOGIAS (faixa da home e páginas tech_detail) ---
+        auto_tag()
+
         self.stdout.write(self.style.SUCCESS('🏁 Processo finalizado. Eralice já pode aceder como administradora!'))
\ No newline at end of file
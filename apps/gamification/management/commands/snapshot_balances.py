@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from apps.gamification.ledger import snapshot_chunk, snapshot_cutoff
+
+class Command(BaseCommand):
+    help = 'Grava snapshots de saldo do histórico de XP, em blocos (keyset)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--lag-minutes', type=int, default=10,
+            help='Ignora transações mais recentes que isso (podem ainda não estar confirmadas)'
+        )
+
+    def handle(self, *args, **options):
+        cutoff_id = snapshot_cutoff(timedelta(minutes=options['lag_minutes']))
+        if cutoff_id is None:
+            self.stdout.write("Nenhuma transação elegível para snapshot.")
+            return
+
+        User = get_user_model()
+        chunk_size = options['chunk_size']
+        last_id = 0
+        alunos = criados = 0
+        while True:
+            ids = list(
+                User.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            criados += snapshot_chunk(ids, cutoff_id)
+            alunos += len(ids)
+            self.stdout.write(f"... {alunos} alunos verificados ({criados} snapshots)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {criados} snapshots gravados até a transação #{cutoff_id}."
+        ))
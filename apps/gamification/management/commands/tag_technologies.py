@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from apps.gamification.taxonomy import auto_tag
+
+class Command(BaseCommand):
+    help = 'Marca trilhas e aulas com as tecnologias citadas nos títulos (palavras-chave de cada Technology)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Apenas relata os vínculos encontrados')
+
+    def handle(self, *args, **options):
+        report = auto_tag(dry_run=options['dry_run'])
+        for slug, (trilhas, aulas) in report.items():
+            self.stdout.write(f"  {slug}: {trilhas} trilhas, {aulas} aulas")
+
+        acao = "encontrados (dry-run, nada foi gravado)" if options['dry_run'] else "aplicados"
+        total = sum(t + a for t, a in report.values())
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} vínculos de tecnologia {acao}."))
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0012_questao_alternativa'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTrailProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_chapters', models.PositiveIntegerField(default=0, verbose_name='Capítulos Concluídos')),
+                ('total_chapters', models.PositiveIntegerField(default=0, verbose_name='Total de Capítulos')),
+                ('is_completed', models.BooleanField(default=False, verbose_name='Trilha Concluída')),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True, verbose_name='Última Atividade')),
+                ('trail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_progress', to='gamification.trail')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trail_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Progresso na Trilha',
+                'verbose_name_plural': 'Progressos nas Trilhas',
+                'indexes': [models.Index(fields=['user', 'is_completed'], name='gamificatio_user_id_b64c2a_idx')],
+                'unique_together': {('user', 'trail')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0013_usertrailprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='chapter',
+            name='content_html',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Conteúdo Renderizado'),
+        ),
+    ]
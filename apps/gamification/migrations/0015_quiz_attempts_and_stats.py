@@ -0,0 +1,75 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0014_chapter_content_html'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlternativaStats',
+            fields=[
+                ('alternativa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='gamification.alternativa')),
+                ('escolhas', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Estatística da Alternativa',
+                'verbose_name_plural': 'Estatísticas das Alternativas',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestaoStats',
+            fields=[
+                ('questao', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='gamification.questao')),
+                ('tentativas', models.PositiveIntegerField(default=0)),
+                ('acertos', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Estatística da Questão',
+                'verbose_name_plural': 'Estatísticas das Questões',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('acertos', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('percentual', models.PositiveSmallIntegerField(default=0)),
+                ('aprovado', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('chapter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_attempts', to='gamification.chapter')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_attempts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tentativa de Quiz',
+                'verbose_name_plural': 'Tentativas de Quiz',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('foi_correta', models.BooleanField(default=False)),
+                ('alternativa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='respostas', to='gamification.alternativa')),
+                ('questao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='respostas', to='gamification.questao')),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='respostas', to='gamification.quizattempt')),
+            ],
+            options={
+                'verbose_name': 'Resposta do Quiz',
+                'verbose_name_plural': 'Respostas do Quiz',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['user', 'chapter', '-created_at'], name='gamificatio_user_id_4bd618_idx'),
+        ),
+    ]
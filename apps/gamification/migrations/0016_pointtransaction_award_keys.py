@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0015_quiz_attempts_and_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pointtransaction',
+            name='award_type',
+            field=models.CharField(choices=[('manual', 'Lançamento Manual'), ('leitura', 'Leitura da Aula'), ('quiz', 'Aprovação no Quiz'), ('questao', 'Acerto de Questão'), ('conclusao', 'Conclusão (Legado)')], default='manual', max_length=20, verbose_name='Tipo de Premiação'),
+        ),
+        migrations.AddField(
+            model_name='pointtransaction',
+            name='chapter',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='point_transactions', to='gamification.chapter'),
+        ),
+        migrations.AddField(
+            model_name='pointtransaction',
+            name='questao',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='point_transactions', to='gamification.questao'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:48
+
+import re
+
+from django.db import migrations
+
+# Descrições gravadas pelas versões anteriores das views
+LEGACY_PATTERNS = [
+    ('leitura', re.compile(r'^Leitura: (?P<title>.+)$')),
+    ('quiz', re.compile(r'^Aprovação Quiz: (?P<title>.+)$')),
+    ('conclusao', re.compile(r'Conclusão: (?P<title>.+)$')),
+]
+
+
+# Prefixo "Aula NN - " (gravado nos títulos antigos e nas descrições): comparação sem ele
+TITLE_PREFIX = re.compile(r'^Aula \d+ - ')
+
+
+def _clean(title):
+    return TITLE_PREFIX.sub('', (title or '').strip())
+
+
+def parse_legacy_descriptions(apps, schema_editor):
+    """
+    Preenche award_type/chapter a partir das descrições antigas
+    ("Leitura: <aula>", "Aprovação Quiz: <aula>", "... Conclusão: <aula>").
+    Títulos repetidos em trilhas diferentes são resolvidos pelo progresso do
+    próprio aluno (a aula com esse título que ele concluiu); só continuam como
+    lançamento manual quando nem isso decide, ou quando o prêmio já existe.
+    Pode rodar de novo (migração 0032): só lê lançamentos ainda 'manual'.
+    """
+    Chapter = apps.get_model('gamification', 'Chapter')
+    PointTransaction = apps.get_model('gamification', 'PointTransaction')
+    UserProgress = apps.get_model('gamification', 'UserProgress')
+
+    chapters_by_title = {}
+    for chapter_id, title in Chapter.objects.values_list('id', 'title'):
+        chapters_by_title.setdefault(_clean(title), set()).add(chapter_id)
+
+    ambiguous_ids = set().union(*(ids for ids in chapters_by_title.values() if len(ids) > 1))
+    progress = {}
+    for user_id, chapter_id in UserProgress.objects.filter(chapter_id__in=ambiguous_ids).values_list('user_id', 'chapter_id'):
+        progress.setdefault(user_id, set()).add(chapter_id)
+
+    def resolve(user_id, title):
+        candidates = chapters_by_title.get(_clean(title), set())
+        if len(candidates) > 1:
+            candidates = candidates & progress.get(user_id, set())
+        return next(iter(candidates)) if len(candidates) == 1 else None
+
+    # Prêmios já chaveados (restrição única por aluno/tipo/aula)
+    seen = set(
+        PointTransaction.objects.filter(chapter__isnull=False, questao__isnull=True)
+        .exclude(award_type='manual')
+        .values_list('user_id', 'award_type', 'chapter_id')
+    )
+    batch = []
+    for tx in PointTransaction.objects.filter(award_type='manual').order_by('id').iterator(chunk_size=2000):
+        for award_type, pattern in LEGACY_PATTERNS:
+            match = pattern.search(tx.description or '')
+            if not match:
+                continue
+            chapter_id = resolve(tx.user_id, match.group('title'))
+            key = (tx.user_id, award_type, chapter_id)
+            if chapter_id is not None and key not in seen:
+                seen.add(key)
+                tx.award_type = award_type
+                tx.chapter_id = chapter_id
+                batch.append(tx)
+            break
+
+        if len(batch) >= 1000:
+            PointTransaction.objects.bulk_update(batch, ['award_type', 'chapter'])
+            batch = []
+
+    if batch:
+        PointTransaction.objects.bulk_update(batch, ['award_type', 'chapter'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0016_pointtransaction_award_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(parse_legacy_descriptions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0017_backfill_award_keys'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='pointtransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('chapter__isnull', False), ('questao__isnull', True)), fields=('user', 'award_type', 'chapter'), name='unique_chapter_award'),
+        ),
+        migrations.AddConstraint(
+            model_name='pointtransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('questao__isnull', False)), fields=('user', 'award_type', 'questao'), name='unique_questao_award'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0018_pointtransaction_award_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.IntegerField(verbose_name='Saldo')),
+                ('last_transaction_id', models.BigIntegerField(verbose_name='Última Transação Incluída')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Saldo',
+                'verbose_name_plural': 'Snapshots de Saldo',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pointtransaction',
+            index=models.Index(fields=['user', '-created_at'], name='gamificatio_user_id_b86e52_idx'),
+        ),
+        migrations.AddField(
+            model_name='balancesnapshot',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='balancesnapshot',
+            index=models.Index(fields=['user', '-last_transaction_id'], name='gamificatio_user_id_2c93e5_idx'),
+        ),
+    ]
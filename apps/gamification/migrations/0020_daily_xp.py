@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0019_balance_snapshots'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyXP',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Dia')),
+                ('xp', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_xp', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'XP Diário',
+                'verbose_name_plural': 'XP Diário',
+                'indexes': [models.Index(fields=['day'], name='gamificatio_day_f90c89_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='unique_daily_xp')],
+            },
+        ),
+    ]
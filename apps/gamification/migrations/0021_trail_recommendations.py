@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0020_daily_xp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrailRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Similaridade')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Posição')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gamification.trail')),
+                ('trail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='gamification.trail')),
+            ],
+            options={
+                'verbose_name': 'Recomendação de Trilha',
+                'verbose_name_plural': 'Recomendações de Trilhas',
+                'ordering': ['trail', 'rank'],
+                'unique_together': {('trail', 'recommended')},
+            },
+        ),
+    ]
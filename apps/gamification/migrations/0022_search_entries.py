@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0021_trail_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('trail', 'Trilha'), ('chapter', 'Aula'), ('questao', 'Questão')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True, default='')),
+                ('url', models.CharField(max_length=255)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Entrada de Busca',
+                'verbose_name_plural': 'Índice de Busca',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+    ]
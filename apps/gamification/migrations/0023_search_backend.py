@@ -0,0 +1,100 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:06
+
+import html
+
+from django.db import migrations
+from django.urls import reverse
+from django.utils.html import strip_tags
+
+TABLE = 'gamification_searchentry'
+FTS_TABLE = 'gamification_search_fts'
+
+SQLITE_FORWARD = [
+    # Índice FTS5 de conteúdo externo: o texto fica só em gamification_searchentry
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, body, content='{TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_FORWARD = [
+    # Coluna gerada: o banco mantém o vetor a cada INSERT/UPDATE
+    f"""ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('portuguese', coalesce(body, '')), 'B')
+    ) STORED""",
+    f"CREATE INDEX gamification_search_vector_idx ON {TABLE} USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS gamification_search_vector_idx",
+    f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_backend(apps, schema_editor):
+    # Entradas de uma aplicação anterior desta migração são recriadas abaixo
+    apps.get_model('gamification', 'SearchEntry').objects.all().delete()
+    _run(schema_editor, {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD})
+    populate_index(apps)
+
+
+def drop_search_backend(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD})
+
+
+def populate_index(apps):
+    # Mesma derivação de search.document_for, com os modelos históricos
+    SearchEntry = apps.get_model('gamification', 'SearchEntry')
+    Trail = apps.get_model('gamification', 'Trail')
+    Chapter = apps.get_model('gamification', 'Chapter')
+    Questao = apps.get_model('gamification', 'Questao')
+
+    entries = [
+        SearchEntry(kind='trail', object_id=t.id, title=t.title[:255], body=t.description or '',
+                    url=reverse('gamification:trail_detail', args=[t.id]))
+        for t in Trail.objects.all()
+    ]
+    entries += [
+        SearchEntry(kind='chapter', object_id=c.id, title=c.title[:255],
+                    body=html.unescape(strip_tags(c.content_html or c.content or '')),
+                    url=reverse('gamification:chapter_detail', args=[c.id]))
+        for c in Chapter.objects.all()
+    ]
+    entries += [
+        SearchEntry(kind='questao', object_id=q.id, title=q.enunciado[:255], body=q.enunciado,
+                    url=reverse('gamification:chapter_detail', args=[q.chapter_id]))
+        for q in Questao.objects.all()
+    ]
+    SearchEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0022_search_entries'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_backend, drop_search_backend),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0023_search_backend'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nome')),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('icon', models.CharField(default='fas fa-code', max_length=50, verbose_name='Ícone (FontAwesome)')),
+                ('keywords', models.CharField(blank=True, default='', help_text='Separadas por vírgula; usadas pelo comando tag_technologies.', max_length=255, verbose_name='Palavras-chave')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Ordem')),
+                ('chapters', models.ManyToManyField(blank=True, related_name='technologies', to='gamification.chapter')),
+                ('trails', models.ManyToManyField(blank=True, related_name='technologies', to='gamification.trail')),
+            ],
+            options={
+                'verbose_name': 'Tecnologia',
+                'verbose_name_plural': 'Tecnologias',
+                'ordering': ['order', 'name'],
+            },
+        ),
+    ]
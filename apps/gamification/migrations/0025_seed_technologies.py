@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:41
+
+from django.db import migrations
+
+# A lista que estava fixa em views.index (mesmos slugs das URLs já publicadas)
+TECHNOLOGIES = [
+    ('python', 'Python', 'fab fa-python', 'python,django,flask,pandas'),
+    ('docker', 'Docker', 'fab fa-docker', 'docker,container,containers,kubernetes'),
+    ('js', 'JavaScript', 'fab fa-js', 'javascript,js,node,react,typescript'),
+    ('database', 'Banco de Dados', 'fas fa-database', 'sql,banco de dados,database,postgresql,postgres,mysql,sqlite'),
+    ('git-alt', 'Git', 'fab fa-git-alt', 'git,github,versionamento'),
+    ('cloud', 'Cloud', 'fas fa-cloud', 'cloud,nuvem,aws,azure,gcp,deploy'),
+]
+
+
+def seed_technologies(apps, schema_editor):
+    Technology = apps.get_model('gamification', 'Technology')
+    for order, (slug, name, icon, keywords) in enumerate(TECHNOLOGIES, 1):
+        Technology.objects.get_or_create(
+            slug=slug, defaults={'name': name, 'icon': icon, 'keywords': keywords, 'order': order}
+        )
+
+
+def remove_technologies(apps, schema_editor):
+    Technology = apps.get_model('gamification', 'Technology')
+    Technology.objects.filter(slug__in=[slug for slug, _, _, _ in TECHNOLOGIES]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0024_technology'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_technologies, remove_technologies),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:05
+
+import re
+
+from django.db import migrations
+
+# O prefixo "Aula NN - " passa a ser calculado na exibição (Chapter.display_title)
+TITLE_PREFIX = re.compile(r'^Aula \d+ - ')
+
+
+def strip_prefixes(apps, schema_editor):
+    Chapter = apps.get_model('gamification', 'Chapter')
+    chapters = list(Chapter.objects.only('id', 'trail_id', 'title'))
+    taken = {(c.trail_id, c.title) for c in chapters}
+
+    changed = []
+    for chapter in chapters:
+        clean = TITLE_PREFIX.sub('', chapter.title)
+        if clean == chapter.title:
+            continue
+        # Título limpo já usado na trilha (unique_together): "Título (2)", "Título (3)"...
+        candidate, n = clean, 2
+        while (chapter.trail_id, candidate) in taken:
+            candidate = f"{clean} ({n})"[:200]
+            n += 1
+        taken.discard((chapter.trail_id, chapter.title))
+        taken.add((chapter.trail_id, candidate))
+        chapter.title = candidate
+        changed.append(chapter)
+    Chapter.objects.bulk_update(changed, ['title'], batch_size=500)
+
+
+def restore_prefixes(apps, schema_editor):
+    Chapter = apps.get_model('gamification', 'Chapter')
+    changed = []
+    for chapter in Chapter.objects.only('id', 'order', 'title'):
+        if not TITLE_PREFIX.match(chapter.title):
+            chapter.title = f"Aula {chapter.order:02d} - {chapter.title}"
+            changed.append(chapter)
+    Chapter.objects.bulk_update(changed, ['title'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0025_seed_technologies'),
+    ]
+
+    operations = [
+        migrations.RunPython(strip_prefixes, restore_prefixes),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0026_strip_chapter_title_prefix'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(choices=[('conteudo_aula', 'Gerar Texto da Aula (IA)'), ('questoes_aula', 'Gerar Questionário (IA)')], max_length=40, verbose_name='Tipo')),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('queued', 'Na Fila'), ('running', 'Executando'), ('done', 'Concluída'), ('failed', 'Falhou')], default='queued', max_length=10, verbose_name='Situação')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progresso (%)')),
+                ('progress_note', models.CharField(blank=True, default='', max_length=255, verbose_name='Etapa')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Máx. Tentativas')),
+                ('run_after', models.DateTimeField(verbose_name='Executar a partir de')),
+                ('locked_by', models.CharField(blank=True, default='', max_length=100, verbose_name='Worker')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizada em')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último Erro')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Resultado')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tarefa em Segundo Plano',
+                'verbose_name_plural': 'Tarefas em Segundo Plano',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='gamificatio_status_6d9e80_idx')],
+            },
+        ),
+    ]
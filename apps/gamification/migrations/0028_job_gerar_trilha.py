@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0027_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('conteudo_aula', 'Gerar Texto da Aula (IA)'), ('questoes_aula', 'Gerar Questionário (IA)'), ('gerar_trilha', 'Regenerar Trilha Inteira (IA)')], max_length=40, verbose_name='Tipo'),
+        ),
+    ]
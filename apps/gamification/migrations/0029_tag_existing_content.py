@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:10
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return text.lower()
+
+
+def tag_existing_content(apps, schema_editor):
+    """
+    Mesmo critério de taxonomy.auto_tag (palavras-chave nos títulos), com os
+    modelos históricos: sem isso a faixa de tecnologias e as páginas tech_detail
+    ficam vazias até alguém rodar tag_technologies.
+    """
+    Technology = apps.get_model('gamification', 'Technology')
+    Trail = apps.get_model('gamification', 'Trail')
+    Chapter = apps.get_model('gamification', 'Chapter')
+    Trails = Technology.trails.through
+    Chapters = Technology.chapters.through
+
+    trails = [(pk, _normalize(title)) for pk, title in Trail.objects.values_list('id', 'title')]
+    chapters = [(pk, _normalize(title)) for pk, title in Chapter.objects.values_list('id', 'title')]
+    trail_links, chapter_links = [], []
+    for tech in Technology.objects.all():
+        keywords = [_normalize(k.strip()) for k in tech.keywords.split(',') if k.strip()] or [_normalize(tech.name)]
+        pattern = re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in keywords) + r')\b')
+        trail_links += [Trails(technology_id=tech.id, trail_id=pk) for pk, title in trails if pattern.search(title)]
+        chapter_links += [Chapters(technology_id=tech.id, chapter_id=pk) for pk, title in chapters if pattern.search(title)]
+
+    Trails.objects.bulk_create(trail_links, ignore_conflicts=True, batch_size=1000)
+    Chapters.objects.bulk_create(chapter_links, ignore_conflicts=True, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0028_job_gerar_trilha'),
+    ]
+
+    operations = [
+        # Os vínculos podem ter sido editados à mão depois: a volta não remove nada
+        migrations.RunPython(tag_existing_content, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:40
+
+from django.db import migrations
+
+TABLE = 'gamification_searchentry'
+CONFIG = 'gamification_pt'
+
+
+def _vector_column(config):
+    return [
+        "DROP INDEX IF EXISTS gamification_search_vector_idx",
+        f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector",
+        f"""ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('{config}', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('{config}', coalesce(body, '')), 'B')
+        ) STORED""",
+        f"CREATE INDEX gamification_search_vector_idx ON {TABLE} USING GIN (search_vector)",
+    ]
+
+
+POSTGRES_FORWARD = [
+    # Português sem acentos (como o remove_diacritics do FTS5): "funcao" encontra "função".
+    # unaccent é extensão confiável (PG 13+): o dono do banco pode criá-la.
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"CREATE TEXT SEARCH CONFIGURATION {CONFIG} (COPY = portuguese)",
+    f"ALTER TEXT SEARCH CONFIGURATION {CONFIG} ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem",
+    *_vector_column(CONFIG),
+]
+POSTGRES_BACKWARD = [
+    *_vector_column('portuguese'),
+    f"DROP TEXT SEARCH CONFIGURATION IF EXISTS {CONFIG}",
+]
+
+
+def forward(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_FORWARD:
+            schema_editor.execute(statement)
+
+
+def backward(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_BACKWARD:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0029_tag_existing_content'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-18 21:00
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def backfill_trail_progress(apps, schema_editor):
+    """
+    Mesma regra de progress.rebuild_trail_progress, com os modelos históricos:
+    alunos com progresso anterior à tabela desnormalizada passam a ter a
+    contagem real (e as linhas já erradas são corrigidas).
+    """
+    Chapter = apps.get_model('gamification', 'Chapter')
+    UserProgress = apps.get_model('gamification', 'UserProgress')
+    UserTrailProgress = apps.get_model('gamification', 'UserTrailProgress')
+
+    totals = dict(Chapter.objects.values_list('trail_id').annotate(n=Count('id')))
+    done = {
+        (user_id, trail_id): (completed, last)
+        for user_id, trail_id, completed, last in UserProgress.objects
+        .values_list('user_id', 'chapter__trail_id')
+        .annotate(n=Count('id'), last=Max('updated_at'))
+    }
+    existing = {(row.user_id, row.trail_id): row for row in UserTrailProgress.objects.all()}
+
+    to_create, to_update = [], []
+    for key in done.keys() | existing.keys():
+        user_id, trail_id = key
+        completed, last = done.get(key, (0, None))
+        row = existing.get(key)
+        if row is None:
+            row = UserTrailProgress(user_id=user_id, trail_id=trail_id)
+            to_create.append(row)
+        else:
+            to_update.append(row)
+        row.completed_chapters = completed
+        row.total_chapters = totals.get(trail_id, 0)
+        row.is_completed = row.total_chapters > 0 and completed >= row.total_chapters
+        if last is not None:
+            row.last_activity_at = last
+
+    UserTrailProgress.objects.bulk_create(to_create, batch_size=1000)
+    UserTrailProgress.objects.bulk_update(
+        to_update, ['completed_chapters', 'total_chapters', 'is_completed', 'last_activity_at'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0030_search_unaccent'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_trail_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 21:20
+
+from importlib import import_module
+
+from django.db import migrations
+
+# Bancos que já aplicaram a 0017 deixaram de fora títulos repetidos entre trilhas;
+# a versão atual resolve esses casos pelo progresso do aluno
+backfill = import_module('apps.gamification.migrations.0017_backfill_award_keys')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0031_backfill_trail_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill.parse_legacy_descriptions, migrations.RunPython.noop),
+    ]
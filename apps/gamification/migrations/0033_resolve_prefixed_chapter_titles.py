@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 21:40
+
+from importlib import import_module
+
+from django.db import migrations
+
+# Bancos que já aplicaram a 0026 mantiveram o prefixo nos títulos que colidiam;
+# a versão atual renomeia com sufixo " (2)"
+strip = import_module('apps.gamification.migrations.0026_strip_chapter_title_prefix')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0032_rerun_award_key_backfill'),
+    ]
+
+    operations = [
+        migrations.RunPython(strip.strip_prefixes, migrations.RunPython.noop),
+    ]
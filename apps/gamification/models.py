@@ -2,6 +2,10 @@ import re
 from django.db import models
 from django.conf import settings
 from django.utils.text import slugify
+from .rendering import refresh_rendered_content
+
+# Prefixo de exibição das aulas ("Aula 01 - "), calculado a partir de `order`
+TITLE_PREFIX = re.compile(r'^Aula \d+ - ')
 
 class TimestampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -20,14 +24,87 @@ class Medal(models.Model):
         return self.name
 
 class PointTransaction(models.Model):
+    class AwardType(models.TextChoices):
+        MANUAL = 'manual', 'Lançamento Manual'
+        LEITURA = 'leitura', 'Leitura da Aula'
+        QUIZ = 'quiz', 'Aprovação no Quiz'
+        QUESTAO = 'questao', 'Acerto de Questão'
+        # Registros antigos "Conclusão: <aula>" valiam pela leitura e pelo quiz
+        CONCLUSAO = 'conclusao', 'Conclusão (Legado)'
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='transactions')
     quantity = models.IntegerField(verbose_name="Quantidade de Pontos")
     description = models.CharField(max_length=255, verbose_name="Motivo do Ganho")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # --- CHAVE ESTRUTURADA DA PREMIAÇÃO (idempotência por índice único) ---
+    award_type = models.CharField(
+        max_length=20, choices=AwardType.choices, default=AwardType.MANUAL, verbose_name="Tipo de Premiação"
+    )
+    chapter = models.ForeignKey(
+        'Chapter', on_delete=models.SET_NULL, null=True, blank=True, related_name='point_transactions'
+    )
+    questao = models.ForeignKey(
+        'Questao', on_delete=models.SET_NULL, null=True, blank=True, related_name='point_transactions'
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=['user', '-created_at'])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'award_type', 'chapter'],
+                condition=models.Q(chapter__isnull=False, questao__isnull=True),
+                name='unique_chapter_award',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'award_type', 'questao'],
+                condition=models.Q(questao__isnull=False),
+                name='unique_questao_award',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username}: {self.quantity} pontos"
 
+class DailyXP(models.Model):
+    """
+    Rollup do histórico: XP ganho por aluno em cada dia (fuso do projeto).
+    Mantido a cada transação; alimenta os rankings da semana/mês/temporada.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_xp')
+    day = models.DateField(verbose_name="Dia")
+    xp = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='unique_daily_xp'),
+        ]
+        indexes = [models.Index(fields=['day'])]
+        verbose_name = "XP Diário"
+        verbose_name_plural = "XP Diário"
+
+    def __str__(self):
+        return f"{self.user_id} em {self.day}: {self.xp} XP"
+
+class BalanceSnapshot(models.Model):
+    """
+    Saldo acumulado do aluno até uma transação (inclusive).
+    Consultas de saldo somam apenas o histórico posterior ao último snapshot,
+    e as transações cobertas podem ser arquivadas fora do banco.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='balance_snapshots')
+    balance = models.IntegerField(verbose_name="Saldo")
+    last_transaction_id = models.BigIntegerField(verbose_name="Última Transação Incluída")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', '-last_transaction_id'])]
+        verbose_name = "Snapshot de Saldo"
+        verbose_name_plural = "Snapshots de Saldo"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.balance} XP até #{self.last_transaction_id}"
+
 class Trail(TimestampedModel):
     title = models.CharField(max_length=200, verbose_name="Título da Trilha")
     slug = models.SlugField(max_length=200, unique=True, null=True, blank=True)
@@ -50,6 +127,9 @@ class Chapter(TimestampedModel):
     slug = models.SlugField(max_length=200, unique=True, null=True, blank=True)
     video_url = models.URLField(max_length=500, blank=True, null=True, verbose_name="URL da Vídeo Aula")
     content = models.TextField(blank=True, null=True, verbose_name="Conteúdo Markdown")
+    # Cache do HTML renderizado, versionado pelo hash do conteúdo (ver rendering.py)
+    content_html = models.TextField(blank=True, default='', editable=False, verbose_name="Conteúdo Renderizado")
+    content_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
     xp_value = models.PositiveIntegerField(default=50, verbose_name="Valor em XP")
     order = models.PositiveIntegerField(default=0, verbose_name="Ordem")
     
@@ -65,14 +145,22 @@ class Chapter(TimestampedModel):
         match = re.search(regex, self.video_url)
         return match.group(1) if match else None
 
+    @property
+    def display_title(self):
+        # O prefixo "Aula NN - " segue a ordem atual e não é gravado no título
+        return f"Aula {self.order:02d} - {self.title}"
+
     def save(self, *args, **kwargs):
-        # Evita duplicar "Aula 01 - Aula 01" ao salvar múltiplas vezes
-        if not self.pk:
-            if self.order == 0:
-                self.order = Chapter.objects.filter(trail=self.trail).count() + 1
-            
-            clean_title = self.title.replace(f"Aula {self.order:02d} - ", "")
-            self.title = f"Aula {self.order:02d} - {clean_title}"
+        if not self.pk and self.order == 0:
+            self.order = Chapter.objects.filter(trail=self.trail).count() + 1
+
+        # Títulos chegam às vezes com o prefixo de exibição (ex.: copiados da página);
+        # só é removido se o título limpo estiver livre na trilha (unique_together)
+        clean = TITLE_PREFIX.sub('', self.title)
+        if clean != self.title and not (
+            Chapter.objects.filter(trail_id=self.trail_id, title=clean).exclude(pk=self.pk).exists()
+        ):
+            self.title = clean
 
         if not self.slug:
             self.slug = slugify(self.title)
@@ -87,6 +175,12 @@ class Chapter(TimestampedModel):
                 self.slug = f"{original_slug}-{counter}"
                 counter += 1
 
+        # Renderiza o Markdown apenas quando o conteúdo (ou o renderizador) mudou
+        if refresh_rendered_content(self):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'content_html', 'content_hash'}
+
         super().save(*args, **kwargs)
 
     class Meta:
@@ -96,29 +190,17 @@ class Chapter(TimestampedModel):
         verbose_name_plural = "Capítulos"
 
     def __str__(self):
-        return f"{self.trail.title} - {self.title}"
+        return f"{self.trail.title} - {self.display_title}"
     
     # Dentro da classe Chapter
     def is_unlocked(self, user):
         """
         Verifica se este capítulo está desbloqueado para um utilizador específico.
+        Para vários capítulos da mesma trilha, prefira `progress.resolve_chapter_states`.
         """
-        # Se for a primeira aula (order=1), está sempre desbloqueada
-        if self.order <= 1:
-            return True
-        
-        # Busca o capítulo anterior na mesma trilha
-        previous_chapter = Chapter.objects.filter(
-            trail=self.trail, 
-            order__lt=self.order
-        ).order_by('-order').first()
-
-        if not previous_chapter:
-            return True # Fallback caso não encontre o anterior
-
-        # Verifica se existe progresso registado para o capítulo anterior
-        from .models import UserProgress # Import local para evitar importação circular
-        return UserProgress.objects.filter(user=user, chapter=previous_chapter).exists()
+        from .progress import resolve_chapter_states # Import local para evitar importação circular
+        state = resolve_chapter_states(user, self.trail_id).get(self.id)
+        return state.unlocked if state else True
 
 class UserProgress(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -131,8 +213,110 @@ class UserProgress(models.Model):
         ordering = ['-updated_at'] 
         verbose_name = "Progresso do Aluno"
         verbose_name_plural = "Progressos dos Alunos"
+
+
+class UserTrailProgress(models.Model):
+    """
+    Progresso desnormalizado do aluno por trilha.
+    Mantido incrementalmente pelos signals de UserProgress e Chapter, para que
+    qualquer percentual de conclusão seja uma única leitura indexada.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='trail_progress')
+    trail = models.ForeignKey(Trail, on_delete=models.CASCADE, related_name='user_progress')
+    completed_chapters = models.PositiveIntegerField(default=0, verbose_name="Capítulos Concluídos")
+    total_chapters = models.PositiveIntegerField(default=0, verbose_name="Total de Capítulos")
+    is_completed = models.BooleanField(default=False, verbose_name="Trilha Concluída")
+    last_activity_at = models.DateTimeField(null=True, blank=True, verbose_name="Última Atividade")
+
+    class Meta:
+        unique_together = ('user', 'trail')
+        indexes = [models.Index(fields=['user', 'is_completed'])]
+        verbose_name = "Progresso na Trilha"
+        verbose_name_plural = "Progressos nas Trilhas"
+
+    @property
+    def percent(self):
+        if not self.total_chapters:
+            return 0
+        return int(min(self.completed_chapters, self.total_chapters) / self.total_chapters * 100)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.trail.title}: {self.completed_chapters}/{self.total_chapters}"
         
         
+class Technology(models.Model):
+    """
+    Tecnologia da taxonomia do catálogo (ex.: Python, Docker).
+    As tabelas M2M com Trail e Chapter são indexadas pelos dois lados;
+    as contagens ficam em cache (ver taxonomy.py).
+    """
+    name = models.CharField(max_length=100, verbose_name="Nome")
+    slug = models.SlugField(max_length=100, unique=True)
+    icon = models.CharField(max_length=50, default='fas fa-code', verbose_name="Ícone (FontAwesome)")
+    keywords = models.CharField(
+        max_length=255, blank=True, default='', verbose_name="Palavras-chave",
+        help_text="Separadas por vírgula; usadas pelo comando tag_technologies."
+    )
+    order = models.PositiveIntegerField(default=0, verbose_name="Ordem")
+    trails = models.ManyToManyField(Trail, blank=True, related_name='technologies')
+    chapters = models.ManyToManyField('Chapter', blank=True, related_name='technologies')
+
+    class Meta:
+        ordering = ['order', 'name']
+        verbose_name = "Tecnologia"
+        verbose_name_plural = "Tecnologias"
+
+    def __str__(self):
+        return self.name
+
+
+class TrailRecommendation(models.Model):
+    """
+    Vizinhos de cada trilha por co-ocorrência ("quem começou X também começou Y"),
+    calculados offline pelo comando build_recommendations.
+    """
+    trail = models.ForeignKey(Trail, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Trail, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(verbose_name="Similaridade")
+    rank = models.PositiveSmallIntegerField(verbose_name="Posição")
+
+    class Meta:
+        ordering = ['trail', 'rank']
+        unique_together = ('trail', 'recommended')
+        verbose_name = "Recomendação de Trilha"
+        verbose_name_plural = "Recomendações de Trilhas"
+
+    def __str__(self):
+        return f"{self.trail_id} -> {self.recommended_id} ({self.score:.2f})"
+
+
+class SearchEntry(models.Model):
+    """
+    Documento do índice de busca (trilhas, capítulos e questões), em texto puro.
+    O índice full-text fica fora do ORM: tabela FTS5 no SQLite ou coluna
+    tsvector + GIN no PostgreSQL (ver migração e search.py).
+    """
+    class Kind(models.TextChoices):
+        TRAIL = 'trail', 'Trilha'
+        CHAPTER = 'chapter', 'Aula'
+        QUESTAO = 'questao', 'Questão'
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default='')
+    url = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        verbose_name = "Entrada de Busca"
+        verbose_name_plural = "Índice de Busca"
+
+    def __str__(self):
+        return f"[{self.kind}] {self.title}"
+
+
 class UserMedal(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='earned_medals')
     medal = models.ForeignKey(Medal, on_delete=models.CASCADE)
@@ -170,4 +354,99 @@ class Alternativa(models.Model):
         verbose_name_plural = "Alternativas"
 
     def __str__(self):
-        return self.texto
\ No newline at end of file
+        return self.texto
+
+class QuizAttempt(models.Model):
+    """Registro de cada submissão de quiz (aprovada ou não)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='quiz_attempts')
+    chapter = models.ForeignKey(Chapter, on_delete=models.CASCADE, related_name='quiz_attempts')
+    acertos = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    percentual = models.PositiveSmallIntegerField(default=0)
+    aprovado = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['user', 'chapter', '-created_at'])]
+        verbose_name = "Tentativa de Quiz"
+        verbose_name_plural = "Tentativas de Quiz"
+
+    def __str__(self):
+        return f"{self.user.username} - {self.chapter.title}: {self.acertos}/{self.total}"
+
+class QuizAnswer(models.Model):
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='respostas')
+    questao = models.ForeignKey(Questao, on_delete=models.CASCADE, related_name='respostas')
+    alternativa = models.ForeignKey(Alternativa, on_delete=models.SET_NULL, null=True, blank=True, related_name='respostas')
+    foi_correta = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = "Resposta do Quiz"
+        verbose_name_plural = "Respostas do Quiz"
+
+class QuestaoStats(models.Model):
+    """Contadores incrementais por questão (evita varrer o log de tentativas)."""
+    questao = models.OneToOneField(Questao, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    tentativas = models.PositiveIntegerField(default=0)
+    acertos = models.PositiveIntegerField(default=0)
+
+    @property
+    def taxa_acerto(self):
+        return round(self.acertos / self.tentativas * 100, 1) if self.tentativas else 0
+
+    class Meta:
+        verbose_name = "Estatística da Questão"
+        verbose_name_plural = "Estatísticas das Questões"
+
+class AlternativaStats(models.Model):
+    alternativa = models.OneToOneField(Alternativa, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    escolhas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Estatística da Alternativa"
+        verbose_name_plural = "Estatísticas das Alternativas"
+
+class Job(TimestampedModel):
+    """
+    Tarefa em segundo plano (fila no próprio banco), executada pelo worker
+    `python manage.py run_jobs`. Falhas voltam para a fila com backoff até
+    `max_attempts`; depois disso a tarefa fica como falha.
+    """
+    class Kind(models.TextChoices):
+        CONTEUDO_AULA = 'conteudo_aula', 'Gerar Texto da Aula (IA)'
+        QUESTOES_AULA = 'questoes_aula', 'Gerar Questionário (IA)'
+        GERAR_TRILHA = 'gerar_trilha', 'Regenerar Trilha Inteira (IA)'
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Na Fila'
+        RUNNING = 'running', 'Executando'
+        DONE = 'done', 'Concluída'
+        FAILED = 'failed', 'Falhou'
+
+    kind = models.CharField(max_length=40, choices=Kind.choices, verbose_name="Tipo")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED, verbose_name="Situação")
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="Progresso (%)")
+    progress_note = models.CharField(max_length=255, blank=True, default='', verbose_name="Etapa")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name="Máx. Tentativas")
+    run_after = models.DateTimeField(verbose_name="Executar a partir de")
+    locked_by = models.CharField(max_length=100, blank=True, default='', verbose_name="Worker")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finalizada em")
+    last_error = models.TextField(blank=True, default='', verbose_name="Último Erro")
+    result = models.JSONField(null=True, blank=True, verbose_name="Resultado")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs'
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        # O worker busca "na fila e já liberadas" em ordem de run_after
+        indexes = [models.Index(fields=['status', 'run_after'])]
+        verbose_name = "Tarefa em Segundo Plano"
+        verbose_name_plural = "Tarefas em Segundo Plano"
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_kind_display()} ({self.get_status_display()})"
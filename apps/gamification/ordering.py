@@ -0,0 +1,39 @@
+# apps/gamification/ordering.py
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_content_version
+from .models import Chapter
+from .search import index_many
+
+
+def reorder_chapters(trail_id, chapter_ids):
+    """
+    Aplica uma nova ordem completa às aulas da trilha (posição 1..n na ordem
+    de `chapter_ids`) com um único bulk_update. Como o título não carrega mais
+    o prefixo "Aula NN - ", trocar a ordem não esbarra no unique (trail, title).
+
+    O bulk_update não dispara signals: o índice de busca (que guarda o título
+    de exibição) e a versão do conteúdo são atualizados aqui.
+    Retorna o nº de aulas que mudaram de posição.
+    """
+    chapter_ids = [int(pk) for pk in chapter_ids]
+    with transaction.atomic():
+        chapters = Chapter.objects.select_for_update().filter(trail_id=trail_id).in_bulk()
+        if sorted(chapter_ids) != sorted(chapters):
+            raise ValueError("A nova ordem deve listar cada aula da trilha exatamente uma vez.")
+
+        now = timezone.now()
+        changed = []
+        for position, pk in enumerate(chapter_ids, 1):
+            chapter = chapters[pk]
+            if chapter.order != position:
+                chapter.order = position
+                chapter.updated_at = now
+                changed.append(chapter)
+
+        if changed:
+            Chapter.objects.bulk_update(changed, ['order', 'updated_at'], batch_size=500)
+            index_many(changed)
+            transaction.on_commit(bump_content_version)
+    return len(changed)
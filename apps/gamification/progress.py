@@ -0,0 +1,171 @@
+# apps/gamification/progress.py
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Chapter, UserProgress, UserTrailProgress
+
+
+@dataclass(frozen=True)
+class ChapterState:
+    """Situação de um capítulo para um aluno: concluído e/ou desbloqueado."""
+    is_completed: bool
+    unlocked: bool
+
+
+def resolve_chapter_states(user, trail, chapters=None):
+    """
+    Resolve em lote o estado de todos os capítulos de uma trilha.
+
+    Substitui as chamadas repetidas a `Chapter.is_unlocked` (duas consultas por
+    capítulo) por no máximo duas consultas para a trilha inteira:
+    1. Capítulos da trilha (dispensada se `chapters` já foi carregado pela view);
+    2. IDs dos capítulos com progresso registrado pelo aluno.
+
+    Retorna um dicionário {chapter_id: ChapterState}.
+    """
+    if chapters is None:
+        chapters = Chapter.objects.filter(trail=trail).only('id', 'order')
+
+    ordered = sorted(chapters, key=lambda c: (c.order, c.id))
+    if not ordered:
+        return {}
+
+    completed_ids = set(
+        UserProgress.objects.filter(
+            user=user,
+            chapter_id__in=[c.id for c in ordered]
+        ).values_list('chapter_id', flat=True)
+    )
+
+    # Mesma regra de `Chapter.is_unlocked`: a primeira aula é livre e as
+    # demais dependem do progresso no capítulo imediatamente anterior.
+    states = {}
+    previous = None
+    for index, chapter in enumerate(ordered):
+        if previous is None or chapter.order <= 1:
+            unlocked = True
+        else:
+            unlocked = previous.id in completed_ids
+        states[chapter.id] = ChapterState(
+            is_completed=chapter.id in completed_ids,
+            unlocked=unlocked,
+        )
+        # Capítulos com a mesma ordem compartilham o mesmo "anterior"
+        next_chapter = ordered[index + 1] if index + 1 < len(ordered) else None
+        if next_chapter is None or next_chapter.order != chapter.order:
+            previous = chapter
+
+    return states
+
+
+# --- PROGRESSO DESNORMALIZADO POR TRILHA (UserTrailProgress) ---
+
+def apply_progress_delta(user_id, trail_id, delta):
+    """
+    Ajusta o contador de capítulos concluídos de um aluno em uma trilha.
+    Chamado pelos signals de UserProgress (+1 ao criar, 0 para apenas
+    registrar atividade). A linha é travada durante a atualização.
+    Uma linha nova parte da contagem real de UserProgress (que já inclui
+    a conclusão atual), para alunos com progresso anterior a esta tabela.
+    """
+    with transaction.atomic():
+        row, created = UserTrailProgress.objects.select_for_update().get_or_create(
+            user_id=user_id,
+            trail_id=trail_id,
+            defaults={'total_chapters': Chapter.objects.filter(trail_id=trail_id).count()}
+        )
+        if created:
+            row.completed_chapters = UserProgress.objects.filter(
+                user_id=user_id, chapter__trail_id=trail_id
+            ).count()
+        else:
+            row.completed_chapters = max(row.completed_chapters + delta, 0)
+        row.is_completed = row.total_chapters > 0 and row.completed_chapters >= row.total_chapters
+        row.last_activity_at = timezone.now()
+        row.save(update_fields=['completed_chapters', 'is_completed', 'last_activity_at'])
+    return row
+
+
+def remove_progress(user_id, trail_id):
+    """
+    -1 no contador ao apagar um UserProgress. Só atualiza linhas existentes:
+    em exclusões em cascata (aluno ou trilha) o pai está sendo apagado e
+    recriar a linha quebraria a chave estrangeira no commit.
+    """
+    with transaction.atomic():
+        rows = UserTrailProgress.objects.filter(user_id=user_id, trail_id=trail_id)
+        rows.update(completed_chapters=Greatest(F('completed_chapters') - 1, 0), last_activity_at=timezone.now())
+        rows.filter(completed_chapters__lt=F('total_chapters')).update(is_completed=False)
+
+
+def refresh_trail_totals(trail_id):
+    """
+    Atualiza o total de capítulos de todas as linhas da trilha após uma
+    mudança no conjunto de capítulos (criação, exclusão ou troca de trilha).
+    """
+    total = Chapter.objects.filter(trail_id=trail_id).count()
+    with transaction.atomic():
+        rows = UserTrailProgress.objects.filter(trail_id=trail_id)
+        rows.update(total_chapters=total, is_completed=False)
+        if total > 0:
+            rows.filter(completed_chapters__gte=total).update(is_completed=True)
+
+
+def rebuild_trail_progress(trail_ids, create=True):
+    """
+    Recalcula do zero as linhas de UserTrailProgress das trilhas informadas a
+    partir de UserProgress, com consultas agrupadas (usado no backfill e
+    quando capítulos mudam de trilha). Com `create=False` (exclusões) só as
+    linhas existentes são atualizadas.
+    """
+    trail_ids = list(trail_ids)
+    totals = dict(
+        Chapter.objects.filter(trail_id__in=trail_ids)
+        .values_list('trail_id')
+        .annotate(n=Count('id'))
+    )
+    done = (
+        UserProgress.objects.filter(chapter__trail_id__in=trail_ids)
+        .values_list('user_id', 'chapter__trail_id')
+        .annotate(n=Count('id'), last=Max('updated_at'))
+    )
+
+    with transaction.atomic():
+        existing = {
+            (row.user_id, row.trail_id): row
+            for row in UserTrailProgress.objects.select_for_update().filter(trail_id__in=trail_ids)
+        }
+        to_create, to_update = [], []
+        for user_id, trail_id, completed, last_activity in done:
+            total = totals.get(trail_id, 0)
+            row = existing.pop((user_id, trail_id), None)
+            if row is None:
+                if not create:
+                    continue
+                row = UserTrailProgress(user_id=user_id, trail_id=trail_id)
+                to_create.append(row)
+            else:
+                to_update.append(row)
+            row.completed_chapters = completed
+            row.total_chapters = total
+            row.is_completed = total > 0 and completed >= total
+            row.last_activity_at = last_activity
+
+        # Linhas sem nenhum progresso restante voltam a zero
+        for row in existing.values():
+            row.completed_chapters = 0
+            row.total_chapters = totals.get(row.trail_id, 0)
+            row.is_completed = False
+            to_update.append(row)
+
+        UserTrailProgress.objects.bulk_create(to_create, batch_size=1000)
+        UserTrailProgress.objects.bulk_update(
+            to_update,
+            ['completed_chapters', 'total_chapters', 'is_completed', 'last_activity_at'],
+            batch_size=1000
+        )
+    return len(to_create), len(to_update)
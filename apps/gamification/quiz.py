@@ -0,0 +1,212 @@
+# apps/gamification/quiz.py
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Questao, Alternativa, QuizAttempt, QuizAnswer, QuestaoStats, AlternativaStats
+
+ANSWER_KEY_CACHE_KEY = 'gamification:answer_key:{chapter_id}'
+
+# Percentual mínimo de acertos para aprovação no quiz
+APPROVAL_PERCENT = 70
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """
+    Gabarito compilado de um capítulo: tudo que a correção precisa, em memória.
+    - questions: [(questao_id, enunciado)] na ordem de exibição
+    - correct: {questao_id: frozenset(ids das alternativas corretas)}
+    - correct_text: {questao_id: texto da (primeira) alternativa correta}
+    - choices: {alternativa_id: (questao_id, texto)}
+    """
+    questions: tuple
+    correct: dict
+    correct_text: dict
+    choices: dict
+
+
+@dataclass
+class QuizResult:
+    acertos: int
+    total: int
+    percentual: float
+    aprovado: bool
+    detalhes: list = field(default_factory=list)
+    # [(questao_id, alternativa_id ou None, foi_correta)] para registro das tentativas
+    respostas: list = field(default_factory=list)
+
+
+def build_answer_key(chapter_id):
+    """Compila o gabarito com duas consultas (questões + alternativas)."""
+    questoes = Questao.objects.filter(chapter_id=chapter_id).order_by('id').prefetch_related('alternativas')
+
+    questions, correct, correct_text, choices = [], {}, {}, {}
+    for q in questoes:
+        questions.append((q.id, q.enunciado))
+        corretas = []
+        for alt in sorted(q.alternativas.all(), key=lambda a: a.id):
+            choices[alt.id] = (q.id, alt.texto)
+            if alt.e_correta:
+                corretas.append(alt)
+        correct[q.id] = frozenset(a.id for a in corretas)
+        correct_text[q.id] = corretas[0].texto if corretas else None
+
+    return AnswerKey(tuple(questions), correct, correct_text, choices)
+
+
+def get_answer_key(chapter_id):
+    """Gabarito do capítulo a partir do cache (reconstruído sob demanda)."""
+    key = ANSWER_KEY_CACHE_KEY.format(chapter_id=chapter_id)
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = build_answer_key(chapter_id)
+        cache.set(key, answer_key, settings.REFERENCE_CACHE_TIMEOUT)
+    return answer_key
+
+
+def invalidate_answer_key(chapter_id):
+    cache.delete(ANSWER_KEY_CACHE_KEY.format(chapter_id=chapter_id))
+
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def grade_submission(answer_key, data):
+    """
+    Corrige uma submissão inteira em memória, sem consultas ao banco.
+    `data` é o request.POST (campos `questao_<id>` com o id da alternativa).
+    Alternativas de outra questão contam como erro.
+    """
+    acertos = 0
+    detalhes, respostas = [], []
+
+    for questao_id, enunciado in answer_key.questions:
+        alt_id = _parse_id(data.get(f'questao_{questao_id}'))
+        escolha = answer_key.choices.get(alt_id)
+        if escolha is not None and escolha[0] != questao_id:
+            escolha, alt_id = None, None
+        elif escolha is None:
+            alt_id = None
+
+        is_correct = alt_id in answer_key.correct[questao_id]
+        if is_correct:
+            acertos += 1
+
+        respostas.append((questao_id, alt_id, is_correct))
+        detalhes.append({
+            'pergunta': enunciado,
+            'escolha': escolha[1] if escolha else "Não respondida",
+            'correta': answer_key.correct_text[questao_id] or "N/A",
+            'foi_correta': is_correct
+        })
+
+    total = len(answer_key.questions)
+    percentual = (acertos / total * 100) if total > 0 else 0
+    return QuizResult(
+        acertos=acertos,
+        total=total,
+        percentual=percentual,
+        aprovado=percentual >= APPROVAL_PERCENT,
+        detalhes=detalhes,
+        respostas=respostas,
+    )
+
+
+# --- REGISTRO DE TENTATIVAS E ESTATÍSTICAS ---
+
+def record_attempt(user, chapter_id, resultado):
+    """
+    Grava a tentativa e suas respostas em lote e atualiza os contadores por
+    questão/alternativa. Número de consultas constante, independente do
+    tamanho do quiz.
+    """
+    respostas = resultado.respostas
+    questao_ids = [questao_id for questao_id, _, _ in respostas]
+    corretas = [questao_id for questao_id, _, foi_correta in respostas if foi_correta]
+    escolhidas = [alt_id for _, alt_id, _ in respostas if alt_id is not None]
+
+    with transaction.atomic():
+        attempt = QuizAttempt.objects.create(
+            user=user,
+            chapter_id=chapter_id,
+            acertos=resultado.acertos,
+            total=resultado.total,
+            percentual=int(resultado.percentual),
+            aprovado=resultado.aprovado,
+        )
+        QuizAnswer.objects.bulk_create([
+            QuizAnswer(attempt=attempt, questao_id=questao_id, alternativa_id=alt_id, foi_correta=foi_correta)
+            for questao_id, alt_id, foi_correta in respostas
+        ])
+
+        if questao_ids:
+            QuestaoStats.objects.bulk_create(
+                [QuestaoStats(questao_id=questao_id) for questao_id in questao_ids],
+                ignore_conflicts=True
+            )
+            QuestaoStats.objects.filter(questao_id__in=questao_ids).update(
+                tentativas=F('tentativas') + 1,
+                acertos=F('acertos') + Case(
+                    When(questao_id__in=corretas, then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ),
+            )
+        if escolhidas:
+            AlternativaStats.objects.bulk_create(
+                [AlternativaStats(alternativa_id=alt_id) for alt_id in escolhidas],
+                ignore_conflicts=True
+            )
+            AlternativaStats.objects.filter(alternativa_id__in=escolhidas).update(
+                escolhas=F('escolhas') + 1
+            )
+    return attempt
+
+
+def chapter_statistics(chapter_id):
+    """
+    Estatísticas do quiz de um capítulo para o instrutor, lidas apenas dos
+    contadores pré-calculados (duas consultas).
+    Retorna [{'enunciado', 'tentativas', 'taxa_acerto', 'alternativas': [...]}].
+    """
+    questoes = (
+        Questao.objects.filter(chapter_id=chapter_id)
+        .select_related('stats')
+        .order_by('id')
+    )
+    alternativas = (
+        Alternativa.objects.filter(questao__chapter_id=chapter_id)
+        .select_related('stats')
+        .order_by('id')
+    )
+
+    por_questao = {}
+    for alt in alternativas:
+        escolhas = alt.stats.escolhas if hasattr(alt, 'stats') else 0
+        por_questao.setdefault(alt.questao_id, []).append({
+            'texto': alt.texto,
+            'e_correta': alt.e_correta,
+            'escolhas': escolhas,
+        })
+
+    estatisticas = []
+    for q in questoes:
+        stats = getattr(q, 'stats', None) or QuestaoStats(questao=q)
+        alts = por_questao.get(q.id, [])
+        for alt in alts:
+            alt['percentual'] = round(alt['escolhas'] / stats.tentativas * 100, 1) if stats.tentativas else 0
+        estatisticas.append({
+            'enunciado': q.enunciado,
+            'tentativas': stats.tentativas,
+            'taxa_acerto': stats.taxa_acerto,
+            'alternativas': alts,
+        })
+    return estatisticas
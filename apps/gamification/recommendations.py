@@ -0,0 +1,152 @@
+# apps/gamification/recommendations.py
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Trail, TrailRecommendation, UserTrailProgress
+
+RECOMMENDATIONS_CACHE_KEY = 'gamification:recommendations'
+# A popularidade (fallback) é recalculada ao menos uma vez por hora
+RECOMMENDATIONS_TIMEOUT = 60 * 60
+
+
+def _started_pairs(chunk_size):
+    """(user_id, trail_id) de trilhas iniciadas, em blocos ordenados por aluno."""
+    rows = (
+        UserTrailProgress.objects.filter(completed_chapters__gt=0)
+        .order_by('user_id')
+        .values_list('user_id', 'trail_id')
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for user_id, trail_id in rows:
+        # Nunca separa as trilhas de um mesmo aluno entre dois blocos
+        if len(chunk) >= chunk_size and chunk[-1][0] != user_id:
+            yield chunk
+            chunk = []
+        chunk.append((user_id, trail_id))
+    if chunk:
+        yield chunk
+
+
+def cooccurrence_matrix(trail_ids, chunk_size=10000):
+    """
+    Matriz trilha x trilha com o número de alunos que iniciaram ambas.
+    Acumulada em blocos: incidência (alunos x trilhas) do bloco, Mᵀ·M.
+    """
+    position = {trail_id: i for i, trail_id in enumerate(trail_ids)}
+    matrix = np.zeros((len(trail_ids), len(trail_ids)), dtype=np.float64)
+    for chunk in _started_pairs(chunk_size):
+        users = {}
+        rows, cols = [], []
+        for user_id, trail_id in chunk:
+            if trail_id in position:
+                rows.append(users.setdefault(user_id, len(users)))
+                cols.append(position[trail_id])
+        if not rows:
+            continue
+        incidence = np.zeros((len(users), len(trail_ids)), dtype=np.float32)
+        incidence[rows, cols] = 1.0
+        matrix += incidence.T @ incidence
+    return matrix
+
+
+def top_neighbours(matrix, k):
+    """
+    Similaridade de cosseno entre trilhas (co-ocorrência normalizada pela
+    popularidade de cada uma) e os k vizinhos mais próximos por linha.
+    Retorna [(i, j, score, rank)].
+    """
+    popularity = np.diag(matrix).copy()
+    norm = np.sqrt(np.outer(popularity, popularity))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(norm > 0, matrix / norm, 0.0)
+    np.fill_diagonal(scores, 0.0)
+
+    result = []
+    for i in range(scores.shape[0]):
+        # Ordem estável: empates ficam com a trilha mais antiga
+        order = np.argsort(-scores[i], kind='stable')[:k]
+        rank = 0
+        for j in order:
+            if scores[i, j] <= 0:
+                break
+            rank += 1
+            result.append((i, int(j), float(scores[i, j]), rank))
+    return result
+
+
+def build_recommendations(k=5, chunk_size=10000):
+    """Recalcula e grava os vizinhos de todas as trilhas. Retorna o nº de recomendações."""
+    trail_ids = list(Trail.objects.order_by('id').values_list('id', flat=True))
+    neighbours = top_neighbours(cooccurrence_matrix(trail_ids, chunk_size), k)
+
+    with transaction.atomic():
+        TrailRecommendation.objects.all().delete()
+        TrailRecommendation.objects.bulk_create([
+            TrailRecommendation(trail_id=trail_ids[i], recommended_id=trail_ids[j], score=score, rank=rank)
+            for i, j, score, rank in neighbours
+        ], batch_size=1000)
+    invalidate_recommendations()
+    return len(neighbours)
+
+
+# --- CONSULTA (HOME) ---
+
+def get_recommendation_table():
+    """
+    Tabela em cache: vizinhos por trilha ({trail_id: ((id, score), ...)}) e
+    trilhas por popularidade, para o fallback.
+    """
+    table = cache.get(RECOMMENDATIONS_CACHE_KEY)
+    if table is None:
+        neighbours = {}
+        for trail_id, recommended_id, score in TrailRecommendation.objects.order_by(
+            'trail_id', 'rank'
+        ).values_list('trail_id', 'recommended_id', 'score'):
+            neighbours.setdefault(trail_id, []).append((recommended_id, score))
+        popular = tuple(
+            UserTrailProgress.objects.filter(completed_chapters__gt=0)
+            .values_list('trail_id')
+            .annotate(total=Count('id'))
+            .order_by('-total', 'trail_id')
+            .values_list('trail_id', flat=True)
+        )
+        table = {
+            'neighbours': {trail_id: tuple(items) for trail_id, items in neighbours.items()},
+            'popular': popular,
+        }
+        cache.set(RECOMMENDATIONS_CACHE_KEY, table, RECOMMENDATIONS_TIMEOUT)
+    return table
+
+
+def invalidate_recommendations():
+    cache.delete(RECOMMENDATIONS_CACHE_KEY)
+
+
+def suggest_trail_ids(started_ids, candidate_ids, n=4):
+    """
+    Sugestões para o aluno: soma as similaridades dos vizinhos de cada
+    trilha iniciada (consulta O(1) por trilha) e completa com as mais
+    populares e, por fim, com a ordem do catálogo.
+    `candidate_ids` são as trilhas existentes, na ordem do catálogo.
+    """
+    table = get_recommendation_table()
+    started = set(started_ids)
+    available = [trail_id for trail_id in candidate_ids if trail_id not in started]
+    allowed = set(available)
+
+    scores = {}
+    for trail_id in started:
+        for recommended_id, score in table['neighbours'].get(trail_id, ()):
+            if recommended_id in allowed:
+                scores[recommended_id] = scores.get(recommended_id, 0.0) + score
+    suggestions = sorted(scores, key=lambda trail_id: (-scores[trail_id], trail_id))[:n]
+
+    for trail_id in (*table['popular'], *available):
+        if len(suggestions) >= n:
+            break
+        if trail_id in allowed and trail_id not in suggestions:
+            suggestions.append(trail_id)
+    return suggestions
@@ -0,0 +1,32 @@
+# apps/gamification/rendering.py
+import hashlib
+import markdown
+
+# Conjunto de extensões usado na renderização das aulas.
+# Alterar esta lista (ou RENDER_VERSION) muda o hash de todo o conteúdo:
+# rode `python manage.py render_chapters` para regenerar o cache em lote.
+MARKDOWN_EXTENSIONS = ['fenced_code', 'codehilite', 'tables']
+RENDER_VERSION = 1
+
+
+def content_hash(text):
+    """Hash da versão do conteúdo: texto + extensões + versão do renderizador."""
+    signature = f"{RENDER_VERSION}|{','.join(MARKDOWN_EXTENSIONS)}|{text or ''}"
+    return hashlib.sha256(signature.encode('utf-8')).hexdigest()
+
+
+def render_markdown(text):
+    return markdown.markdown(text or "", extensions=MARKDOWN_EXTENSIONS)
+
+
+def refresh_rendered_content(chapter):
+    """
+    Atualiza `content_html` do capítulo se o hash do conteúdo mudou.
+    Retorna True quando houve nova renderização (os campos precisam ser salvos).
+    """
+    current_hash = content_hash(chapter.content)
+    if chapter.content_hash == current_hash:
+        return False
+    chapter.content_html = render_markdown(chapter.content)
+    chapter.content_hash = current_hash
+    return True
@@ -0,0 +1,202 @@
+# apps/gamification/search.py
+import html
+import re
+from dataclasses import dataclass
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from .models import Trail, Chapter, Questao, SearchEntry
+
+FTS_TABLE = 'gamification_search_fts'
+# Configuração de busca do PostgreSQL: português + unaccent (migração 0030)
+PG_SEARCH_CONFIG = 'gamification_pt'
+
+# Marcadores de destaque devolvidos pelo banco; viram <mark> depois do escape
+HIGHLIGHT_START, HIGHLIGHT_END = '\x02', '\x03'
+SNIPPET_WORDS = 16
+
+Kind = SearchEntry.Kind
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    kind: str
+    object_id: int
+    title: str
+    url: str
+    snippet: str
+    score: float
+
+    @property
+    def kind_label(self):
+        return Kind(self.kind).label
+
+
+# --- DOCUMENTOS DO ÍNDICE ---
+
+def document_for(instance):
+    """(kind, object_id, {title, body, url}) de uma Trail, Chapter ou Questao."""
+    if isinstance(instance, Trail):
+        return Kind.TRAIL, instance.pk, {
+            'title': instance.title[:255],
+            'body': instance.description or '',
+            'url': reverse('gamification:trail_detail', args=[instance.pk]),
+        }
+    if isinstance(instance, Chapter):
+        return Kind.CHAPTER, instance.pk, {
+            'title': instance.display_title[:255],
+            # Texto puro do HTML já renderizado (sem sintaxe Markdown)
+            'body': html.unescape(strip_tags(instance.content_html or instance.content or '')),
+            'url': reverse('gamification:chapter_detail', args=[instance.pk]),
+        }
+    if isinstance(instance, Questao):
+        return Kind.QUESTAO, instance.pk, {
+            'title': instance.enunciado[:255],
+            'body': instance.enunciado,
+            'url': reverse('gamification:chapter_detail', args=[instance.chapter_id]),
+        }
+    raise TypeError(f"Modelo sem indexação de busca: {type(instance).__name__}")
+
+
+def index_instance(instance):
+    """Atualiza a entrada do objeto; o índice FTS/tsvector acompanha no próprio banco."""
+    kind, object_id, fields = document_for(instance)
+    SearchEntry.objects.update_or_create(kind=kind, object_id=object_id, defaults=fields)
+
+
+def remove_instance(instance):
+    kind, object_id, _ = document_for(instance)
+    SearchEntry.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def index_many(instances):
+    """Versão em lote de `index_instance` (importações que não disparam signals)."""
+    entries, ids_by_kind = [], {}
+    for instance in instances:
+        kind, object_id, fields = document_for(instance)
+        entries.append(SearchEntry(kind=kind, object_id=object_id, **fields))
+        ids_by_kind.setdefault(kind, []).append(object_id)
+    if not entries:
+        return 0
+    with transaction.atomic():
+        for kind, object_ids in ids_by_kind.items():
+            SearchEntry.objects.filter(kind=kind, object_id__in=object_ids).delete()
+        SearchEntry.objects.bulk_create(entries, batch_size=500)
+    return len(entries)
+
+
+def reindex():
+    """Reconstrói o índice inteiro a partir das tabelas de conteúdo. Retorna o nº de documentos."""
+    objects = [
+        *Trail.objects.all(),
+        *Chapter.objects.all(),
+        *Questao.objects.all(),
+    ]
+    entries = []
+    for instance in objects:
+        kind, object_id, fields = document_for(instance)
+        entries.append(SearchEntry(kind=kind, object_id=object_id, **fields))
+
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        SearchEntry.objects.bulk_create(entries, batch_size=500)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return len(entries)
+
+
+# --- CONSULTA ---
+
+def _terms(query):
+    return re.findall(r'\w+', query or '', flags=re.UNICODE)[:10]
+
+
+def _highlight(text):
+    """Escapa o trecho e só então troca os marcadores por <mark>."""
+    return mark_safe(
+        escape(text).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    )
+
+
+def _kind_filter(kinds, column):
+    if not kinds:
+        return '', []
+    return f" AND {column} IN ({', '.join(['%s'] * len(kinds))})", list(kinds)
+
+
+def _search_sqlite(terms, kinds, limit):
+    # Cada termo vira prefixo entre aspas: "termo"* (AND implícito, sem sintaxe do usuário)
+    match = ' '.join(f'"{term}"*' for term in terms)
+    kind_sql, kind_params = _kind_filter(kinds, 'e.kind')
+    sql = f"""
+        SELECT e.kind, e.object_id, e.title, e.url,
+               snippet({FTS_TABLE}, -1, %s, %s, '…', %s),
+               bm25({FTS_TABLE}, 10.0, 1.0) AS score
+        FROM {FTS_TABLE}
+        JOIN {SearchEntry._meta.db_table} e ON e.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s{kind_sql}
+        ORDER BY score, e.id
+        LIMIT %s
+    """
+    params = [HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_WORDS, match, *kind_params, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        # bm25: quanto menor, mais relevante
+        return [(*row[:5], -row[5]) for row in cursor.fetchall()]
+
+
+def _search_postgresql(terms, kinds, limit):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    kind_sql, kind_params = _kind_filter(kinds, 'kind')
+    options = (
+        f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, "
+        f"MaxWords={SNIPPET_WORDS * 2}, MinWords={SNIPPET_WORDS}, MaxFragments=1"
+    )
+    sql = f"""
+        SELECT kind, object_id, title, url,
+               ts_headline('{PG_SEARCH_CONFIG}', body, q, %s),
+               ts_rank_cd(search_vector, q) AS score
+        FROM {SearchEntry._meta.db_table}, to_tsquery('{PG_SEARCH_CONFIG}', %s) q
+        WHERE search_vector @@ q{kind_sql}
+        ORDER BY score DESC, id
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [options, tsquery, *kind_params, limit])
+        return cursor.fetchall()
+
+
+def _search_fallback(terms, kinds, limit):
+    # Outros bancos: sem índice full-text, apenas para não quebrar a página
+    entries = SearchEntry.objects.all()
+    for term in terms:
+        entries = entries.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    if kinds:
+        entries = entries.filter(kind__in=kinds)
+    return [
+        (e.kind, e.object_id, e.title, e.url, e.body[:200], 0.0)
+        for e in entries.order_by('id')[:limit]
+    ]
+
+
+def search(query, kinds=None, limit=20):
+    """
+    Busca full-text com ranking (bm25 / ts_rank_cd) e trecho destacado.
+    `kinds` restringe os tipos de documento (ex.: [Kind.TRAIL]).
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    backend = {
+        'sqlite': _search_sqlite,
+        'postgresql': _search_postgresql,
+    }.get(connection.vendor, _search_fallback)
+    return [
+        SearchResult(kind, object_id, title, url, _highlight(snippet or ''), float(score))
+        for kind, object_id, title, url, snippet, score in backend(terms, kinds, limit)
+    ]
@@ -1,24 +1,37 @@
 import os
 import re
-from google import genai
+import json
+import logging
 from dotenv import load_dotenv
 from pathlib import Path
+from django.db import transaction
+from .llm import LLMError
+from .generation import get_generator
+from .models import Questao, Alternativa
 
 # Configuração de Caminho: Localiza o .env na raiz do projeto
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 load_dotenv(os.path.join(BASE_DIR, '.env'))
 
-def gerar_conteudo_aula(titulo_aula):
+logger = logging.getLogger(__name__)
+
+
+def _generate(prompt, client=None, json_output=False):
+    """
+    Chamada ao LLM pelo executor compartilhado (generation.py): fichas por
+    modelo, fallback entre modelos e contadores. Sem `sleep` fixo aqui; quem
+    espera pela cota é o token bucket ou a fila de tarefas (backoff).
+    Retorna (texto, modelo); levanta RateLimited se todos estiverem sem cota.
+    """
+    return get_generator().generate(prompt, json_output=json_output, client=client)
+
+
+def gerar_conteudo_aula(titulo_aula, client=None):
     """
     Motor de Inteligência Artificial para geração de conteúdo educativo.
     Utiliza engenharia de prompt para garantir saída em HTML semântico.
+    Levanta LLMError quando nenhum modelo responde.
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        return "<p>❌ Erro de Configuração: GEMINI_API_KEY não encontrada no .env.</p>"
-
-    client = genai.Client(api_key=api_key)
-    
     # PROMPT ARQUITETÔNICO (Nível Super Sênior)
     prompt = f"""
     PERSONA: Atue como um Arquiteto de Soluções e Professor PhD em Engenharia de Software.
@@ -48,34 +61,144 @@ def gerar_conteudo_aula(titulo_aula):
     - Linguagem: Português do Brasil, tom técnico e inspirador.
     """
 
-    # Modelos disponíveis conforme seu teste de diagnóstico
-    modelos_tentar = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-flash-latest']
+    texto_bruto, modelo = _generate(prompt, client)
+
+    # --- SANITIZAÇÃO SÊNIOR (LIMPEZA DE RESÍDUOS) ---
+
+    # 1. Remove marcações de bloco de código Markdown se a IA teimar em usá-las
+    texto_limpo = re.sub(r'```html|```', '', texto_bruto)
+
+    # 2. Corta qualquer texto (saudações) que venha antes do primeiro <h1>
+    # Isso garante que a página comece limpa no título principal
+    texto_limpo = re.sub(r'^.*?<h1', '<h1', texto_limpo, flags=re.DOTALL | re.IGNORECASE)
+
+    logger.info("Conteúdo gerado via %s e sanitizado.", modelo)
+    return texto_limpo.strip()
+
+
+# --- QUESTIONÁRIO DA AULA ---
+
+def _parse_questoes(texto):
+    """JSON do modelo -> lista de questões válidas (cercas ```json são toleradas)."""
+    texto = re.sub(r'^\s*```(?:json)?|```\s*$', '', texto.strip())
+    try:
+        data = json.loads(texto)
+    except json.JSONDecodeError as e:
+        raise LLMError(f"JSON inválido na resposta: {e}") from e
+
+    questoes = []
+    for item in data if isinstance(data, list) else []:
+        alternativas = [a for a in item.get('alternativas', []) if a.get('texto')]
+        if item.get('enunciado') and len(alternativas) >= 2 and any(a.get('correta') for a in alternativas):
+            questoes.append({**item, 'alternativas': alternativas})
+    if not questoes:
+        raise LLMError("A resposta não trouxe nenhuma questão válida.")
+    return questoes
+
+
+def pedir_questoes(conteudo, quantidade=3, client=None):
+    """
+    Só a conversa com o LLM: devolve as questões validadas, sem tocar no banco
+    (pode rodar nas threads do executor).
+    """
+    prompt = f"""
+    OBJETIVO: Gerar {quantidade} questões de múltipla escolha sobre o conteúdo técnico abaixo.
+    CONTEÚDO: "{conteudo}"
+
+    REGRAS RÍGIDAS:
+    1. Retorne APENAS um JSON puro (Array).
+    2. Cada questão deve ter 4 alternativas.
+    3. Apenas uma 'correta': true.
+    4. XP padrão: 10.
+
+    FORMATO OBRIGATÓRIO:
+    [
+      {{
+        "enunciado": "Pergunta?",
+        "xp": 10,
+        "alternativas": [
+          {{"texto": "Opção A", "correta": true}},
+          {{"texto": "Opção B", "correta": false}},
+          {{"texto": "Opção C", "correta": false}},
+          {{"texto": "Opção D", "correta": false}}
+        ]
+      }}
+    ]
+    """
+    texto, modelo = _generate(prompt, client, json_output=True)
+    logger.info("Questionário gerado via %s.", modelo)
+    return _parse_questoes(texto)
+
 
-    for modelo in modelos_tentar:
-        try:
-            print(f"DEBUG: Solicitando conteúdo ao modelo {modelo}...")
-            response = client.models.generate_content(
-                model=modelo,
-                contents=prompt
+def salvar_questoes(chapter, questoes_data, substituir=False):
+    """
+    Grava as questões e alternativas da aula em uma transação.
+    Com `substituir`, o questionário anterior (e o seu log de respostas) é
+    apagado na mesma transação: o gabarito passa a ser só o novo.
+    """
+    criadas = []
+    with transaction.atomic():
+        if substituir:
+            chapter.questoes.all().delete()
+        for item in questoes_data:
+            q = Questao.objects.create(
+                chapter=chapter,
+                enunciado=item['enunciado'],
+                xp_recompensa=item.get('xp', 10)
             )
-            
-            if response and response.text:
-                texto_bruto = response.text
-                
-                # --- SANITIZAÇÃO SÊNIOR (LIMPEZA DE RESÍDUOS) ---
-                
-                # 1. Remove marcações de bloco de código Markdown se a IA teimar em usá-las
-                texto_limpo = re.sub(r'```html|```', '', texto_bruto)
-                
-                # 2. Corta qualquer texto (saudações) que venha antes do primeiro <h1>
-                # Isso garante que a página comece limpa no título principal
-                texto_limpo = re.sub(r'^.*?<h1', '<h1', texto_limpo, flags=re.DOTALL | re.IGNORECASE)
-                
-                print(f"✅ SUCESSO: Conteúdo gerado via {modelo} e sanitizado.")
-                return texto_limpo.strip()
-                
-        except Exception as e:
-            print(f"❌ FALHA no modelo {modelo}: {str(e)}")
-            continue
-
-    return "<p>❌ Falha Técnica: O sistema não conseguiu obter uma resposta válida da IA. Verifique sua cota no Google Cloud.</p>"
\ No newline at end of file
+            for alt in item['alternativas']:
+                Alternativa.objects.create(
+                    questao=q,
+                    texto=alt['texto'][:255],
+                    e_correta=bool(alt.get('correta'))
+                )
+            criadas.append(q)
+    return criadas
+
+
+def gerar_questoes(chapter, quantidade=3, client=None):
+    """
+    Gera e grava um questionário de múltipla escolha para a aula.
+    Retorna as questões criadas; levanta LLMError se nada válido voltar.
+    """
+    return salvar_questoes(chapter, pedir_questoes(chapter.content, quantidade, client))
+
+
+# --- TRILHA INTEIRA (chamadas concorrentes, limitadas pela cota) ---
+
+def gerar_trilha(trail, conteudo=True, questoes=True, quantidade=3, max_workers=None, progress=None, substituir=True):
+    """
+    Regenera o texto e/ou o questionário de todas as aulas da trilha.
+    Por padrão o questionário novo substitui o anterior de cada aula
+    (`substituir=False` acrescenta as questões às existentes).
+    As chamadas ao LLM rodam em paralelo no executor (o tempo total fica
+    limitado pela cota de cada modelo, não pela soma das idas e voltas);
+    as gravações acontecem aqui, na thread de quem chamou.
+    Retorna {'conteudo': n, 'questoes': n, 'erros': {chapter_id: mensagem}}.
+    """
+    generator = get_generator()
+    chapters = list(trail.chapters.order_by('order', 'id'))
+    report = {'conteudo': 0, 'questoes': 0, 'erros': {}}
+
+    if conteudo:
+        for chapter, html, error in generator.map(lambda c: gerar_conteudo_aula(c.title), chapters, max_workers):
+            if error is not None:
+                report['erros'][chapter.pk] = str(error)
+                continue
+            chapter.content = html
+            # O save re-renderiza o HTML em cache (content_html) junto com o texto
+            chapter.save(update_fields=['content', 'updated_at'])
+            report['conteudo'] += 1
+        if progress:
+            progress(50 if questoes else 100, f"Texto: {report['conteudo']}/{len(chapters)} aulas")
+
+    if questoes:
+        com_texto = [c for c in chapters if c.content and c.pk not in report['erros']]
+        for chapter, data, error in generator.map(lambda c: pedir_questoes(c.content, quantidade), com_texto, max_workers):
+            if error is not None:
+                report['erros'][chapter.pk] = str(error)
+                continue
+            report['questoes'] += len(salvar_questoes(chapter, data, substituir=substituir))
+        if progress:
+            progress(100, f"Questionários: {len(com_texto)} aulas")
+    return report
@@ -1,23 +1,144 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
 from django.dispatch import receiver
-from django.db.models import Sum
-from .models import PointTransaction, Medal, UserMedal
+from .models import PointTransaction, Medal, UserMedal, UserProgress, Chapter, Trail, Questao, Alternativa, Technology
+from .progress import apply_progress_delta, remove_progress, refresh_trail_totals, rebuild_trail_progress
+from .cache import bump_content_version, bump_user_versions
+from .quiz import invalidate_answer_key
+from .ledger import apply_to_balance
+from .utils import invalidate_medal_thresholds
+from .search import index_instance, remove_instance
 
 @receiver(post_save, sender=PointTransaction)
-def check_user_medals(sender, instance, created, **kwargs):
+def check_user_medals(sender, instance, created, raw=False, **kwargs):
+    # Saldo corrente + avaliação incremental de medalhas (sem SUM no histórico)
+    if created and not raw:
+        apply_to_balance(instance)
+
+@receiver(post_save, sender=Medal)
+@receiver(post_delete, sender=Medal)
+def medal_changed(sender, **kwargs):
+    invalidate_medal_thresholds()
+
+@receiver(user_logged_in)
+@receiver(user_logged_out)
+def session_changed(sender, request, user, **kwargs):
+    # Login/logout trocam sessão e CSRF: páginas guardadas pelo navegador deixam de valer
+    if user is not None:
+        bump_user_versions([user.pk])
+
+@receiver(post_save, sender=UserMedal)
+@receiver(post_delete, sender=UserMedal)
+@receiver(post_save, sender=UserProgress)
+@receiver(post_delete, sender=UserProgress)
+def student_data_changed(sender, instance, raw=False, **kwargs):
+    # Dashboard e demais caches por aluno deixam de valer
+    if not raw:
+        bump_user_versions([instance.user_id])
+
+
+# --- PROGRESSO POR TRILHA (UserTrailProgress) ---
+
+@receiver(post_save, sender=UserProgress)
+def track_progress_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    trail_id = Chapter.objects.filter(pk=instance.chapter_id).values_list('trail_id', flat=True).first()
+    if trail_id is not None:
+        apply_progress_delta(instance.user_id, trail_id, 1 if created else 0)
+
+@receiver(post_delete, sender=UserProgress)
+def track_progress_deleted(sender, instance, **kwargs):
+    # Em exclusões em cascata o capítulo pode já não existir; o recálculo
+    # da trilha (signal de Chapter) cuida desse caso.
+    trail_id = Chapter.objects.filter(pk=instance.chapter_id).values_list('trail_id', flat=True).first()
+    if trail_id is not None:
+        remove_progress(instance.user_id, trail_id)
+
+@receiver(pre_save, sender=Chapter)
+def remember_previous_trail(sender, instance, raw=False, **kwargs):
+    instance._previous_trail_id = None
+    if instance.pk and not raw:
+        instance._previous_trail_id = (
+            Chapter.objects.filter(pk=instance.pk).values_list('trail_id', flat=True).first()
+        )
+
+@receiver(post_save, sender=Chapter)
+def track_chapter_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_trail_id = getattr(instance, '_previous_trail_id', None)
     if created:
-        user = instance.user
-        # 1. Calcula o XP Total atual do usuário
-        total_xp = PointTransaction.objects.filter(user=user).aggregate(total=Sum('quantity'))['total'] or 0
-        
-        # 2. Busca medalhas que o usuário atingiu o XP mas ainda NÃO possui
-        # Usamos o campo 'min_points' que confirmamos no seu model
-        medalhas_disponiveis = Medal.objects.filter(
-            min_points__lte=total_xp
-        ).exclude(
-            id__in=UserMedal.objects.filter(user=user).values_list('medal_id', flat=True)
+        refresh_trail_totals(instance.trail_id)
+    elif previous_trail_id and previous_trail_id != instance.trail_id:
+        # O capítulo mudou de trilha: o progresso dos alunos muda junto
+        rebuild_trail_progress([previous_trail_id, instance.trail_id])
+
+@receiver(post_delete, sender=Chapter)
+def track_chapter_deleted(sender, instance, **kwargs):
+    # Pode ser a cascata de uma trilha apagada: não cria linhas novas
+    rebuild_trail_progress([instance.trail_id], create=False)
+
+
+
+# --- VERSÃO DO CONTEÚDO (invalida o cache de páginas públicas) ---
+
+@receiver(post_save, sender=Trail)
+@receiver(post_delete, sender=Trail)
+@receiver(post_save, sender=Chapter)
+@receiver(post_delete, sender=Chapter)
+@receiver(post_save, sender=Technology)
+@receiver(post_delete, sender=Technology)
+def content_changed(sender, **kwargs):
+    bump_content_version()
+
+@receiver(m2m_changed, sender=Technology.trails.through)
+@receiver(m2m_changed, sender=Technology.chapters.through)
+def technology_tags_changed(sender, action, **kwargs):
+    # Tags de tecnologia mudam as contagens e as páginas por tecnologia
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_content_version()
+
+
+
+# --- GABARITO COMPILADO DO QUIZ (Questao / Alternativa) ---
+
+@receiver(pre_save, sender=Questao)
+def remember_previous_chapter(sender, instance, raw=False, **kwargs):
+    instance._previous_chapter_id = None
+    if instance.pk and not raw:
+        instance._previous_chapter_id = (
+            Questao.objects.filter(pk=instance.pk).values_list('chapter_id', flat=True).first()
         )
-        
-        # 3. Registra as novas conquistas
-        for medalha in medalhas_disponiveis:
-            UserMedal.objects.get_or_create(user=user, medal=medalha)
\ No newline at end of file
+
+@receiver(post_save, sender=Questao)
+@receiver(post_delete, sender=Questao)
+def questao_changed(sender, instance, **kwargs):
+    invalidate_answer_key(instance.chapter_id)
+    previous_chapter_id = getattr(instance, '_previous_chapter_id', None)
+    if previous_chapter_id and previous_chapter_id != instance.chapter_id:
+        invalidate_answer_key(previous_chapter_id)
+
+@receiver(post_save, sender=Alternativa)
+@receiver(post_delete, sender=Alternativa)
+def alternativa_changed(sender, instance, **kwargs):
+    chapter_id = Questao.objects.filter(pk=instance.questao_id).values_list('chapter_id', flat=True).first()
+    if chapter_id is not None:
+        invalidate_answer_key(chapter_id)
+
+
+
+# --- ÍNDICE DE BUSCA (Trail / Chapter / Questao) ---
+
+@receiver(post_save, sender=Trail)
+@receiver(post_save, sender=Chapter)
+@receiver(post_save, sender=Questao)
+def search_document_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_instance(instance)
+
+@receiver(post_delete, sender=Trail)
+@receiver(post_delete, sender=Chapter)
+@receiver(post_delete, sender=Questao)
+def search_document_deleted(sender, instance, **kwargs):
+    remove_instance(instance)
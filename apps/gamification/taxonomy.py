@@ -0,0 +1,110 @@
+# apps/gamification/taxonomy.py
+import re
+import unicodedata
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .cache import bump_content_version, get_content_version
+from .models import Technology, Trail, Chapter
+
+TECHNOLOGIES_CACHE_KEY = 'gamification:technologies:{version}'
+TECHNOLOGIES_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass(frozen=True)
+class TechInfo:
+    id: int
+    name: str
+    slug: str
+    icon: str
+    trail_ids: tuple
+    num_chapters: int
+
+    @property
+    def num_trails(self):
+        return len(self.trail_ids)
+
+
+def build_technologies():
+    """Tecnologias com suas trilhas e contagem de aulas: três consultas pelas tabelas M2M indexadas."""
+    Trails = Technology.trails.through
+    Chapters = Technology.chapters.through
+    trail_ids = {}
+    for tech_id, trail_id in Trails.objects.order_by('trail_id').values_list('technology_id', 'trail_id'):
+        trail_ids.setdefault(tech_id, []).append(trail_id)
+    chapter_counts = dict(
+        Chapters.objects.values_list('technology_id').annotate(total=Count('id'))
+    )
+
+    return tuple(
+        TechInfo(
+            id=tech.id,
+            name=tech.name,
+            slug=tech.slug,
+            icon=tech.icon,
+            trail_ids=tuple(trail_ids.get(tech.id, ())),
+            num_chapters=chapter_counts.get(tech.id, 0),
+        )
+        for tech in Technology.objects.all()
+    )
+
+
+def get_technologies():
+    """Taxonomia em cache sob a versão do conteúdo (bumpada também pelas mudanças de tags)."""
+    key = TECHNOLOGIES_CACHE_KEY.format(version=get_content_version())
+    technologies = cache.get(key)
+    if technologies is None:
+        technologies = build_technologies()
+        cache.set(key, technologies, TECHNOLOGIES_TIMEOUT)
+    return technologies
+
+
+def technology_by_slug(slug):
+    for tech in get_technologies():
+        if tech.slug == slug:
+            return tech
+    return None
+
+
+# --- AUTO-TAG POR TÍTULO ---
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return text.lower()
+
+
+def keyword_patterns(technology):
+    """Regex por palavra inteira, sem acentos, para as palavras-chave da tecnologia."""
+    keywords = [_normalize(k.strip()) for k in technology.keywords.split(',') if k.strip()]
+    keywords = keywords or [_normalize(technology.name)]
+    return re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in keywords) + r')\b')
+
+
+def auto_tag(dry_run=False):
+    """
+    Marca trilhas e aulas cujos títulos citam as palavras-chave de cada tecnologia.
+    Só acrescenta vínculos (bulk_create ignore_conflicts); nada é removido.
+    Retorna {slug: (trilhas, aulas)} com os vínculos encontrados.
+    """
+    Trails = Technology.trails.through
+    Chapters = Technology.chapters.through
+    trails = list(Trail.objects.values_list('id', 'title'))
+    chapters = list(Chapter.objects.values_list('id', 'title'))
+
+    report, trail_links, chapter_links = {}, [], []
+    for tech in Technology.objects.all():
+        pattern = keyword_patterns(tech)
+        matched_trails = [pk for pk, title in trails if pattern.search(_normalize(title))]
+        matched_chapters = [pk for pk, title in chapters if pattern.search(_normalize(title))]
+        report[tech.slug] = (len(matched_trails), len(matched_chapters))
+        trail_links += [Trails(technology_id=tech.id, trail_id=pk) for pk in matched_trails]
+        chapter_links += [Chapters(technology_id=tech.id, chapter_id=pk) for pk in matched_chapters]
+
+    if not dry_run:
+        Trails.objects.bulk_create(trail_links, ignore_conflicts=True, batch_size=1000)
+        Chapters.objects.bulk_create(chapter_links, ignore_conflicts=True, batch_size=1000)
+        # bulk_create nas tabelas M2M não dispara m2m_changed
+        bump_content_version()
+    return report
@@ -0,0 +1,44 @@
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from apps.gamification.models import Trail, Chapter
+from apps.gamification.catalog import get_catalog, chapter_counts
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.python = Trail.objects.create(title="Python", description="Base")
+        self.docker = Trail.objects.create(title="Docker", description="Containers", total_xp=900)
+        Chapter.objects.create(trail=self.python, title="Variáveis", order=1, xp_value=40)
+        Chapter.objects.create(trail=self.python, title="Funções", order=2, xp_value=60)
+
+    def test_catalog_precomputes_counts_and_xp(self):
+        catalog = {t.id: t for t in get_catalog()}
+        self.assertEqual(catalog[self.python.id].num_chapters, 2)
+        self.assertEqual(catalog[self.python.id].total_xp, 100)
+        self.assertEqual(catalog[self.docker.id].num_chapters, 0)
+        self.assertEqual(catalog[self.docker.id].total_xp, 900)
+        self.assertEqual(catalog[self.docker.id].image_url, '')
+
+    def test_catalog_is_cached_until_content_changes(self):
+        get_catalog()
+        with self.assertNumQueries(0):
+            self.assertEqual(chapter_counts()[self.python.id], 2)
+
+        Chapter.objects.create(trail=self.docker, title="Imagens", order=1)
+        self.assertEqual(chapter_counts()[self.docker.id], 1)
+
+        self.docker.delete()
+        self.assertNotIn(self.docker.id, chapter_counts())
+
+    def test_listings_read_from_catalog(self):
+        self.client.force_login(User.objects.create(username='cat', ru='7600001'))
+        self.client.get(reverse('gamification:trail_list'))
+        response = self.client.get(reverse('gamification:trail_list'))
+        self.assertContains(response, "Docker")
+        self.assertContains(response, "+900 XP")
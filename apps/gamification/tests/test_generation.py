@@ -0,0 +1,170 @@
+import threading
+import time
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from apps.gamification.models import Trail, Chapter, Questao, Job
+from apps.gamification import jobs
+from apps.gamification.generation import TokenBucket, Generator, get_generator, reset_generator
+from apps.gamification.llm import FakeClient, RateLimited
+from apps.gamification.quiz import get_answer_key
+from apps.gamification.services import gerar_trilha
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class LentoClient(FakeClient):
+    """Cliente que demora a responder e registra quantas chamadas ficaram simultâneas."""
+
+    def __init__(self, delay=0.05):
+        super().__init__()
+        self.delay, self.active, self.max_active = delay, 0, 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, model, json_output=False):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            return super().generate(prompt, model, json_output)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class TokenBucketTest(TestCase):
+    def test_refills_at_rate_and_caps_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=2, clock=clock, sleep=clock.sleep)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        self.assertAlmostEqual(bucket.wait_time(), 1.0)
+
+        clock.now += 10  # acumula no máximo `capacity`
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def test_acquire_waits_or_gives_up(self):
+        clock = FakeClock()
+        bucket = TokenBucket(6, capacity=1, clock=clock, sleep=clock.sleep)
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire(timeout=5))
+        self.assertTrue(bucket.acquire(timeout=20))
+        self.assertAlmostEqual(clock.now, 10.0)
+
+
+class GeneratorTest(TestCase):
+    def _generator(self, **kwargs):
+        clock = FakeClock()
+        options = dict(models=['modelo-a', 'modelo-b'], rate_limits={}, default_rpm=60,
+                       cooldown=30, acquire_timeout=60, clock=clock, sleep=clock.sleep)
+        options.update(kwargs)
+        return Generator(**options), clock
+
+    def test_rate_limited_model_is_paused_and_skipped(self):
+        class PrimeiroEsgotado(FakeClient):
+            def generate(self, prompt, model, json_output=False):
+                if model == 'modelo-a':
+                    self.calls.append((model, prompt))
+                    raise RateLimited("429")
+                return super().generate(prompt, model, json_output)
+
+        client = PrimeiroEsgotado()
+        generator, clock = self._generator(client=client)
+
+        with self.assertLogs('apps.gamification.generation', 'WARNING'):
+            self.assertEqual(generator.generate("a")[1], 'modelo-b')
+        generator.generate("b")
+        self.assertEqual([m for m, _ in client.calls], ['modelo-a', 'modelo-b', 'modelo-b'])
+
+        clock.now += 31  # pausa terminou: volta a tentar o preferido
+        with self.assertLogs('apps.gamification.generation', 'WARNING'):
+            generator.generate("c")
+        self.assertEqual(client.calls[-2][0], 'modelo-a')
+
+        stats = generator.stats()
+        self.assertEqual((stats['modelo-a'].requests, stats['modelo-a'].rate_limited), (2, 2))
+        self.assertEqual((stats['modelo-b'].requests, stats['modelo-b'].successes), (3, 3))
+
+    def test_falls_back_when_preferred_bucket_is_empty(self):
+        generator, clock = self._generator(client=FakeClient(), rate_limits={'modelo-a': 6})
+        # modelo-a: 1 ficha por rajada; a segunda chamada vai para o modelo-b sem esperar
+        self.assertEqual([generator.generate(p)[1] for p in "xyz"], ['modelo-a', 'modelo-b', 'modelo-b'])
+        self.assertEqual(clock.now, 0)
+
+    def test_map_runs_calls_concurrently(self):
+        client = LentoClient()
+        generator = Generator(client=client, models=['modelo-a'], rate_limits={'modelo-a': 600})
+        results = generator.map(lambda i: generator.generate(f"p{i}")[0], range(8), max_workers=4)
+
+        self.assertEqual([item for item, _, _ in results], list(range(8)))
+        self.assertTrue(all(error is None for _, _, error in results))
+        self.assertGreater(client.max_active, 1)
+        self.assertLessEqual(client.max_active, 4)
+
+
+@override_settings(
+    LLM_CLIENT='apps.gamification.llm.FakeClient',
+    LLM_MODELS=['modelo-a'],
+    LLM_RATE_LIMITS={'modelo-a': 600},
+    LLM_MAX_CONCURRENCY=3,
+)
+class GerarTrilhaTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_generator()  # contadores zerados a cada teste
+        self.trail = Trail.objects.create(title="Python", description="x")
+        self.chapters = [Chapter.objects.create(trail=self.trail, title=f"Tópico {i}") for i in range(1, 4)]
+
+    def test_service_regenerates_every_chapter(self):
+        notes = []
+        report = gerar_trilha(self.trail, progress=lambda percent, note: notes.append(percent))
+
+        self.assertEqual(report, {'conteudo': 3, 'questoes': 9, 'erros': {}})
+        self.assertEqual(notes, [50, 100])
+        for chapter in self.chapters:
+            chapter.refresh_from_db()
+            self.assertIn('Aula gerada localmente', chapter.content_html)
+        self.assertEqual(get_generator().stats()['modelo-a'].requests, 6)
+
+    def test_job_and_command(self):
+        job = jobs.enqueue(Job.Kind.GERAR_TRILHA, {'trail_id': self.trail.pk, 'conteudo': False})
+        Chapter.objects.filter(trail=self.trail).update(content="Texto existente.")
+        out = StringIO()
+        call_command('run_jobs', '--once', stdout=out)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result['questoes']), ('done', 9))
+        self.assertIn('modelo-a: 3 chamadas', out.getvalue())
+
+        out = StringIO()
+        call_command('gerar_trilha', self.trail.pk, '--sem-conteudo', stdout=out)
+        self.assertIn('9 questões', out.getvalue())
+        self.assertEqual(Questao.objects.filter(chapter__trail=self.trail).count(), 9)
+
+        call_command('gerar_trilha', self.trail.pk, '--sem-conteudo', '--acrescentar', stdout=StringIO())
+        self.assertEqual(Questao.objects.filter(chapter__trail=self.trail).count(), 18)
+
+    def test_regenerating_twice_replaces_the_quiz(self):
+        gerar_trilha(self.trail)
+        primeiras = set(Questao.objects.values_list('id', flat=True))
+        gerar_trilha(self.trail)
+
+        self.assertEqual(Questao.objects.filter(chapter__trail=self.trail).count(), 9)
+        self.assertFalse(primeiras & set(Questao.objects.values_list('id', flat=True)))
+        key = get_answer_key(self.chapters[0].pk)
+        self.assertEqual(len(key.questions), 3)
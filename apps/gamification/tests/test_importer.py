@@ -0,0 +1,178 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from apps.gamification.models import Trail, Chapter, Questao, Alternativa, SearchEntry, UserProgress, UserTrailProgress
+from apps.gamification.importer import import_trails
+from apps.gamification.quiz import get_answer_key
+from apps.gamification.cache import get_content_version
+
+User = get_user_model()
+
+
+def bundle(num_chapters=2, content="Texto **base**."):
+    return [{
+        'title': "Docker na Prática",
+        'description': "Containers do zero.",
+        'chapters': [
+            {
+                'title': f"Tópico {i}",
+                'content': content,
+                'xp_value': 40,
+                'questoes': [{
+                    'enunciado': f"Pergunta {i}?",
+                    'xp': 15,
+                    'alternativas': [{'texto': "Certa", 'correta': True}, {'texto': "Errada", 'correta': False}],
+                }],
+            }
+            for i in range(1, num_chapters + 1)
+        ],
+    }]
+
+
+class ImportTrailsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_creates_everything_with_orders_slugs_and_rendered_html(self):
+        report = import_trails(bundle())
+
+        self.assertEqual((report.trails_created, report.chapters_created), (1, 2))
+        self.assertEqual((report.questoes_created, report.alternativas_created), (2, 4))
+        trail = Trail.objects.get(slug='docker-na-pratica')
+        chapters = list(trail.chapters.order_by('order'))
+        self.assertEqual([c.title for c in chapters], ["Tópico 1", "Tópico 2"])
+        self.assertEqual(chapters[0].slug, 'docker-na-pratica-topico-1')
+        self.assertIn('<strong>base</strong>', chapters[0].content_html)
+        self.assertEqual(Questao.objects.get(chapter=chapters[1]).xp_recompensa, 15)
+        self.assertTrue(SearchEntry.objects.filter(kind='chapter', object_id=chapters[1].id).exists())
+
+    def test_query_count_does_not_grow_with_chapters(self):
+        with CaptureQueriesContext(connection) as small:
+            import_trails(bundle(num_chapters=2))
+        Trail.objects.all().delete()
+        cache.clear()
+        with CaptureQueriesContext(connection) as large:
+            import_trails(bundle(num_chapters=30))
+        self.assertEqual(Chapter.objects.count(), 30)
+        self.assertEqual(len(small), len(large))
+
+    def test_reimport_is_idempotent_and_updates_by_slug(self):
+        import_trails(bundle())
+        report = import_trails(bundle())
+        self.assertFalse(report.changed)
+        self.assertEqual(Chapter.objects.count(), 2)
+        self.assertEqual(Alternativa.objects.count(), 4)
+
+        data = bundle(content="Texto *novo*.")
+        data[0]['chapters'][0]['questoes'][0]['alternativas'][1]['correta'] = True
+        report = import_trails(data)
+        self.assertEqual((report.chapters_created, report.chapters_updated), (0, 2))
+        self.assertEqual(report.alternativas_updated, 1)
+        self.assertIn('<em>novo</em>', Chapter.objects.first().content_html)
+
+    def test_matches_chapters_created_by_the_admin(self):
+        trail = Trail.objects.create(title="Docker na Prática", description="x")
+        Chapter.objects.create(trail=trail, title="Tópico 1", content="antigo")
+
+        report = import_trails(bundle())
+        self.assertEqual((report.chapters_created, report.chapters_updated), (1, 1))
+        self.assertEqual(trail.chapters.count(), 2)
+
+    def test_new_chapters_go_after_the_ones_the_trail_already_has(self):
+        trail = Trail.objects.create(title="Docker na Prática", description="x")
+        Chapter.objects.create(trail=trail, title="Introdução")
+        Chapter.objects.create(trail=trail, title="Tópico 2")
+
+        import_trails(bundle(num_chapters=3))
+        orders = dict(trail.chapters.values_list('title', 'order'))
+        self.assertEqual(orders, {"Introdução": 1, "Tópico 2": 2, "Tópico 1": 3, "Tópico 3": 4})
+        self.assertFalse(import_trails(bundle(num_chapters=3)).changed)
+
+        data = bundle(num_chapters=1)
+        data[0]['chapters'].append({'title': "Conflito", 'order': 1})
+        with self.assertRaisesMessage(ValueError, "posição 1 já ocupada"):
+            import_trails(data)
+        self.assertFalse(trail.chapters.filter(title="Conflito").exists())
+
+    def test_side_effects_of_signals_are_applied(self):
+        import_trails(bundle(num_chapters=1))
+        trail = Trail.objects.get()
+        chapter = trail.chapters.get()
+        user = User.objects.create(username='imp', ru='8100001')
+        UserProgress.objects.create(user=user, chapter=chapter)
+        self.assertEqual(len(get_answer_key(chapter.id).questions), 1)
+
+        data = bundle(num_chapters=2)
+        data[0]['chapters'][0]['questoes'].append(
+            {'enunciado': "Extra?", 'alternativas': [{'texto': "Sim", 'correta': True}]}
+        )
+        version = get_content_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            import_trails(data)
+
+        self.assertEqual(UserTrailProgress.objects.get(user=user, trail=trail).total_chapters, 2)
+        self.assertEqual(len(get_answer_key(chapter.id).questions), 2)
+        self.assertNotEqual(get_content_version(), version)
+
+    def test_dry_run_writes_nothing(self):
+        report = import_trails(bundle(), dry_run=True)
+        self.assertEqual(report.chapters_created, 2)
+        self.assertFalse(Trail.objects.exists())
+        self.assertFalse(SearchEntry.objects.exists())
+
+    def test_slug_taken_by_another_trail_gets_suffix(self):
+        other = Trail.objects.create(title="Outra", description="x")
+        Chapter.objects.create(trail=other, title="X", slug='docker-na-pratica-topico-1')
+
+        import_trails(bundle(num_chapters=1))
+        self.assertEqual(Trail.objects.get(slug='docker-na-pratica').chapters.get().slug, 'docker-na-pratica-topico-1-1')
+        self.assertFalse(import_trails(bundle(num_chapters=1)).changed)
+
+
+class ImportTrailsCommandTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def test_markdown_directory_with_front_matter(self):
+        trail_dir = self.dir / 'git'
+        trail_dir.mkdir()
+        (trail_dir / '_trail.md').write_text("---\ntitle: Git Essencial\nis_premium: true\n---\nVersionamento.\n", encoding='utf-8')
+        (trail_dir / '02-branches.md').write_text("---\ntitle: Branches\n---\n# Branches\n", encoding='utf-8')
+        (trail_dir / '01-commits.md').write_text(
+            "---\ntitle: Commits\nxp_value: 30\nquestoes:\n  - enunciado: O que é um commit?\n"
+            "    alternativas:\n      - {texto: Um snapshot, correta: true}\n      - {texto: Um branch}\n---\n# Commits\n",
+            encoding='utf-8',
+        )
+
+        call_command('import_trails', str(self.dir), stdout=StringIO())
+        trail = Trail.objects.get(slug='git-essencial')
+        self.assertTrue(trail.is_premium)
+        self.assertEqual(trail.description, "Versionamento.")
+        self.assertEqual(list(trail.chapters.values_list('title', 'xp_value')), [
+            ("Commits", 30), ("Branches", 50),
+        ])
+        self.assertEqual(Alternativa.objects.filter(e_correta=True).count(), 1)
+
+    def test_json_bundle_and_invalid_input(self):
+        path = self.dir / 'bundle.json'
+        path.write_text(json.dumps({'trails': bundle()}), encoding='utf-8')
+        out = StringIO()
+        call_command('import_trails', str(path), '--dry-run', stdout=out)
+        self.assertIn('2 criadas', out.getvalue())
+        self.assertFalse(Trail.objects.exists())
+
+        path.write_text(json.dumps({'trails': [{'description': "sem título"}]}), encoding='utf-8')
+        with self.assertRaises(CommandError):
+            call_command('import_trails', str(path), stdout=StringIO())
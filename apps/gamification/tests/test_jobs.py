@@ -0,0 +1,158 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from apps.gamification.models import Trail, Chapter, Questao, Job
+from apps.gamification import jobs
+from apps.gamification.llm import LLMError, RateLimited
+from apps.gamification.services import gerar_questoes
+
+User = get_user_model()
+
+
+class RateLimitedClient:
+    def generate(self, prompt, model, json_output=False):
+        raise RateLimited(f"{model}: 429 RESOURCE_EXHAUSTED")
+
+
+@override_settings(
+    LLM_CLIENT='apps.gamification.llm.FakeClient',
+    LLM_MODELS=['modelo-a', 'modelo-b'],
+    JOB_MAX_ATTEMPTS=3,
+    JOB_BACKOFF_SECONDS=30,
+    SECURE_SSL_REDIRECT=False,
+)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        trail = Trail.objects.create(title="Python", description="x")
+        self.chapter = Chapter.objects.create(trail=trail, title="Listas", content="Listas em Python.")
+        self.vazia = Chapter.objects.create(trail=trail, title="Sem texto", content="")
+
+    def test_admin_actions_only_enqueue(self):
+        admin = User.objects.create(username='admin', ru='8300001', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        url = reverse('admin:gamification_chapter_changelist')
+
+        self.client.post(url, {
+            'action': 'gerar_questoes_ia_action',
+            '_selected_action': [self.chapter.pk, self.vazia.pk],
+        })
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.status, job.payload), ('questoes_aula', 'queued', {'chapter_id': self.chapter.pk}))
+        self.assertEqual(job.created_by, admin)
+        self.assertFalse(Questao.objects.exists())
+
+        response = self.client.get(reverse('admin:gamification_job_changelist'))
+        self.assertContains(response, 'http-equiv="refresh"')
+
+        job.status, job.last_error, job.locked_by = 'failed', "RateLimited: 429", 'w1'
+        job.save()
+        self.client.post(reverse('admin:gamification_job_changelist'), {
+            'action': 'reenfileirar', '_selected_action': [job.pk],
+        })
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error, job.locked_by), ('queued', 0, '', ''))
+
+    def test_worker_runs_jobs_with_fake_client(self):
+        jobs.enqueue(Job.Kind.CONTEUDO_AULA, {'chapter_id': self.chapter.pk})
+        jobs.enqueue(Job.Kind.QUESTOES_AULA, {'chapter_id': self.chapter.pk})
+
+        call_command('run_jobs', '--once', stdout=StringIO())
+
+        self.assertEqual(set(Job.objects.values_list('status', 'progress')), {('done', 100)})
+        self.chapter.refresh_from_db()
+        self.assertIn('Aula gerada localmente', self.chapter.content_html)
+        self.assertEqual(Questao.objects.filter(chapter=self.chapter).count(), 3)
+        self.assertEqual(Job.objects.get(kind='questoes_aula').result['questoes'], 3)
+
+    def test_transient_failures_retry_with_backoff_then_fail(self):
+        calls = []
+
+        def instavel(job):
+            calls.append(job.attempts)
+            raise RateLimited("429")
+
+        with mock.patch.dict(jobs.HANDLERS, {'teste': instavel}), self.assertLogs('apps.gamification.jobs', 'WARNING'):
+            job = jobs.enqueue('teste')
+            jobs.run_pending('w1')
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('queued', 1))
+            self.assertAlmostEqual((job.run_after - timezone.now()).total_seconds(), 30, delta=5)
+            self.assertEqual(jobs.run_pending('w1'), 0)  # ainda não liberada
+
+            for esperado in (60, None):
+                Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+                jobs.run_pending('w1')
+                job.refresh_from_db()
+                if esperado:
+                    self.assertAlmostEqual((job.run_after - timezone.now()).total_seconds(), esperado, delta=5)
+
+        self.assertEqual(calls, [1, 2, 3])
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('RateLimited', job.last_error)
+
+    def test_permanent_errors_fail_immediately(self):
+        job = jobs.enqueue(Job.Kind.QUESTOES_AULA, {'chapter_id': self.vazia.pk})
+        with self.assertLogs('apps.gamification.jobs', 'ERROR'):
+            jobs.run_pending('w1')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+        self.assertIn('não possui conteúdo', job.last_error)
+
+    def test_claim_is_exclusive_and_stale_jobs_return(self):
+        job = jobs.enqueue(Job.Kind.CONTEUDO_AULA, {'chapter_id': self.chapter.pk})
+        self.assertEqual(jobs.claim_next('w1').pk, job.pk)
+        self.assertIsNone(jobs.claim_next('w2'))
+
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(timedelta(minutes=15)), 1)
+        self.assertEqual(jobs.claim_next('w2').locked_by, 'w2')
+
+    def test_progress_keeps_long_jobs_from_being_requeued(self):
+        job = jobs.enqueue(Job.Kind.CONTEUDO_AULA, {'chapter_id': self.chapter.pk})
+        job = jobs.claim_next('w1')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        jobs.report_progress(job, 50, "Ainda gerando")
+        self.assertEqual(jobs.requeue_stale(timedelta(minutes=15)), 0)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'running')
+
+    def test_stale_requeue_counts_as_attempt_and_old_owner_loses_job(self):
+        job = jobs.enqueue(Job.Kind.CONTEUDO_AULA, {'chapter_id': self.chapter.pk})
+        antigo = None
+        for tentativa in range(1, 4):
+            reservado = jobs.claim_next(f'w{tentativa}')
+            self.assertEqual(reservado.attempts, tentativa)
+            antigo = antigo or reservado
+            Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+            jobs.requeue_stale(timedelta(minutes=15))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')  # derrubou o worker 3 vezes: não volta mais
+        self.assertIsNone(jobs.claim_next('w4'))
+
+        # O primeiro worker "acorda" depois: não sobrescreve o desfecho
+        with self.assertLogs('apps.gamification.jobs', 'WARNING'):
+            jobs.run_job(antigo)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_service_falls_back_and_signals_rate_limit(self):
+        with self.assertRaises(RateLimited), self.assertLogs('apps.gamification.generation', 'WARNING') as logs:
+            gerar_questoes(self.chapter, client=RateLimitedClient())
+        self.assertEqual(len(logs.output), 2)  # tentou os dois modelos
+
+        class RespostaInvalida:
+            def generate(self, prompt, model, json_output=False):
+                return "```json\n[{\"enunciado\": \"Sem alternativas\"}]\n```"
+
+        with self.assertRaises(LLMError):
+            gerar_questoes(self.chapter, client=RespostaInvalida())
+        self.assertFalse(Questao.objects.exists())
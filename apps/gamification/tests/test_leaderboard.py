@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.utils import timezone
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from apps.accounts.ranks import tiers_for
+from apps.gamification import leaderboard
+from apps.gamification.models import DailyXP, PointTransaction
+from apps.gamification.ledger import bulk_award_xp, credit_xp
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, LEADERBOARD_BUCKET_WIDTH=100)
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        # xp com empates; desempate pela conta mais antiga (menor id)
+        self.users = [
+            User.objects.create(username=f'aluno{i}', ru=f'72000{i:02d}', xp=xp)
+            for i, xp in enumerate([50, 300, 120, 300, 120, 0, 999, 120])
+        ]
+
+    def expected_order(self):
+        return sorted(self.users, key=lambda u: (-u.xp, u.id))
+
+    def test_top_is_deterministic_with_ties(self):
+        top = leaderboard.top(4)
+        ordem = self.expected_order()
+        self.assertEqual([e.user_id for e in top], [u.id for u in ordem[:4]])
+        self.assertEqual([e.position for e in top], [1, 2, 3, 4])
+
+    def test_rank_matches_full_sort(self):
+        for position, user in enumerate(self.expected_order(), 1):
+            self.assertEqual(leaderboard.rank_of(user.id, user.xp), position, user.username)
+
+    def test_my_rank_neighbours(self):
+        ordem = self.expected_order()
+        alvo = ordem[4]
+        resultado = leaderboard.my_rank(alvo, k=2)
+
+        self.assertEqual(resultado.position, 5)
+        self.assertEqual(resultado.total, len(self.users))
+        self.assertEqual([e.user_id for e in resultado.above], [ordem[2].id, ordem[3].id])
+        self.assertEqual([e.position for e in resultado.above], [3, 4])
+        self.assertEqual([e.user_id for e in resultado.below], [ordem[5].id, ordem[6].id])
+        self.assertEqual([e.position for e in resultado.below], [6, 7])
+
+    def test_rank_uses_cached_histogram(self):
+        user = self.expected_order()[-1]
+        leaderboard.rank_of(user.id, user.xp)
+        # Histograma em cache: só a contagem dentro da faixa vai ao banco
+        with self.assertNumQueries(1):
+            self.assertEqual(leaderboard.rank_of(user.id, user.xp), len(self.users))
+
+    def test_dashboard_shows_position(self):
+        user = self.expected_order()[-1]
+        self.client.force_login(user)
+        response = self.client.get(reverse('accounts:dashboard'))
+        self.assertContains(response, f"Sua posição: #{len(self.users)} de {len(self.users)}")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class WindowedLeaderboardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ana = User.objects.create(username='ana', ru='7300001')
+        self.bia = User.objects.create(username='bia', ru='7300002')
+
+    def test_rollup_follows_ledger(self):
+        credit_xp(self.ana, 30, "Leitura")
+        credit_xp(self.ana, -5, "Estorno")
+        bulk_award_xp([self.ana.id, self.bia.id], 10, "Bônus")
+
+        hoje = timezone.localdate()
+        self.assertEqual(
+            set(DailyXP.objects.values_list('user__username', 'day', 'xp')),
+            {('ana', hoje, 35), ('bia', hoje, 10)},
+        )
+        top = leaderboard.windowed_top('semana')
+        self.assertEqual([(e.position, e.username, e.xp) for e in top], [(1, 'ana', 35), (2, 'bia', 10)])
+
+    def test_windows_only_count_their_days(self):
+        hoje = date(2026, 10, 14)  # quarta-feira
+        DailyXP.objects.create(user=self.ana, day=date(2026, 10, 12), xp=10)  # esta semana
+        DailyXP.objects.create(user=self.bia, day=date(2026, 10, 2), xp=50)   # este mês
+        DailyXP.objects.create(user=self.ana, day=date(2026, 7, 20), xp=100)  # esta temporada
+
+        def ranking(periodo):
+            return [(e.username, e.xp) for e in leaderboard.windowed_top(periodo, today=hoje)]
+
+        self.assertEqual(ranking('semana'), [('ana', 10)])
+        self.assertEqual(ranking('mes'), [('bia', 50), ('ana', 10)])
+        self.assertEqual(ranking('temporada'), [('ana', 110), ('bia', 50)])
+
+    def test_window_tier_comes_from_total_xp(self):
+        """A soma da semana ordena e é exibida; a patente continua a do XP total"""
+        hoje = date(2026, 10, 14)
+        User.objects.filter(pk=self.ana.pk).update(xp=5000)
+        DailyXP.objects.create(user=self.ana, day=date(2026, 10, 12), xp=10)
+
+        entry, = leaderboard.windowed_top('semana', today=hoje)
+        self.assertEqual(entry.xp, 10)
+        self.assertEqual(entry.tier, tiers_for([5000])[0])
+        self.assertNotEqual(entry.tier, tiers_for([10])[0])
+
+    def test_backfill_rebuilds_from_ledger(self):
+        credit_xp(self.ana, 30, "Leitura")
+        PointTransaction.objects.update(created_at=timezone.now() - timedelta(days=3))
+        credit_xp(self.ana, 5, "Quiz")
+        DailyXP.objects.all().delete()
+
+        call_command('backfill_daily_xp', chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(
+            sorted(DailyXP.objects.values_list('xp', flat=True)), [5, 30]
+        )
+
+    def test_ranking_view(self):
+        credit_xp(self.bia, 15, "Leitura")
+        self.client.force_login(self.ana)
+        response = self.client.get(reverse('gamification:ranking'), {'periodo': 'mes'})
+        self.assertContains(response, 'bia')
+        self.assertContains(response, 'Ranking: Mês')
@@ -0,0 +1,224 @@
+import importlib
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.apps import apps
+from django.test import TestCase, TransactionTestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from datetime import timedelta
+from django.utils import timezone
+from apps.gamification.models import Trail, Chapter, UserProgress, PointTransaction, Medal, UserMedal, BalanceSnapshot
+from apps.gamification.ledger import (
+    AwardType, award_once, has_award, bulk_award_xp, credit_xp, ledger_balances,
+)
+from apps.gamification.archive import LedgerArchive
+
+User = get_user_model()
+
+class AwardKeyTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='aluno', password='123', ru='4000001')
+        self.trail = Trail.objects.create(title="Trilha", description="Teste")
+        self.chapter = Chapter.objects.create(trail=self.trail, title="Docker", order=1)
+
+    def test_award_is_granted_only_once(self):
+        """O segundo envio devolve o prêmio existente em vez de duplicar"""
+        _, criado = award_once(self.user, AwardType.QUIZ, self.chapter, 40, "Aprovação Quiz")
+        _, criado_de_novo = award_once(self.user, AwardType.QUIZ, self.chapter, 40, "Aprovação Quiz")
+
+        self.assertTrue(criado)
+        self.assertFalse(criado_de_novo)
+        self.assertEqual(PointTransaction.objects.filter(user=self.user).count(), 1)
+        self.assertTrue(has_award(self.user, AwardType.QUIZ, self.chapter))
+        self.assertFalse(has_award(self.user, AwardType.LEITURA, self.chapter))
+
+    def test_legacy_conclusion_counts_for_reading_and_quiz(self):
+        """Um registro legado de conclusão bloqueia novos prêmios de leitura e quiz"""
+        PointTransaction.objects.create(
+            user=self.user, quantity=50, description="x", award_type=AwardType.CONCLUSAO, chapter=self.chapter
+        )
+        self.assertTrue(has_award(self.user, AwardType.LEITURA, self.chapter))
+        _, criado = award_once(self.user, AwardType.QUIZ, self.chapter, 40, "Aprovação Quiz")
+        self.assertFalse(criado)
+
+    def test_backfill_parses_legacy_descriptions(self):
+        """A migração de dados converte as descrições antigas em chaves estruturadas"""
+        title = self.chapter.title
+        leitura = PointTransaction.objects.create(user=self.user, quantity=10, description=f"Leitura: {title}")
+        conclusao = PointTransaction.objects.create(user=self.user, quantity=50, description=f"🏆 Conclusão: {title}")
+        outro = PointTransaction.objects.create(user=self.user, quantity=5, description="Bônus de evento")
+
+        migration = importlib.import_module('apps.gamification.migrations.0017_backfill_award_keys')
+        migration.parse_legacy_descriptions(apps, None)
+
+        leitura.refresh_from_db()
+        conclusao.refresh_from_db()
+        outro.refresh_from_db()
+        self.assertEqual((leitura.award_type, leitura.chapter_id), (AwardType.LEITURA, self.chapter.id))
+        self.assertEqual(conclusao.award_type, AwardType.CONCLUSAO)
+        self.assertEqual((outro.award_type, outro.chapter_id), (AwardType.MANUAL, None))
+
+    def test_backfill_resolves_titles_repeated_across_trails_by_progress(self):
+        """Título repetido em outra trilha: vale a aula que o próprio aluno concluiu"""
+        outra = Chapter.objects.create(trail=Trail.objects.create(title="Outra", description="x"), title="Docker", order=1)
+        UserProgress.objects.create(user=self.user, chapter=outra)
+        sem_progresso = User.objects.create(username='aluno9', ru='4000009')
+        leitura = PointTransaction.objects.create(user=self.user, quantity=10, description="Leitura: Aula 01 - Docker")
+        ambigua = PointTransaction.objects.create(user=sem_progresso, quantity=10, description="Leitura: Docker")
+
+        migration = importlib.import_module('apps.gamification.migrations.0017_backfill_award_keys')
+        migration.parse_legacy_descriptions(apps, None)
+        migration.parse_legacy_descriptions(apps, None)  # a 0032 roda de novo
+
+        leitura.refresh_from_db()
+        ambigua.refresh_from_db()
+        self.assertEqual((leitura.award_type, leitura.chapter_id), (AwardType.LEITURA, outra.id))
+        self.assertTrue(has_award(self.user, AwardType.LEITURA, outra))
+        self.assertFalse(has_award(self.user, AwardType.LEITURA, self.chapter))
+        self.assertEqual((ambigua.award_type, ambigua.chapter_id), (AwardType.MANUAL, None))
+
+
+class BulkAwardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.medal = Medal.objects.create(name="Evento", description="100 pts", min_points=100)
+        self.users = [
+            User.objects.create(username=f'aluno{i}', ru=f'50000{i:02d}')
+            for i in range(25)
+        ]
+        PointTransaction.objects.create(user=self.users[0], quantity=60, description="Leitura")
+
+    def test_bulk_award_updates_ledger_balance_and_medals(self):
+        """Bônus em lote: histórico, saldo e medalhas em blocos, sem signal por linha"""
+        chamadas = []
+        total, medalhas = bulk_award_xp(
+            User.objects.all(), 50, "Bônus Semana Acadêmica", chunk_size=10,
+            progress=lambda feitos, _: chamadas.append(feitos)
+        )
+
+        self.assertEqual(total, 25)
+        self.assertEqual(chamadas, [10, 20, 25])
+        self.assertEqual(PointTransaction.objects.filter(description="Bônus Semana Acadêmica").count(), 25)
+        self.users[0].refresh_from_db()
+        self.users[1].refresh_from_db()
+        self.assertEqual((self.users[0].xp, self.users[1].xp), (110, 50))
+        self.assertEqual(list(UserMedal.objects.values_list('user_id', flat=True)), [self.users[0].id])
+        self.assertEqual(medalhas, 1)
+
+    def test_command_reads_rus_from_csv(self):
+        """O comando aceita um CSV de RUs e ignora os inexistentes com aviso"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write("ru,nome\n5000001,Ana\n5000002,Bia\n9999999,Ninguém\n")
+        self.addCleanup(os.remove, handle.name)
+
+        out = StringIO()
+        call_command('award_xp', amount=30, description="Bônus CSV", csv_path=handle.name, stdout=out)
+
+        self.assertIn("9999999", out.getvalue())
+        self.assertEqual(
+            set(PointTransaction.objects.filter(description="Bônus CSV").values_list('user__ru', flat=True)),
+            {'5000001', '5000002'}
+        )
+
+
+class CreditXpTest(TestCase):
+    def test_credit_uses_f_expression_and_syncs_user(self):
+        """Um objeto de usuário desatualizado não sobrescreve créditos de outra requisição"""
+        user = User.objects.create(username='abas', ru='6000001')
+        outra_aba = User.objects.get(pk=user.pk)
+
+        credit_xp(user, 30, "Aba 1")
+        credit_xp(outra_aba, 20, "Aba 2")
+
+        self.assertEqual(outra_aba.xp, 50)
+        user.refresh_from_db()
+        self.assertEqual(user.xp, 50)
+
+
+class CreditXpConcurrencyTest(TransactionTestCase):
+    def test_concurrent_credits_do_not_lose_updates(self):
+        """Várias threads creditando ao mesmo tempo: saldo final == soma do histórico"""
+        cache.clear()
+        out = StringIO()
+        call_command('benchmark_xp', threads=4, credits=10, stdout=out)
+        self.assertIn("Nenhuma atualização perdida", out.getvalue())
+
+
+class ReconcileTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        Medal.objects.create(name="Bronze", description="10 pts", min_points=10)
+        self.drift = User.objects.create(username='drift', ru='7000001')
+        self.ok = User.objects.create(username='ok', ru='7000002')
+        PointTransaction.objects.create(user=self.drift, quantity=40, description="Quiz")
+        PointTransaction.objects.create(user=self.ok, quantity=5, description="Leitura")
+        # Deriva: edição manual no admin e medalha apagada
+        User.objects.filter(pk=self.drift.pk).update(xp=999)
+        UserMedal.objects.all().delete()
+
+    def test_dry_run_reports_without_writing(self):
+        out = StringIO()
+        call_command('reconcile_gamification', dry_run=True, chunk_size=1, stdout=out)
+
+        self.assertIn("999 -> 40", out.getvalue())
+        self.drift.refresh_from_db()
+        self.assertEqual(self.drift.xp, 999)
+        self.assertFalse(UserMedal.objects.exists())
+
+    def test_reconcile_fixes_balance_and_medals(self):
+        call_command('reconcile_gamification', chunk_size=1, stdout=StringIO())
+
+        self.drift.refresh_from_db()
+        self.ok.refresh_from_db()
+        self.assertEqual((self.drift.xp, self.ok.xp), (40, 5))
+        self.assertEqual(list(UserMedal.objects.values_list('user_id', flat=True)), [self.drift.id])
+
+
+class SnapshotArchiveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='arq', ru='7100001')
+        trail = Trail.objects.create(title="Trilha", description="d")
+        self.chapter = Chapter.objects.create(trail=trail, title="Cap", order=1)
+        for quantity in (10, 20, 30):
+            credit_xp(self.user, quantity, "Bônus antigo")
+        award_once(self.user, AwardType.LEITURA, self.chapter, 10, "Leitura: Cap")
+        # Transações "antigas" (fora da janela de segurança do snapshot)
+        PointTransaction.objects.update(created_at=timezone.now() - timedelta(days=400))
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+
+    def test_snapshot_then_tail_balance(self):
+        call_command('snapshot_balances', stdout=StringIO())
+        credit_xp(self.user, 5, "Novo")
+
+        snapshot = BalanceSnapshot.objects.get(user=self.user)
+        self.assertEqual(snapshot.balance, 70)
+        self.assertEqual(ledger_balances([self.user.id]), {self.user.id: 75})
+
+        # Rodar de novo sem transações elegíveis não duplica snapshots
+        call_command('snapshot_balances', stdout=StringIO())
+        self.assertEqual(BalanceSnapshot.objects.count(), 1)
+
+    def test_archive_moves_covered_rows_out_of_the_database(self):
+        call_command('archive_transactions', days=30, dir=self.archive_dir, stdout=StringIO())
+        # Sem snapshot nada é arquivado
+        self.assertEqual(PointTransaction.objects.count(), 4)
+
+        call_command('snapshot_balances', stdout=StringIO())
+        credit_xp(self.user, 5, "Novo")
+        call_command('archive_transactions', days=30, dir=self.archive_dir, chunk_size=2, stdout=StringIO())
+
+        # Prêmio com chave de capítulo e transação recente continuam no banco
+        restantes = set(PointTransaction.objects.values_list('quantity', 'award_type'))
+        self.assertEqual(restantes, {(10, AwardType.LEITURA), (5, AwardType.MANUAL)})
+        self.assertTrue(has_award(self.user, AwardType.LEITURA, self.chapter))
+        self.assertEqual(ledger_balances([self.user.id]), {self.user.id: 75})
+
+        archive = LedgerArchive(self.archive_dir)
+        self.assertEqual(len(archive.indexes()), 2)
+        self.assertEqual(sorted(r['quantity'] for r in archive.transactions_for(self.user.id)), [10, 20, 30])
+        self.assertEqual(archive.balance_for(self.user.id + 1), 0)
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from apps.gamification.models import Medal, UserMedal, PointTransaction
 
@@ -34,6 +34,7 @@ class MedalLogicTest(TestCase):
         
 from django.urls import reverse
 
+@override_settings(SECURE_SSL_REDIRECT=False)
 class GamificationIntegrationTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='aluno_teste', password='123', ru='4139872')
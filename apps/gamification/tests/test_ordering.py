@@ -0,0 +1,95 @@
+import json
+from importlib import import_module
+
+from django.apps import apps as django_apps
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from apps.gamification.models import Trail, Chapter, SearchEntry
+from apps.gamification.ordering import reorder_chapters
+from apps.gamification.cache import get_content_version
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ChapterOrderingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.trail = Trail.objects.create(title="Python", description="x")
+        self.chapters = [
+            Chapter.objects.create(trail=self.trail, title=f"Tópico {i}") for i in range(1, 6)
+        ]
+
+    def test_titles_are_stored_without_display_prefix(self):
+        first = self.chapters[0]
+        self.assertEqual(first.title, "Tópico 1")
+        self.assertEqual(first.display_title, "Aula 01 - Tópico 1")
+
+        pasted = Chapter.objects.create(trail=self.trail, title="Aula 09 - Copiado")
+        self.assertEqual((pasted.title, pasted.order), ("Copiado", 6))
+
+    def test_prefixed_title_colliding_with_clean_one(self):
+        """Linha que manteve o prefixo (colisão na 0026) continua salvável e é renomeada pela migração"""
+        legado = Chapter.objects.create(trail=self.trail, title="Novo")
+        Chapter.objects.filter(pk=legado.pk).update(title="Aula 02 - Tópico 1")
+        legado.refresh_from_db()
+        legado.xp_value = 70
+        legado.save()
+        self.assertEqual(Chapter.objects.get(pk=legado.pk).title, "Aula 02 - Tópico 1")
+
+        import_module('apps.gamification.migrations.0026_strip_chapter_title_prefix').strip_prefixes(django_apps, None)
+        legado.refresh_from_db()
+        self.assertEqual(legado.title, "Tópico 1 (2)")
+        legado.save()
+
+    def test_reorder_applies_whole_order_with_one_update(self):
+        new_order = [c.id for c in reversed(self.chapters)]
+        version = get_content_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                changed = reorder_chapters(self.trail.id, new_order)
+
+        self.assertEqual(changed, 4)  # a aula do meio não muda de posição
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "gamification_chapter"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(list(self.trail.chapters.order_by('order').values_list('id', flat=True)), new_order)
+        self.assertEqual(
+            SearchEntry.objects.get(kind='chapter', object_id=self.chapters[-1].id).title,
+            "Aula 01 - Tópico 5",
+        )
+        self.assertNotEqual(get_content_version(), version)
+
+    def test_reorder_rejects_incomplete_or_foreign_ids(self):
+        ids = [c.id for c in self.chapters]
+        other = Chapter.objects.create(trail=Trail.objects.create(title="Outra", description="x"), title="X")
+        for bad in (ids[:-1], ids + [ids[0]], ids[:-1] + [other.id]):
+            with self.assertRaises(ValueError):
+                reorder_chapters(self.trail.id, bad)
+        self.assertEqual(Chapter.objects.get(pk=ids[0]).order, 1)
+
+    def test_admin_reorder_endpoint(self):
+        admin = User.objects.create(username='admin', ru='8200001', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        url = reverse('admin:gamification_chapter_reorder', args=[self.trail.id])
+
+        response = self.client.get(url)
+        self.assertContains(response, 'data-id="%d"' % self.chapters[0].id)
+
+        new_order = [c.id for c in self.chapters[1:]] + [self.chapters[0].id]
+        response = self.client.post(url, json.dumps({'order': new_order}), content_type='application/json')
+        self.assertEqual(response.json(), {'ok': True, 'changed': 5})
+        self.assertEqual(Chapter.objects.get(pk=self.chapters[0].id).order, 5)
+
+        response = self.client.post(url, json.dumps({'order': [1]}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_reorder_requires_staff(self):
+        self.client.force_login(User.objects.create(username='aluno', ru='8200002'))
+        url = reverse('admin:gamification_chapter_reorder', args=[self.trail.id])
+        response = self.client.post(url, json.dumps({'order': []}), content_type='application/json')
+        self.assertEqual(response.status_code, 302)
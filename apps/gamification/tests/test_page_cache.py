@@ -0,0 +1,131 @@
+import re
+
+from django.test import Client, TestCase, override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from apps.gamification.models import Trail, Chapter, UserProgress, Technology
+from apps.gamification.ledger import credit_xp
+
+User = get_user_model()
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AnonymousPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.trail = Trail.objects.create(title="Docker na Prática", description="Containers")
+        Technology.objects.get(slug='docker').trails.add(self.trail)
+
+    def test_anonymous_landing_is_served_from_cache(self):
+        """A segunda visita anônima não consulta o banco e envia headers de CDN"""
+        url = reverse('gamification:index')
+        first = self.client.get(url)
+        self.assertEqual(first['X-Page-Cache'], 'MISS')
+        self.assertIn('public', first['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second['X-Page-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+    def test_trail_change_invalidates_cached_pages(self):
+        """Salvar uma trilha invalida as páginas públicas em cache"""
+        url = reverse('gamification:tech_detail', args=['docker'])
+        self.client.get(url)
+
+        self.trail.title = "Docker Avançado"
+        self.trail.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, "Docker Avançado")
+
+    def test_authenticated_users_bypass_cache(self):
+        """Alunos logados sempre recebem a página renderizada para eles"""
+        User.objects.create_user(username='aluno', password='123', ru='2000001')
+        self.client.login(username='aluno', password='123')
+
+        response = self.client.get(reverse('gamification:index'))
+        self.assertNotIn('X-Page-Cache', response)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='etag', ru='7500001')
+        self.trail = Trail.objects.create(title="Git", description="Versionamento")
+        self.chapter = Chapter.objects.create(trail=self.trail, title="Commits", order=1)
+        self.client.force_login(self.user)
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_answer_304(self):
+        for url in (
+            reverse('gamification:index'),
+            reverse('gamification:trail_detail', args=[self.trail.id]),
+            reverse('accounts:dashboard'),
+        ):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200, url)
+            self.assertIn('no-cache', first['Cache-Control'])
+            self.assertTrue(first.has_header('Last-Modified'))
+
+            # Sessão + usuário: a view não chega a rodar
+            with self.assertNumQueries(2):
+                second = self.revalidate(url, first)
+            self.assertEqual(second.status_code, 304, url)
+
+    def test_student_activity_changes_etag(self):
+        url = reverse('gamification:trail_detail', args=[self.trail.id])
+        first = self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProgress.objects.create(user=self.user, chapter=self.chapter)
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+        second = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            credit_xp(self.user, 10, "Bônus")
+        self.assertEqual(self.revalidate(url, second).status_code, 200)
+
+    def test_content_change_changes_etag(self):
+        url = reverse('gamification:index')
+        first = self.client.get(url)
+        Chapter.objects.create(trail=self.trail, title="Branches", order=2)
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_other_students_do_not_share_etag(self):
+        url = reverse('gamification:index')
+        first = self.client.get(url)
+        self.client.force_login(User.objects.create(username='outro', ru='7500002'))
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_new_login_never_reuses_page_with_stale_csrf_token(self):
+        """logout → login → GET condicional → logout: a página nova traz o token válido"""
+        self.user.set_password('senha-segura-123')
+        self.user.save()
+        browser = Client(enforce_csrf_checks=True)
+        url = reverse('gamification:index')
+
+        def login():
+            browser.get(reverse('accounts:login'))
+            browser.post(reverse('accounts:login'), {
+                'username': 'etag', 'password': 'senha-segura-123',
+                'csrfmiddlewaretoken': browser.cookies['csrftoken'].value,
+            })
+
+        def logout(page):
+            token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', page.content).group(1).decode()
+            return browser.post(reverse('accounts:logout'), {'csrfmiddlewaretoken': token})
+
+        login()
+        first = browser.get(url)
+        self.assertEqual(logout(first).status_code, 302)
+
+        login()
+        second = browser.get(url, HTTP_IF_NONE_MATCH=first['ETag'], HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(logout(second).status_code, 302)
@@ -0,0 +1,133 @@
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from apps.gamification.models import Trail, Chapter, UserProgress, UserTrailProgress
+from apps.gamification.progress import resolve_chapter_states
+
+User = get_user_model()
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ChapterUnlockResolverTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='aluno', password='123', ru='1000001')
+        self.trail = Trail.objects.create(title="Trilha Longa", description="Teste")
+        self.chapters = [
+            Chapter.objects.create(trail=self.trail, title=f"Capítulo {i}", order=i)
+            for i in range(1, 6)
+        ]
+
+    def test_states_follow_sequential_unlock(self):
+        """Apenas a primeira aula e a seguinte à última concluída ficam liberadas"""
+        UserProgress.objects.create(user=self.user, chapter=self.chapters[0])
+        states = resolve_chapter_states(self.user, self.trail)
+
+        self.assertTrue(states[self.chapters[0].id].is_completed)
+        self.assertTrue(states[self.chapters[1].id].unlocked)
+        self.assertFalse(states[self.chapters[2].id].unlocked)
+        self.assertEqual(
+            [states[c.id].unlocked for c in self.chapters],
+            [c.is_unlocked(self.user) for c in self.chapters]
+        )
+
+    def test_trail_detail_query_count_does_not_grow_with_chapters(self):
+        """O número de consultas da trail_detail não pode depender do tamanho da trilha"""
+        self.client.login(username='aluno', password='123')
+        url = reverse('gamification:trail_detail', args=[self.trail.id])
+        self.client.get(url)  # aquece os caches de referência (patentes, catálogo)
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+
+        for i in range(6, 31):
+            Chapter.objects.create(trail=self.trail, title=f"Capítulo {i}", order=i)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(small), len(large))
+
+    def test_complete_chapter_blocks_locked_unit(self):
+        """Não é possível concluir uma aula ainda bloqueada"""
+        self.client.login(username='aluno', password='123')
+        self.client.get(reverse('gamification:complete_chapter', args=[self.chapters[3].id]))
+
+        self.assertFalse(UserProgress.objects.filter(user=self.user, chapter=self.chapters[3]).exists())
+
+
+class UserTrailProgressTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='aluno2', password='123', ru='1000002')
+        self.trail = Trail.objects.create(title="Trilha Curta", description="Teste")
+        self.ch1 = Chapter.objects.create(trail=self.trail, title="Um", order=1)
+        self.ch2 = Chapter.objects.create(trail=self.trail, title="Dois", order=2)
+
+    def row(self):
+        return UserTrailProgress.objects.get(user=self.user, trail=self.trail)
+
+    def test_counters_follow_progress_and_chapter_set(self):
+        """Os contadores acompanham conclusões, exclusões e novos capítulos"""
+        UserProgress.objects.create(user=self.user, chapter=self.ch1)
+        UserProgress.objects.create(user=self.user, chapter=self.ch2)
+        self.assertEqual((self.row().completed_chapters, self.row().total_chapters), (2, 2))
+        self.assertTrue(self.row().is_completed)
+
+        Chapter.objects.create(trail=self.trail, title="Três", order=3)
+        self.assertEqual(self.row().total_chapters, 3)
+        self.assertFalse(self.row().is_completed)
+
+        self.ch2.delete()
+        self.assertEqual((self.row().completed_chapters, self.row().total_chapters), (1, 2))
+
+    def test_rebuild_command_backfills(self):
+        """O comando de backfill recria as linhas a partir de UserProgress"""
+        UserProgress.objects.create(user=self.user, chapter=self.ch1)
+        UserTrailProgress.objects.all().delete()
+
+        call_command('rebuild_trail_progress', stdout=StringIO())
+
+        self.assertEqual(self.row().completed_chapters, 1)
+        self.assertEqual(self.row().percent, 50)
+
+    def test_deleting_user_or_trail_with_progress(self):
+        """Exclusões em cascata não recriam linhas de UserTrailProgress para o pai apagado"""
+        UserProgress.objects.create(user=self.user, chapter=self.ch1)
+        outro = User.objects.create_user(username='aluno3', password='123', ru='1000003')
+        UserProgress.objects.create(user=outro, chapter=self.ch1)
+
+        self.user.delete()
+        connection.check_constraints()
+        self.assertFalse(UserTrailProgress.objects.filter(user_id=self.user.pk).exists())
+        self.assertEqual(UserTrailProgress.objects.get(user=outro).completed_chapters, 1)
+
+        self.trail.delete()
+        connection.check_constraints()
+        self.assertFalse(UserTrailProgress.objects.exists())
+
+    def test_first_counted_completion_includes_earlier_progress(self):
+        """Aluno com progresso anterior à tabela desnormalizada não recomeça do zero"""
+        UserProgress.objects.create(user=self.user, chapter=self.ch1)
+        UserTrailProgress.objects.all().delete()
+
+        UserProgress.objects.create(user=self.user, chapter=self.ch2)
+        self.assertEqual(self.row().completed_chapters, 2)
+        self.assertTrue(self.row().is_completed)
+
+    def test_data_migration_backfills_existing_students(self):
+        UserProgress.objects.create(user=self.user, chapter=self.ch1)
+        UserProgress.objects.create(user=self.user, chapter=self.ch2)
+        UserTrailProgress.objects.filter(user=self.user).update(completed_chapters=1, is_completed=False)
+
+        migration = import_module('apps.gamification.migrations.0031_backfill_trail_progress')
+        migration.backfill_trail_progress(django_apps, None)
+        self.assertEqual(self.row().completed_chapters, 2)
+        self.assertTrue(self.row().is_completed)
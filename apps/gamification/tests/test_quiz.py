@@ -0,0 +1,116 @@
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from apps.gamification.models import Trail, Chapter, Questao, Alternativa, QuizAttempt, QuizAnswer
+from apps.gamification.checks import shared_cache_check
+from apps.gamification.quiz import get_answer_key, grade_submission, record_attempt, chapter_statistics
+
+User = get_user_model()
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AnswerKeyGradingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.trail = Trail.objects.create(title="Trilha", description="Teste")
+        self.chapter = Chapter.objects.create(trail=self.trail, title="Quiz", order=1)
+        self.corretas = []
+        self.erradas = []
+        for i in range(5):
+            q = Questao.objects.create(chapter=self.chapter, enunciado=f"Pergunta {i}?")
+            self.corretas.append(Alternativa.objects.create(questao=q, texto="Certa", e_correta=True))
+            self.erradas.append(Alternativa.objects.create(questao=q, texto="Errada"))
+
+    def submission(self, alternativas):
+        return {f'questao_{alt.questao_id}': str(alt.id) for alt in alternativas}
+
+    def test_grading_runs_without_queries(self):
+        """Com o gabarito em cache, corrigir uma submissão não acessa o banco"""
+        get_answer_key(self.chapter.id)
+        with self.assertNumQueries(0):
+            resultado = grade_submission(get_answer_key(self.chapter.id), self.submission(self.corretas[:4]))
+
+        self.assertEqual((resultado.acertos, resultado.total), (4, 5))
+        self.assertTrue(resultado.aprovado)
+        self.assertEqual(resultado.detalhes[4]['escolha'], "Não respondida")
+
+    def test_alternative_from_other_question_is_wrong(self):
+        """Enviar a alternativa correta de outra questão não conta como acerto"""
+        data = {f'questao_{self.corretas[0].questao_id}': str(self.corretas[1].id)}
+        resultado = grade_submission(get_answer_key(self.chapter.id), data)
+        self.assertEqual(resultado.acertos, 0)
+
+    def test_key_is_rebuilt_when_alternatives_change(self):
+        """Mudar o gabarito no admin invalida o cache do capítulo"""
+        get_answer_key(self.chapter.id)
+        self.erradas[0].e_correta = True
+        self.erradas[0].save()
+
+        resultado = grade_submission(get_answer_key(self.chapter.id), self.submission([self.erradas[0]]))
+        self.assertEqual(resultado.acertos, 1)
+
+    def test_key_expires_when_invalidation_comes_from_another_process(self):
+        """Sem o signal (ex.: worker em outro processo), o gabarito vence em REFERENCE_CACHE_TIMEOUT"""
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            get_answer_key(self.chapter.id)
+        self.assertEqual(cache_set.call_args.args[2], settings.REFERENCE_CACHE_TIMEOUT)
+
+    def test_deploy_check_warns_about_local_memory_cache(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([w.id for w in shared_cache_check(None)], ['gamification.W001'])
+        with override_settings(CACHES=redis):
+            self.assertEqual(shared_cache_check(None), [])
+
+    def test_quiz_post_uses_compiled_key(self):
+        """O POST do quiz aprova o aluno usando a correção em memória"""
+        User.objects.create_user(username='aluno', password='123', ru='3000001')
+        self.client.login(username='aluno', password='123')
+        response = self.client.post(
+            reverse('gamification:exibir_quiz', args=[self.chapter.slug]),
+            self.submission(self.corretas)
+        )
+        self.assertEqual(response.context['acertos'], 5)
+        self.assertTrue(response.context['aprovado'])
+
+    def test_benchmark_command_reports_both_strategies(self):
+        out = StringIO()
+        call_command('benchmark_quiz', self.chapter.id, submissions=20, stdout=out)
+        self.assertIn("Antes (legado)", out.getvalue())
+        self.assertIn("Depois (gabarito)", out.getvalue())
+
+    def test_attempt_log_and_counters(self):
+        """Cada submissão gera o log em lote e atualiza os contadores por questão"""
+        user = User.objects.create_user(username='aluno2', password='123', ru='3000002')
+        key = get_answer_key(self.chapter.id)
+
+        for alternativas in (self.corretas, self.erradas[:1] + self.corretas[1:]):
+            record_attempt(user, self.chapter.id, grade_submission(key, self.submission(alternativas)))
+
+        self.assertEqual(QuizAttempt.objects.filter(user=user).count(), 2)
+        self.assertEqual(QuizAnswer.objects.filter(attempt__user=user).count(), 10)
+
+        stats = chapter_statistics(self.chapter.id)
+        self.assertEqual(stats[0]['tentativas'], 2)
+        self.assertEqual(stats[0]['taxa_acerto'], 50.0)
+        self.assertEqual([alt['escolhas'] for alt in stats[0]['alternativas']], [1, 1])
+        self.assertEqual(stats[1]['taxa_acerto'], 100.0)
+
+    def test_admin_pages_show_quiz_statistics(self):
+        """Página da aula, lista de questões e log de tentativas abrem com os contadores"""
+        admin = User.objects.create(username='admin', ru='3000003', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        record_attempt(admin, self.chapter.id, grade_submission(get_answer_key(self.chapter.id), self.submission(self.corretas)))
+
+        response = self.client.get(reverse('admin:gamification_chapter_change', args=[self.chapter.id]))
+        self.assertContains(response, '<th>Tentativas</th>', html=False)
+        self.assertContains(response, '<td>100.0%</td>', html=False)
+        for name in ('questao', 'quizattempt'):
+            response = self.client.get(reverse(f'admin:gamification_{name}_changelist'))
+            self.assertEqual(response.status_code, 200, name)
@@ -0,0 +1,63 @@
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from apps.gamification.models import Trail, Chapter, UserProgress, TrailRecommendation
+from apps.gamification.recommendations import suggest_trail_ids
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TrailRecommendationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.trails = {}
+        for title in ("Python", "Django", "Docker", "Excel", "Figma"):
+            trail = Trail.objects.create(title=title, description="d")
+            chapter = Chapter.objects.create(trail=trail, title=f"{title} 1", order=1)
+            self.trails[title] = (trail, chapter)
+
+        # Quem faz Python também faz Django; Excel é a mais popular entre todos
+        matriculas = {
+            'a1': ["Python", "Django", "Excel"],
+            'a2': ["Python", "Django"],
+            'a3': ["Python", "Docker"],
+            'a4': ["Excel"],
+            'a5': ["Excel", "Figma"],
+            'a6': ["Excel"],
+        }
+        for i, (username, titles) in enumerate(matriculas.items()):
+            user = User.objects.create(username=username, ru=f'77000{i}')
+            for title in titles:
+                UserProgress.objects.create(user=user, chapter=self.trails[title][1])
+
+    def ids(self, *titles):
+        return [self.trails[title][0].id for title in titles]
+
+    def test_command_stores_top_k_neighbours(self):
+        call_command('build_recommendations', top_k=2, chunk_size=2, stdout=StringIO())
+
+        python = self.trails["Python"][0]
+        vizinhos = list(
+            TrailRecommendation.objects.filter(trail=python).values_list('recommended__title', 'rank')
+        )
+        self.assertEqual(vizinhos, [("Django", 1), ("Docker", 2)])
+        self.assertFalse(TrailRecommendation.objects.filter(trail=python, recommended=python).exists())
+
+    def test_suggestions_merge_neighbours_then_popularity(self):
+        call_command('build_recommendations', stdout=StringIO())
+        todas = self.ids("Python", "Django", "Docker", "Excel", "Figma")
+
+        self.assertEqual(suggest_trail_ids(self.ids("Python"), todas, n=2), self.ids("Django", "Docker"))
+        # Sem trilhas iniciadas: ordem de popularidade
+        self.assertEqual(suggest_trail_ids([], todas, n=2), self.ids("Excel", "Python"))
+
+    def test_home_uses_suggestions(self):
+        call_command('build_recommendations', stdout=StringIO())
+        self.client.force_login(User.objects.get(username='a2'))
+        response = self.client.get(reverse('gamification:index'))
+        sugeridas = [t.title for t in response.context['suggested_trails']]
+        self.assertEqual(sugeridas[:2], ["Excel", "Docker"])
@@ -0,0 +1,27 @@
+from unittest import mock
+from django.test import TestCase
+from apps.gamification.models import Trail, Chapter
+from apps.gamification import rendering
+
+class ChapterRenderCacheTest(TestCase):
+    def setUp(self):
+        self.trail = Trail.objects.create(title="Trilha", description="Teste")
+        self.chapter = Chapter.objects.create(trail=self.trail, title="Markdown", order=1, content="# Olá")
+
+    def test_html_is_rendered_on_save(self):
+        """O HTML fica salvo junto com o hash da versão do conteúdo"""
+        self.chapter.refresh_from_db()
+        self.assertIn("<h1>Olá</h1>", self.chapter.content_html)
+        self.assertEqual(self.chapter.content_hash, rendering.content_hash("# Olá"))
+
+        self.chapter.content = "**novo**"
+        self.chapter.save(update_fields=['content'])
+        self.chapter.refresh_from_db()
+        self.assertIn("<strong>novo</strong>", self.chapter.content_html)
+
+    def test_unchanged_content_is_not_rendered_again(self):
+        """Salvar sem mudar o conteúdo não chama o Markdown de novo"""
+        with mock.patch.object(rendering, 'render_markdown') as render:
+            self.chapter.title = "Outro título"
+            self.chapter.save()
+        render.assert_not_called()
@@ -0,0 +1,62 @@
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from apps.gamification.models import Trail, Chapter, Questao, SearchEntry, Technology
+from apps.gamification.search import search
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FullTextSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.docker = Trail.objects.create(title="Docker na Prática", description="Containers e imagens")
+        self.python = Trail.objects.create(title="Python", description="Lógica de programação")
+        self.chapter = Chapter.objects.create(
+            trail=self.python, title="Funções", order=1,
+            content="# Funções\n\nUma **função** agrupa instruções <script>reutilizáveis</script>."
+        )
+        self.questao = Questao.objects.create(chapter=self.chapter, enunciado="O que retorna uma função sem return?")
+
+    def test_search_covers_all_document_kinds(self):
+        kinds = {(r.kind, r.object_id) for r in search("funcao")}
+        self.assertEqual(kinds, {('chapter', self.chapter.id), ('questao', self.questao.id)})
+        self.assertEqual([r.object_id for r in search("contain")], [self.docker.id])
+
+    def test_title_matches_rank_first_and_snippet_is_highlighted_and_escaped(self):
+        resultados = search("funções")
+        self.assertEqual(resultados[0].kind, 'chapter')
+        self.assertIn('<mark>', resultados[0].snippet)
+        self.assertNotIn('<script>', resultados[0].snippet)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.docker.title = "Kubernetes"
+        self.docker.save()
+        self.assertEqual(search("docker"), [])
+        self.assertEqual([r.object_id for r in search("kubernetes")], [self.docker.id])
+
+        self.python.delete()
+        self.assertEqual(search("funcao"), [])
+        self.assertFalse(SearchEntry.objects.filter(kind='questao').exists())
+
+    def test_reindex_command(self):
+        SearchEntry.objects.all().delete()
+        call_command('reindex_search', stdout=StringIO())
+        self.assertEqual(SearchEntry.objects.count(), 4)
+        self.assertEqual(len(search("programacao")), 1)
+
+    def test_search_view_and_tech_detail(self):
+        self.client.force_login(User.objects.create(username='busca', ru='7800001'))
+        response = self.client.get(reverse('gamification:search'), {'q': 'retorna'})
+        self.assertContains(response, 'Questão')
+        self.assertContains(response, '<mark>retorna</mark>')
+
+        docker = Trail.objects.get(title='Docker na Prática')
+        Technology.objects.get(slug='docker').trails.add(docker)
+        response = self.client.get(reverse('gamification:tech_detail', args=['docker']))
+        self.assertContains(response, 'Docker na Prática')
+        self.assertNotContains(response, '>Python<')
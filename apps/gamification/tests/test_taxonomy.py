@@ -0,0 +1,73 @@
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from apps.gamification.models import Trail, Chapter, Technology
+from apps.gamification.taxonomy import get_technologies, technology_by_slug
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TechnologyTaxonomyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.docker = Trail.objects.create(title="Containers com Docker", description="d")
+        self.sql = Trail.objects.create(title="Banco de Dados Relacional", description="d")
+        self.outra = Trail.objects.create(title="Soft Skills", description="d")
+        Chapter.objects.create(trail=self.docker, title="Imagens Docker", order=1)
+        Chapter.objects.create(trail=self.sql, title="Consultas SQL", order=1)
+
+    def test_seeded_technologies_keep_legacy_slugs(self):
+        self.assertEqual(
+            [t.slug for t in get_technologies()],
+            ["python", "docker", "js", "database", "git-alt", "cloud"],
+        )
+
+    def test_auto_tag_and_cached_counts(self):
+        call_command('tag_technologies', stdout=StringIO())
+
+        docker = technology_by_slug('docker')
+        self.assertEqual(docker.trail_ids, (self.docker.id,))
+        self.assertEqual(docker.num_chapters, 1)
+        self.assertEqual(technology_by_slug('database').trail_ids, (self.sql.id,))
+
+        with self.assertNumQueries(0):
+            technology_by_slug('docker')
+
+    def test_data_migration_tags_existing_content(self):
+        migration = import_module('apps.gamification.migrations.0029_tag_existing_content')
+        migration.tag_existing_content(django_apps, None)
+        migration.tag_existing_content(django_apps, None)  # idempotente
+
+        self.assertEqual(list(Technology.objects.get(slug='docker').trails.all()), [self.docker])
+        self.assertEqual(Technology.objects.get(slug='database').chapters.count(), 1)
+        self.assertFalse(self.outra.technologies.exists())
+
+    def test_seed_data_tags_the_seeded_trail(self):
+        call_command('seed_data', stdout=StringIO())
+        trail = Trail.objects.get(title="Dominando Python e Django")
+        self.assertTrue(trail.technologies.filter(slug='python').exists())
+
+    def test_manual_tag_invalidates_cache(self):
+        get_technologies()
+        Technology.objects.get(slug='python').trails.add(self.outra)
+        self.assertEqual(technology_by_slug('python').trail_ids, (self.outra.id,))
+
+    def test_tech_detail_and_home_strip(self):
+        Technology.objects.get(slug='docker').trails.add(self.docker)
+
+        response = self.client.get(reverse('gamification:tech_detail', args=['docker']))
+        self.assertContains(response, "Containers com Docker")
+        self.assertNotContains(response, "Soft Skills")
+        self.assertEqual(self.client.get(reverse('gamification:tech_detail', args=['cobol'])).status_code, 404)
+
+        self.client.force_login(User.objects.create(username='tax', ru='7900001'))
+        response = self.client.get(reverse('gamification:index'))
+        self.assertContains(response, 'fab fa-docker')
+        self.assertContains(response, '1 trilha ·')
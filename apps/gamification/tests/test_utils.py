@@ -1,7 +1,10 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.db import connection
 from django.contrib.auth import get_user_model
 from apps.gamification.models import Medal, PointTransaction, UserMedal
-from apps.gamification.utils import check_user_medals
+from apps.gamification.utils import check_user_medals, medals_crossed
 
 User = get_user_model()
 
@@ -45,4 +48,38 @@ class UtilsGamificationTest(TestCase):
         
         # Tenta rodar de novo
         conquered_again = check_user_medals(self.user)
-        self.assertEqual(len(conquered_again), 0) # Não deve ganhar nada novo
\ No newline at end of file
+        self.assertEqual(len(conquered_again), 0) # Não deve ganhar nada novo
+
+class IncrementalMedalTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='incremental', password='123', ru='4139873')
+        self.bronze = Medal.objects.create(name="Bronze", description="10 pts", min_points=10)
+        self.prata = Medal.objects.create(name="Prata", description="50 pts", min_points=50)
+
+    def test_crossed_thresholds_use_bisect_interval(self):
+        """Só entram as medalhas com limiar entre o saldo antigo e o novo"""
+        self.assertEqual([name for _, name in medals_crossed(5, 50)], ["Bronze", "Prata"])
+        self.assertEqual([name for _, name in medals_crossed(10, 49)], [])
+
+    def test_transaction_updates_balance_without_summing_ledger(self):
+        """Cada transação atualiza User.xp e avalia medalhas sem SUM no histórico"""
+        for _ in range(5):
+            PointTransaction.objects.create(user=self.user, quantity=5, description="Lote")
+
+        with CaptureQueriesContext(connection) as queries:
+            PointTransaction.objects.create(user=self.user, quantity=25, description="Bônus")
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.xp, 50)
+        self.assertFalse(any('SUM(' in q['sql'].upper() for q in queries))
+        self.assertEqual(
+            set(UserMedal.objects.filter(user=self.user).values_list('medal__name', flat=True)),
+            {"Bronze", "Prata"}
+        )
+
+    def test_thresholds_refresh_when_medal_changes(self):
+        """Criar uma medalha invalida a estrutura cacheada de limiares"""
+        medals_crossed(0, 100)
+        Medal.objects.create(name="Ouro", description="80 pts", min_points=80)
+        self.assertIn("Ouro", [name for _, name in medals_crossed(0, 100)])
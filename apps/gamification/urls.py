@@ -18,6 +18,8 @@ urlpatterns = [
     
     # Rota de Conversão e Vendas (Pilar da Monetização)
     path('checkout/', views.checkout, name='checkout'),
+    path('ranking/', views.ranking, name='ranking'),
+    path('busca/', views.search_view, name='search'),
     path('tecnologia/<str:tech_slug>/', views.tech_detail, name='tech_detail'),
     # Rota para exibir o quiz de um capítulo específico
     path('capitulo/<slug:slug>/quiz/', views.exibir_quiz, name='exibir_quiz'),
@@ -1,40 +1,82 @@
-from django.db.models import Sum
-from django.db import transaction
+from bisect import bisect_right
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
 from typing import List
-from .models import PointTransaction, Medal, UserMedal
+from .cache import bump_user_versions
+from .models import Medal, UserMedal
+
+MEDAL_THRESHOLDS_CACHE_KEY = 'gamification:medal_thresholds'
+
+
+def get_medal_thresholds():
+    """
+    Limiares das medalhas em estrutura ordenada e cacheada:
+    (pontos_ordenados, [(medal_id, nome), ...]) na mesma ordem.
+    Invalidada pelos signals de Medal.
+    """
+    thresholds = cache.get(MEDAL_THRESHOLDS_CACHE_KEY)
+    if thresholds is None:
+        medals = list(Medal.objects.order_by('min_points', 'id').values_list('min_points', 'id', 'name'))
+        thresholds = (
+            tuple(points for points, _, _ in medals),
+            tuple((medal_id, name) for _, medal_id, name in medals),
+        )
+        cache.set(MEDAL_THRESHOLDS_CACHE_KEY, thresholds, settings.REFERENCE_CACHE_TIMEOUT)
+    return thresholds
+
+
+def invalidate_medal_thresholds():
+    cache.delete(MEDAL_THRESHOLDS_CACHE_KEY)
+
+
+def medals_crossed(old_xp, new_xp):
+    """Medalhas cujo limiar está no intervalo (old_xp, new_xp], via bisect."""
+    if new_xp <= old_xp:
+        return []
+    points, medals = get_medal_thresholds()
+    return list(medals[bisect_right(points, old_xp):bisect_right(points, new_xp)])
+
+
+def award_crossed_medals(user_id, old_xp, new_xp) -> List[str]:
+    """
+    Avaliação incremental: concede apenas as medalhas cruzadas entre o saldo
+    anterior e o novo. Sem somar o histórico de transações.
+    """
+    crossed = medals_crossed(old_xp, new_xp)
+    if crossed:
+        UserMedal.objects.bulk_create(
+            [UserMedal(user_id=user_id, medal_id=medal_id) for medal_id, _ in crossed],
+            ignore_conflicts=True
+        )
+    return [name for _, name in crossed]
+
 
 def check_user_medals(user) -> List[str]:
     """
-    Motor de Conquistas Otimizado:
-    - Calcula o saldo real de XP via transações.
-    - Identifica medalhas não conquistadas de forma performática.
+    Motor de Conquistas (recuperação completa):
+    - Lê o saldo corrente (User.xp), mantido a cada transação.
+    - Identifica medalhas não conquistadas via limiares cacheados.
     - Registra novas conquistas em lote (bulk_create).
     """
-    
-    # 1. Recupera o XP total acumulado através do histórico de transações
-    # Usamos o aggregate para processamento direto no banco de dados (mais rápido)
-    total_xp = PointTransaction.objects.filter(user=user).aggregate(
-        Sum('quantity')
-    )['quantity__sum'] or 0
-    
-    # 2. Busca IDs de medalhas que o usuário já conquistou para evitar duplicidade
-    earned_medal_ids = UserMedal.objects.filter(user=user).values_list('medal_id', flat=True)
-
-    # 3. Filtra medalhas que o usuário atingiu o critério mas ainda não possui
-    new_available_medals = Medal.objects.exclude(
-        id__in=earned_medal_ids
-    ).filter(min_points__lte=total_xp)
-
-    conquered_names = []
-    new_user_medals = []
-
-    # 4. Prepara os objetos para inserção em lote
-    for medal in new_available_medals:
-        new_user_medals.append(UserMedal(user=user, medal=medal))
-        conquered_names.append(medal.name)
-
-    # 5. Lógica Sênior: Bulk Create (Uma única transação para N medalhas)
-    if new_user_medals:
-        UserMedal.objects.bulk_create(new_user_medals)
-        
-    return conquered_names
\ No newline at end of file
+    User = get_user_model()
+    total_xp = User.objects.filter(pk=user.pk).values_list('xp', flat=True).first() or 0
+
+    points, medals = get_medal_thresholds()
+    eligible = medals[:bisect_right(points, total_xp)]
+    if not eligible:
+        return []
+
+    # Busca IDs de medalhas que o usuário já conquistou para evitar duplicidade
+    earned_medal_ids = set(UserMedal.objects.filter(user=user).values_list('medal_id', flat=True))
+    missing = [(medal_id, name) for medal_id, name in eligible if medal_id not in earned_medal_ids]
+
+    # Bulk Create (uma única transação para N medalhas)
+    if missing:
+        UserMedal.objects.bulk_create(
+            [UserMedal(user=user, medal_id=medal_id) for medal_id, _ in missing],
+            ignore_conflicts=True
+        )
+        bump_user_versions([user.pk])
+
+    return [name for _, name in missing]
@@ -1,68 +1,80 @@
-import markdown
 import logging
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
 from django.utils.safestring import mark_safe
-from django.http import HttpRequest, HttpResponse
-from django.db.models import Count, Q 
+from django.http import Http404, HttpRequest, HttpResponse
 from django.utils import timezone
 
 # Importações dos modelos
-from .models import Trail, Chapter, PointTransaction, UserProgress, Alternativa, Questao
-from .utils import check_user_medals
+from .models import Trail, Chapter, PointTransaction, UserProgress, UserTrailProgress
+from .progress import resolve_chapter_states
+from .rendering import refresh_rendered_content
+from .catalog import get_catalog
+from .recommendations import suggest_trail_ids
+from .search import search
+from .taxonomy import get_technologies, technology_by_slug
+from .cache import anonymous_page_cache, bump_user_versions, user_conditional_page
+from .quiz import get_answer_key, grade_submission, record_attempt
+from .ledger import AwardType, award_once, has_award
+from . import leaderboard
 
 logger = logging.getLogger(__name__)
 
 # --- 1. HOME / INDEX ---
+@anonymous_page_cache()
+@user_conditional_page()
 def index(request):
-    all_trails = Trail.objects.annotate(num_chapters=Count('chapters'))
+    # Catálogo versionado em cache: trilhas com nº de aulas e XP já calculados
+    all_trails = get_catalog()
 
     if not request.user.is_authenticated:
         return render(request, 'gamification/index.html', {'all_trails': all_trails})
 
     user = request.user
-    started_ids = UserProgress.objects.filter(user=user).values_list('chapter__trail_id', flat=True).distinct()
-    my_trails = all_trails.filter(id__in=started_ids)
-    suggested_trails = all_trails.exclude(id__in=started_ids)[:4]
-
-    total_sys = Chapter.objects.count()
-    total_done = UserProgress.objects.filter(user=user, completed_at__isnull=False).count()
+    trail_progress = list(UserTrailProgress.objects.filter(user=user))
+    started_ids = {p.trail_id for p in trail_progress if p.completed_chapters > 0}
+    my_trails = [t for t in all_trails if t.id in started_ids]
+    # Vizinhos pré-calculados (build_recommendations) das trilhas iniciadas; fallback: populares
+    by_id = {t.id: t for t in all_trails}
+    suggested_trails = [by_id[trail_id] for trail_id in suggest_trail_ids(started_ids, list(by_id), n=4)]
+
+    total_sys = sum(t.num_chapters for t in all_trails)
+    total_done = sum(p.completed_chapters for p in trail_progress)
     overall_progress = int((total_done / total_sys) * 100) if total_sys > 0 else 0
 
     context = {
         'my_trails': my_trails,
         'suggested_trails': suggested_trails,
         'overall_progress': overall_progress,
-        'tech_list': ["python", "docker", "js", "database", "git-alt", "cloud"],
+        'tech_list': get_technologies(),
     }
     return render(request, 'gamification/home.html', context)
 
 # --- 2. LISTAGENS ---
 @login_required
 def trail_list(request):
-    trails = Trail.objects.all()
-    return render(request, 'gamification/trail_list.html', {'trails': trails})
+    return render(request, 'gamification/trail_list.html', {'trails': get_catalog()})
 
 @login_required
+@user_conditional_page()
 def trail_detail(request, trail_id):
     trail = get_object_or_404(Trail, id=trail_id)
-    chapters = trail.chapters.all().order_by('order')
-    
-    completed_ids = UserProgress.objects.filter(
-        user=request.user, 
-        chapter__trail=trail, 
-        completed_at__isnull=False
-    ).values_list('chapter_id', flat=True)
-
-    progress = 0
-    if chapters.count() > 0:
-        progress = (len(completed_ids) / chapters.count()) * 100
+    chapters = list(trail.chapters.all().order_by('order'))
 
+    # Resolução em lote: duas consultas para a trilha inteira (antes eram 2 por capítulo)
+    states = resolve_chapter_states(request.user, trail, chapters=chapters)
+    completed_count = 0
     for chapter in chapters:
-        chapter.is_completed = chapter.id in completed_ids
-        chapter.unlocked = chapter.is_unlocked(request.user)
+        state = states[chapter.id]
+        chapter.is_completed = state.is_completed
+        chapter.unlocked = state.unlocked
+        completed_count += state.is_completed
+
+    progress = 0
+    if chapters:
+        progress = (completed_count / len(chapters)) * 100
 
     return render(request, 'gamification/trail_detail.html', {
         'trail': trail, 'chapters': chapters, 'progress': progress
@@ -74,27 +86,31 @@ def chapter_detail(request, chapter_id):
     chapter = get_object_or_404(Chapter, id=chapter_id)
     if not chapter.is_unlocked(request.user):
         messages.error(request, "🛡️ Unidade Bloqueada.")
-        return redirect('gamification:trail_detail', trail_id=chapter.trail.id)
-
-    html_output = markdown.markdown(chapter.content or "", extensions=['fenced_code', 'codehilite', 'tables'])
-    chapter.content_html = mark_safe(html_output)
+        return redirect('gamification:trail_detail', trail_id=chapter.trail_id)
+
+    # HTML pré-renderizado no save; só renderiza aqui se o cache estiver desatualizado
+    if refresh_rendered_content(chapter):
+        Chapter.objects.filter(pk=chapter.pk).update(
+            content_html=chapter.content_html, content_hash=chapter.content_hash
+        )
+    chapter.content_html = mark_safe(chapter.content_html)
     return render(request, 'gamification/chapter_detail.html', {'chapter': chapter})
 
 @login_required
 def complete_chapter(request, chapter_id):
     chapter = get_object_or_404(Chapter, id=chapter_id)
     user = request.user
-    xp_leitura = int(chapter.xp_value * 0.2)
+    if not chapter.is_unlocked(user):
+        messages.error(request, "🛡️ Unidade Bloqueada.")
+        return redirect('gamification:trail_detail', trail_id=chapter.trail_id)
 
-    ja_ganhou_leitura = PointTransaction.objects.filter(user=user).filter(
-        Q(description=f"Leitura: {chapter.title}") | Q(description__icontains=f"Conclusão: {chapter.title}")
-    ).exists()
+    xp_leitura = int(chapter.xp_value * 0.2)
 
-    if not ja_ganhou_leitura:
-        with transaction.atomic():
-            PointTransaction.objects.create(user=user, quantity=xp_leitura, description=f"Leitura: {chapter.title}")
-            user.xp += xp_leitura
-            user.save()
+    # Idempotência pela chave estruturada (aluno, tipo, capítulo) com índice único
+    with transaction.atomic():
+        _, criado = award_once(user, AwardType.LEITURA, chapter, xp_leitura, f"Leitura: {chapter.display_title}")
+        if criado:
+            # award_once credita via F() e já devolve o saldo atualizado em `user.xp`
             UserProgress.objects.get_or_create(user=user, chapter=chapter)
             messages.success(request, f"🛡️ Checkpoint: +{xp_leitura} XP garantidos!")
 
@@ -114,65 +130,37 @@ def exibir_quiz(request, slug):
     # Define o valor do Quiz (80% do total do capítulo)
     xp_quiz = int(capitulo.xp_value * 0.8)
 
-    # Verifica se já recebeu pontos (Método Novo ou Legado)
-    ja_ganhou_antes = PointTransaction.objects.filter(user=user).filter(
-        Q(description=f"Aprovação Quiz: {capitulo.title}") | 
-        Q(description__icontains=f"Conclusão: {capitulo.title}")
-    ).exists()
+    # Verifica se já recebeu pontos (Método Novo ou Legado) via chave estruturada
+    ja_ganhou_antes = has_award(user, AwardType.QUIZ, capitulo)
     
     if request.method == "POST":
-        acertos = 0
-        total = questoes.count()
-        detalhes = []
-
-        for q in questoes:
-            alt_id = request.POST.get(f'questao_{q.id}')
-            escolha = Alternativa.objects.filter(id=alt_id).first() if alt_id else None
-            correta = q.alternativas.filter(e_correta=True).first()
-            
-            is_correct = bool(escolha and escolha.e_correta)
-            if is_correct: 
-                acertos += 1
-            
-            detalhes.append({
-                'pergunta': q.enunciado,
-                'escolha': escolha.texto if escolha else "Não respondida",
-                'correta': correta.texto if correta else "N/A",
-                'foi_correta': is_correct
-            })
-
-        percentual = (acertos / total * 100) if total > 0 else 0
-        aprovado = percentual >= 70
+        # Correção em memória a partir do gabarito compilado (em cache)
+        resultado = grade_submission(get_answer_key(capitulo.id), request.POST)
+        record_attempt(user, capitulo.id, resultado)
         pode_receber_pontos = False
 
-        if aprovado:
+        if resultado.aprovado:
             with transaction.atomic():
                 # Marca a conclusão real (preenche a barra de sincronia)
                 prog, _ = UserProgress.objects.get_or_create(user=user, chapter=capitulo)
                 prog.completed_at = timezone.now()
                 prog.save()
 
-                if not ja_ganhou_antes:
-                    # Registra os 80% de XP
-                    PointTransaction.objects.create(
-                        user=user, 
-                        quantity=xp_quiz, 
-                        description=f"Aprovação Quiz: {capitulo.title}"
-                    )
-                    user.xp += xp_quiz
-                    user.save(update_fields=['xp'])
-                    
-                    # Verifica medalhas
-                    check_user_medals(user)
+                # Registra os 80% de XP (no máximo uma vez, mesmo com duplo envio)
+                _, criado = award_once(
+                    user, AwardType.QUIZ, capitulo, xp_quiz, f"Aprovação Quiz: {capitulo.display_title}"
+                )
+                if criado:
+                    # Saldo (F()) e medalhas avaliados uma única vez pela transação
                     pode_receber_pontos = True
 
         return render(request, 'gamification/quiz_resultado.html', {
             'capitulo': capitulo, 
-            'aprovado': aprovado, 
-            'percentual': int(percentual),
-            'acertos': acertos, 
-            'total': total, 
-            'resultados': detalhes, 
+            'aprovado': resultado.aprovado, 
+            'percentual': int(resultado.percentual),
+            'acertos': resultado.acertos, 
+            'total': resultado.total, 
+            'resultados': resultado.detalhes, 
             'pontos': xp_quiz, # Usado para exibir o valor ganho
             'pode_receber_pontos': pode_receber_pontos,
             'ja_ganhou_pontos': ja_ganhou_antes
@@ -191,14 +179,43 @@ def exibir_quiz(request, slug):
 def checkout(request):
     if request.method == "POST":
         request.user.is_plus = True
-        request.user.save()
+        # Só o campo alterado: não sobrescreve o saldo de XP creditado em paralelo
+        request.user.save(update_fields=['is_plus'])
+        # Páginas condicionais (ETag) do aluno mudam com a assinatura
+        bump_user_versions([request.user.pk])
         messages.success(request, "🚀 Assinatura Plus Ativada!")
         return redirect('gamification:trail_list')
     return render(request, 'gamification/checkout.html')
 
+@login_required
+def ranking(request):
+    # Rankings por período servidos do rollup diário (cacheados por alguns segundos)
+    periodo = request.GET.get('periodo', 'semana')
+    if periodo not in leaderboard.PERIODS:
+        periodo = 'semana'
+    return render(request, 'gamification/ranking.html', {
+        'periodo': periodo,
+        'rotulo': leaderboard.PERIODS[periodo],
+        'periodos': leaderboard.PERIODS,
+        'inicio': leaderboard.period_start(periodo),
+        'ranking': leaderboard.windowed_top(periodo, n=20),
+    })
+
+@login_required
+def search_view(request):
+    query = request.GET.get('q', '').strip()
+    resultados = search(query, limit=30) if query else []
+    return render(request, 'gamification/search.html', {'query': query, 'resultados': resultados})
+
+@anonymous_page_cache()
 def tech_detail(request, tech_slug):
-    trails = Trail.objects.filter(title__icontains=tech_slug)
-    return render(request, 'gamification/tech_detail.html', {'tech_name': tech_slug.upper(), 'trails': trails})
+    # Taxonomia em cache (M2M indexada Technology <-> Trail) + catálogo em cache
+    tech = technology_by_slug(tech_slug)
+    if tech is None:
+        raise Http404("Tecnologia não encontrada")
+    by_id = {t.id: t for t in get_catalog()}
+    trails = [by_id[trail_id] for trail_id in tech.trail_ids if trail_id in by_id]
+    return render(request, 'gamification/tech_detail.html', {'tech_name': tech.name, 'tech': tech, 'trails': trails})
 
 def error_404(request, exception):
     return render(request, '404.html', status=404)
@@ -110,6 +110,68 @@ else:
             }
         }
 
+# 8.1 Cache (Redis em produção, memória local como salva-vidas)
+# O cache guarda páginas públicas, versões de conteúdo e dados agregados.
+redis_url = os.getenv('REDIS_URL')
+
+if redis_url:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': redis_url,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gamifica-uninter',
+        }
+    }
+
+# Validade (segundos) dos dados de referência em cache: gabaritos, limiares de medalhas e patentes.
+# Os signals só invalidam o cache do processo que fez a alteração; sem Redis, web e worker
+# (Procfile) têm caches separados, então o prazo curto limita quanto tempo uma cópia fica velha.
+REFERENCE_CACHE_TIMEOUT = int(os.getenv('REFERENCE_CACHE_TIMEOUT') or (3600 if redis_url else 60))
+
+# Tempo (segundos) das páginas públicas em cache para visitantes anônimos e CDN
+ANONYMOUS_PAGE_CACHE_TIMEOUT = int(os.getenv('ANONYMOUS_PAGE_CACHE_TIMEOUT', '300'))
+
+# Ranking global: largura das faixas de XP do histograma e validade (segundos) do cache
+LEADERBOARD_BUCKET_WIDTH = int(os.getenv('LEADERBOARD_BUCKET_WIDTH', '100'))
+LEADERBOARD_HISTOGRAM_TIMEOUT = int(os.getenv('LEADERBOARD_HISTOGRAM_TIMEOUT', '60'))
+# Rankings da semana/mês/temporada (rollup diário): validade do cache e duração da temporada
+LEADERBOARD_WINDOW_TIMEOUT = int(os.getenv('LEADERBOARD_WINDOW_TIMEOUT', '60'))
+LEADERBOARD_SEASON_MONTHS = int(os.getenv('LEADERBOARD_SEASON_MONTHS', '6'))
+
+# Resumo do dashboard por aluno (invalidado por versão; o tempo é só um teto)
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', '86400'))
+
+# Diretório dos segmentos arquivados do histórico de XP (archive_transactions)
+LEDGER_ARCHIVE_DIR = os.getenv('LEDGER_ARCHIVE_DIR') or str(BASE_DIR / 'archive' / 'ledger')
+
+# Geração de conteúdo por IA: cliente (caminho pontilhado) e modelos em ordem de preferência.
+# Use LLM_CLIENT=apps.gamification.llm.FakeClient para desenvolver sem rede/cota.
+LLM_CLIENT = os.getenv('LLM_CLIENT', 'apps.gamification.llm.GeminiClient')
+LLM_MODELS = os.getenv('LLM_MODELS', 'gemini-2.5-flash,gemini-2.0-flash,gemini-flash-latest').split(',')
+# Cota por modelo (requisições/minuto, token bucket por processo), ex.: "gemini-2.5-flash:10,gemini-2.0-flash:15".
+# Com vários workers, divida a cota do projeto entre eles.
+LLM_RATE_LIMITS = {
+    model.strip(): int(rpm)
+    for model, rpm in (item.split(':') for item in os.getenv('LLM_RATE_LIMITS', '').split(',') if item)
+}
+LLM_DEFAULT_RPM = int(os.getenv('LLM_DEFAULT_RPM', '10'))
+# Chamadas simultâneas ao LLM, pausa de um modelo após 429 e espera máxima por cota (segundos)
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+LLM_COOLDOWN_SECONDS = int(os.getenv('LLM_COOLDOWN_SECONDS', '60'))
+LLM_ACQUIRE_TIMEOUT = int(os.getenv('LLM_ACQUIRE_TIMEOUT', '120'))
+
+# Fila de tarefas em segundo plano (worker: python manage.py run_jobs)
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+# Espera antes da nova tentativa: base * 2^(tentativa - 1), limitada ao máximo
+JOB_BACKOFF_SECONDS = int(os.getenv('JOB_BACKOFF_SECONDS', '30'))
+JOB_BACKOFF_MAX_SECONDS = int(os.getenv('JOB_BACKOFF_MAX_SECONDS', '1800'))
+
 # 9. Autenticação Customizada (Importante para o TCC)
 AUTH_USER_MODEL = 'accounts.User'
 